@@ -0,0 +1,268 @@
+import asyncio
+import heapq
+import itertools
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from concurrency import QueueFullError
+
+# Lanes, from most to least urgent
+ASSESS = "assess" # text-only /assess: small bodies, milliseconds of work
+UPLOAD = "upload" # /assess with files, /transcribe, /assess/stream sessions
+RENDER = "render" # /report, /report/pdf
+BULK = "bulk" # /assess/batch, /report/bulk, /report/jobs/bulk
+
+_ROUTES = {
+    ("POST", "/transcribe"): UPLOAD,
+    ("POST", "/report"): RENDER,
+    ("POST", "/report/pdf"): RENDER,
+    ("POST", "/assess/batch"): BULK,
+    ("POST", "/report/bulk"): BULK,
+    ("POST", "/report/jobs/bulk"): BULK,
+}
+
+
+class BodyTooLargeError(Exception):
+    """Raised from receive() once a request body grows past its lane's limit."""
+
+
+class Lane:
+    """
+    Admission limits for one class of requests: how many run at once, how
+    many may wait for a slot, the largest body accepted and the priority
+    their waiters get when slots free up (lower first).
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, max_body: int, priority: int):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_body = max_body
+        self.priority = priority
+        self.running = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.too_large = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "running": self.running,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "too_large": self.too_large,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "max_body": self.max_body
+        }
+
+
+class AdmissionController:
+    """
+    Decides which requests run now, which wait and which are turned away,
+    before any of their body is read.
+
+    Each lane caps its own concurrency and queue, and all lanes together
+    share `max_concurrency` slots. A request over its lane's queue limit is
+    rejected at once; one that waits longer than `queue_timeout` gives up.
+    When a slot frees, the waiting request of the most urgent lane that has
+    room gets it, so cheap text-only assessments are not stuck behind a
+    backlog of renders and uploads.
+    """
+
+    def __init__(
+        self,
+        lanes: Iterable[Lane],
+        max_concurrency: int,
+        queue_timeout: float,
+        light_max_body: int,
+        default_max_body: int
+    ):
+        self.lanes = {lane.name: lane for lane in lanes}
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.light_max_body = light_max_body
+        self.default_max_body = default_max_body
+        self.running = 0
+        self._waiters: List[Tuple[int, int, Lane, asyncio.Future]] = []
+        self._order = itertools.count()
+
+    def classify(self, method: str, path: str, content_length: Optional[int]) -> Tuple[Optional[Lane], int]:
+        """
+        (lane, body limit) for a request; no lane means it is not limited.
+        /assess counts as text-only when it declares a body of at most
+        light_max_body bytes; uploads and chunked bodies go to UPLOAD.
+        """
+        if method == "POST" and path == "/assess":
+            if content_length is not None and content_length <= self.light_max_body:
+                lane = self.lanes.get(ASSESS)
+            else:
+                lane = self.lanes.get(UPLOAD)
+        else:
+            lane = self.lanes.get(_ROUTES.get((method, path)))
+        return lane, lane.max_body if lane else self.default_max_body
+
+    def _has_room(self, lane: Lane) -> bool:
+        return lane.running < lane.max_concurrency and self.running < self.max_concurrency
+
+    def _start(self, lane: Lane):
+        lane.running += 1
+        lane.admitted += 1
+        self.running += 1
+
+    async def acquire(self, lane: Lane):
+        """
+        Waits for a slot in `lane`. Raises QueueFullError when the lane's
+        queue is full and asyncio.TimeoutError after queue_timeout seconds.
+        """
+        if self._has_room(lane):
+            self._start(lane)
+            return
+        if lane.queued >= lane.max_queue:
+            lane.rejected += 1
+            raise QueueFullError(f"{lane.queued} {lane.name} requests already queued")
+
+        granted = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (lane.priority, next(self._order), lane, granted))
+        lane.queued += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(granted), self.queue_timeout)
+        except BaseException as e:
+            if granted.done():
+                # Granted just as we gave up: hand the slot on
+                self.release(lane)
+            else:
+                granted.cancel()
+                lane.queued -= 1
+                if isinstance(e, asyncio.TimeoutError):
+                    lane.timed_out += 1
+            raise
+
+    def release(self, lane: Lane):
+        lane.running -= 1
+        self.running -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        """
+        Starts waiters in priority order while there is room, skipping ones
+        whose own lane is full.
+        """
+        if not self._waiters or self.running >= self.max_concurrency:
+            return
+        waiting = []
+        for waiter in sorted(self._waiters):
+            _, _, lane, granted = waiter
+            if granted.done():
+                continue # gave up
+            if self._has_room(lane):
+                lane.queued -= 1
+                self._start(lane)
+                granted.set_result(None)
+            else:
+                waiting.append(waiter)
+        self._waiters = waiting # sorted, so still a heap
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "running": self.running,
+            "max_concurrency": self.max_concurrency,
+            "lanes": {name: lane.stats() for name, lane in self.lanes.items()}
+        }
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware applying an AdmissionController to HTTP requests.
+
+    Bodies are checked against the lane limit twice: a declared
+    Content-Length over it is refused with 413 before anything is read, and
+    a chunked body is counted as the app reads it and cut off with 413 the
+    moment it passes the limit, so oversized uploads are never buffered.
+    Rejected requests get 503 with Retry-After.
+    """
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        content_length = None
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                try:
+                    content_length = int(value)
+                except ValueError:
+                    pass
+                break
+        lane, max_body = self.controller.classify(scope["method"], scope["path"], content_length)
+
+        if content_length is not None and content_length > max_body:
+            if lane:
+                lane.too_large += 1
+            await _send_error(send, 413, f"Request body exceeds {max_body} bytes")
+            return
+
+        if lane is not None:
+            try:
+                await self.controller.acquire(lane)
+            except QueueFullError:
+                await _send_error(send, 503, f"Too many {lane.name} requests", retry_after=1)
+                return
+            except asyncio.TimeoutError:
+                await _send_error(send, 503, f"Timed out waiting for a {lane.name} slot", retry_after=1)
+                return
+
+        received = 0
+        too_large = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, too_large
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_body:
+                    too_large = True
+                    raise BodyTooLargeError(f"Request body exceeds {max_body} bytes")
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            if too_large:
+                # Whatever the app made of the aborted read, the answer is 413
+                if message["type"] == "http.response.start" and not response_started:
+                    response_started = True
+                    await _send_error(send, 413, f"Request body exceeds {max_body} bytes")
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except BodyTooLargeError:
+            if not response_started:
+                await _send_error(send, 413, f"Request body exceeds {max_body} bytes")
+        finally:
+            if too_large and lane:
+                lane.too_large += 1
+            if lane is not None:
+                self.controller.release(lane)
+
+
+async def _send_error(send, status: int, detail: str, retry_after: Optional[int] = None):
+    body = ('{"detail":"' + detail + '"}').encode("utf-8")
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode("latin-1"))]
+    if retry_after is not None:
+        headers.append((b"retry-after", str(retry_after).encode("latin-1")))
+    if status == 413:
+        headers.append((b"connection", b"close"))
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
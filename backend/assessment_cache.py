@@ -0,0 +1,73 @@
+from typing import Dict, List, Optional
+
+from caching import LRUCache
+from models import Assessment
+
+
+def _approx_size(result: Assessment) -> int:
+    """
+    Rough in-memory footprint of a cached result, for the byte budget.
+    Control records are shared with the control engine, so each costs only
+    a reference.
+    """
+    size = 256 + len(result.description or "") + len(result.reasoning or "")
+    size += sum(56 + len(h) for h in result.hazards)
+    size += 8 * len(result.controls)
+    return size
+
+
+class AssessmentCache:
+    """
+    End-to-end result cache in front of an AssessmentPipeline.
+
+    Entries are keyed on the normalized text, the sorted image tags, the
+    remaining run() inputs and the pipeline version, so a change to the hazard
+    dictionary, normalization rules or control rules never serves a stale
+    result; the cache is also emptied the first time a new version is seen.
+    Tags are sorted before the pipeline runs too, so a result never depends on
+    whether it came from the cache.
+
+    `pipeline` may be replaced at any time (knowledge base hot swap); each
+    run() reads it once and uses that snapshot throughout.
+    """
+
+    def __init__(self, pipeline, max_bytes: int, max_entries: Optional[int] = None, ttl: Optional[float] = None):
+        self.pipeline = pipeline
+        self.results = LRUCache(max_bytes, max_entries=max_entries, ttl=ttl)
+        self._version = None
+
+    def run(
+        self,
+        text: str = "",
+        image_tags: Optional[List[str]] = None,
+        vision_confidence_boost: int = 0,
+        has_audio: bool = False
+    ) -> Assessment:
+        pipeline = self.pipeline
+        safe_text = text or ""
+        tags = sorted(image_tags or [])
+        if not self.results.max_bytes:
+            return pipeline.run(safe_text, tags, vision_confidence_boost, has_audio)
+
+        version = pipeline.version
+        if version != self._version:
+            self.results.clear()
+            self._version = version
+
+        key = (
+            pipeline.hazard_engine._normalize_text(safe_text),
+            # Raw emptiness still matters (multi-modal bonus, audio fallback)
+            bool(safe_text),
+            tuple(tags),
+            vision_confidence_boost,
+            has_audio,
+            version
+        )
+        result = self.results.get(key)
+        if result is None:
+            result = pipeline.run(safe_text, tags, vision_confidence_boost, has_audio)
+            self.results.put(key, result, _approx_size(result))
+        return result
+
+    def stats(self) -> Dict[str, object]:
+        return dict(self.results.stats(), version=self._version)
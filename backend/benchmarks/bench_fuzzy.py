@@ -0,0 +1,75 @@
+"""
+Micro-benchmark: FuzzyKeywordIndex vs. the per-keyword difflib path.
+
+Run from the backend directory:
+    python -m benchmarks.bench_fuzzy [--words 300] [--docs 50] [--repeat 5]
+"""
+import argparse
+import difflib
+import random
+import time
+
+from benchmarks.corpora import FILLER, misspell
+from logic.hazard_engine import HazardEngine
+from logic.fuzzy_index import FuzzyKeywordIndex
+
+
+def build_corpus(keywords, docs: int, words: int, seed: int = 42):
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(docs):
+        tokens = []
+        for _ in range(words):
+            if rng.random() < 0.15:
+                tokens.extend(misspell(rng.choice(keywords), rng).split())
+            else:
+                tokens.append(misspell(rng.choice(FILLER), rng))
+        corpus.append(tokens)
+    return corpus
+
+
+def difflib_path(keywords, terms):
+    """The original identify_hazards fuzzy loop."""
+    hits = {}
+    for keyword in keywords:
+        matches = difflib.get_close_matches(keyword, terms, n=1, cutoff=0.8)
+        if matches:
+            hits[keyword] = matches[0]
+    return hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--words", type=int, default=300)
+    parser.add_argument("--docs", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    keywords = list(HazardEngine()._keyword_categories)
+    corpus = build_corpus(keywords, args.docs, args.words)
+
+    for terms in corpus:
+        assert FuzzyKeywordIndex(keywords).best_matches(terms) == difflib_path(keywords, terms)
+
+    def run(fn):
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+        return best / len(corpus) * 1000
+
+    difflib_ms = run(lambda: [difflib_path(keywords, terms) for terms in corpus])
+    # Cold: a fresh index (empty term cache) per document
+    cold_ms = run(lambda: [FuzzyKeywordIndex(keywords).best_matches(terms) for terms in corpus])
+    index = FuzzyKeywordIndex(keywords)
+    warm_ms = run(lambda: [index.best_matches(terms) for terms in corpus])
+
+    print(f"{len(keywords)} keywords, {args.docs} docs x {args.words} words (results verified identical)")
+    print(f"difflib.get_close_matches : {difflib_ms:8.3f} ms/doc")
+    print(f"FuzzyKeywordIndex (cold)  : {cold_ms:8.3f} ms/doc  ({difflib_ms / cold_ms:5.1f}x)")
+    print(f"FuzzyKeywordIndex (warm)  : {warm_ms:8.3f} ms/doc  ({difflib_ms / warm_ms:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
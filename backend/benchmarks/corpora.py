@@ -0,0 +1,112 @@
+"""
+Deterministic synthetic inputs for the benchmarks. Every generator takes a
+seed, so the same arguments always give the same corpus and results from
+different runs (and commits) are comparable.
+"""
+import random
+from typing import Dict, List, Sequence
+
+FILLER = [
+    "the", "crew", "was", "working", "near", "site", "area", "with", "team", "today",
+    "after", "before", "lunch", "shift", "supervisor", "said", "check", "north", "wall", "bay",
+]
+
+# Spoken forms the normalizer rewrites, as voice-to-text tends to produce them
+VOICE_SLANG = ["weldin", "goin", "doin", "fixin", "hi volt", "no vent", "n", "wat", "messy", "wire"]
+
+PUNCTUATION = ["", "", "", ",", ".", "!", " -"]
+
+
+def misspell(word: str, rng: random.Random) -> str:
+    """Drops, doubles or swaps a character, like voice-to-text output."""
+    if len(word) < 4:
+        return word
+    i = rng.randrange(1, len(word) - 1)
+    op = rng.randrange(3)
+    if op == 0:
+        return word[:i] + word[i + 1:]
+    if op == 1:
+        return word[:i] + word[i] + word[i:]
+    return word[:i - 1] + word[i] + word[i - 1] + word[i + 1:]
+
+
+def _sentence(rng: random.Random, keywords: Sequence[str], words: int, keyword_rate: float) -> str:
+    tokens = []
+    while len(tokens) < words:
+        if rng.random() < keyword_rate:
+            tokens.append(rng.choice(keywords))
+        else:
+            tokens.append(rng.choice(FILLER))
+    return " ".join(token + rng.choice(PUNCTUATION) for token in tokens).capitalize()
+
+
+def descriptions(keywords: Sequence[str], count: int, words: int, keyword_rate: float = 0.15, seed: int = 42) -> List[str]:
+    """Plain descriptions of `words` words, with exact keywords mixed in."""
+    rng = random.Random(seed)
+    return [_sentence(rng, keywords, words, keyword_rate) for _ in range(count)]
+
+
+def voice_descriptions(keywords: Sequence[str], count: int, words: int, seed: int = 42) -> List[str]:
+    """Lowercase, unpunctuated transcripts full of slang and misspellings."""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(count):
+        tokens = []
+        while len(tokens) < words:
+            roll = rng.random()
+            if roll < 0.1:
+                tokens.append(rng.choice(VOICE_SLANG))
+            elif roll < 0.25:
+                tokens.append(misspell(rng.choice(keywords), rng))
+            else:
+                tokens.append(misspell(rng.choice(FILLER), rng))
+        corpus.append(" ".join(tokens))
+    return corpus
+
+
+def fuzzy_only_descriptions(keywords: Sequence[str], count: int, words: int, seed: int = 42) -> List[str]:
+    """
+    Descriptions whose keywords are all misspelled, so every hazard is found
+    through the fuzzy index rather than the keyword automaton.
+    """
+    rng = random.Random(seed)
+    exact = set(keywords)
+    single_words = [keyword for keyword in keywords if " " not in keyword and len(keyword) >= 5]
+    corpus = []
+    for _ in range(count):
+        tokens = []
+        while len(tokens) < words:
+            if rng.random() < 0.15:
+                word = misspell(rng.choice(single_words), rng)
+                if word not in exact:
+                    tokens.append(word)
+            else:
+                tokens.append(rng.choice(FILLER))
+        corpus.append(" ".join(tokens))
+    return corpus
+
+
+def many_hazard_descriptions(hazard_dictionary: Dict[str, Dict[str, List[str]]], count: int, seed: int = 42) -> List[str]:
+    """Descriptions mentioning a keyword from every hazard category."""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(count):
+        tokens = [rng.choice(list(data["keywords"])) for data in hazard_dictionary.values()]
+        tokens += [rng.choice(FILLER) for _ in range(len(tokens))]
+        rng.shuffle(tokens)
+        corpus.append(" ".join(tokens))
+    return corpus
+
+
+def report(hazards: List[str], controls: List[Dict[str, str]], risk_level: str = "High") -> Dict:
+    """An assessment dict as the report endpoints receive it."""
+    return {
+        "risk_score": {"Low": 4, "Medium": 9, "High": 20}[risk_level],
+        "risk_level": risk_level,
+        "hazards": hazards,
+        "controls": controls,
+        "confidence": "High",
+        "confidence_score": 90,
+        "reasoning": "Synthetic benchmark assessment.",
+        "description": "Synthetic benchmark assessment."
+    }
@@ -0,0 +1,349 @@
+"""
+Load test: replays a mixed workload against the API at a fixed concurrency
+and reports latency percentiles, throughput and event-loop lag.
+
+Run from the backend directory:
+    python -m benchmarks.loadtest [--concurrency 32] [--duration 10]
+        [--mix assess_text=60,assess_image=15,assess_audio=5,report=15,report_pdf=5]
+        [--budget assess_text:p95=50] [--budget all:p99=2000] [--max-loop-lag 100]
+        [--transport asgi|uvicorn] [--output results.json]
+
+The app runs in this process: either called directly through httpx's ASGI
+transport (no sockets, the default), or served by uvicorn on a local port
+on its own thread. Each of `concurrency` clients sends one request after
+another, picking its scenario at random with the --mix weights. Meanwhile a
+probe on the server's event loop measures how late its timer fires, which
+is how long anything on that loop (a blocking call, a long computation)
+kept every other request waiting.
+
+Exits with status 1 if a --budget, --max-loop-lag or --max-error-rate is
+exceeded, so it can gate a build.
+"""
+import argparse
+import asyncio
+import json
+import random
+import socket
+import sys
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import httpx
+
+from benchmarks import corpora
+
+SCENARIOS = ("assess_text", "assess_image", "assess_audio", "transcribe", "report", "report_pdf")
+DEFAULT_MIX = "assess_text=60,assess_image=15,assess_audio=5,report=15,report_pdf=5"
+PERCENTILES = (50, 95, 99)
+PROBE_INTERVAL = 0.01
+
+
+class Budget(NamedTuple):
+    scenario: str # or "all"
+    percentile: int
+    limit_ms: float
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario '{name}' (expected one of {', '.join(SCENARIOS)})")
+        mix[name] = float(weight or 1)
+    if not any(mix.values()):
+        raise ValueError("The mix needs at least one scenario with a positive weight")
+    return mix
+
+
+def parse_budget(text: str) -> Budget:
+    """SCENARIO:pNN=MS, e.g. assess_text:p95=50 or all:p99=2000."""
+    try:
+        scenario, _, rest = text.partition(":")
+        percentile, _, limit = rest.partition("=")
+        budget = Budget(scenario, int(percentile.lstrip("p")), float(limit))
+    except ValueError:
+        raise ValueError(f"Invalid budget '{text}', expected SCENARIO:pNN=MS") from None
+    if budget.scenario != "all" and budget.scenario not in SCENARIOS:
+        raise ValueError(f"Unknown scenario '{budget.scenario}' in budget '{text}'")
+    return budget
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class Workload:
+    """
+    Builds the requests for each scenario from deterministic corpora.
+    Report payloads carry a unique description, so every report request
+    renders instead of hitting the report cache.
+    """
+
+    def __init__(self, seed: int = 42):
+        from logic.hazard_engine import HazardEngine
+        keywords = list(HazardEngine()._keyword_categories)
+        self.texts = corpora.descriptions(keywords, 500, words=25, seed=seed)
+        self.images = [(name, bytes(random.Random(seed + i).getrandbits(8) for _ in range(2048)))
+                       for i, name in enumerate(["site_weld.jpg", "scaffold_height.jpg", "chemical_drum.png", "messy_floor.jpg"])]
+        self.audio = ("voice_note_height.webm", b"\0" * 4096)
+        self.report = corpora.report(["Fall from Height", "Falling Objects"], [
+            {"type": "Engineering", "description": "Install certified collective protection (guardrails/toeboards)."},
+            {"type": "Administrative", "description": "Permit-to-work for all work at height."},
+            {"type": "PPE", "description": "Full body harness with double lanyard."}
+        ])
+        self._serial = 0
+
+    def request(self, scenario: str, rng: random.Random) -> Tuple[str, str, dict]:
+        """(method, path, httpx request kwargs)"""
+        text = rng.choice(self.texts)
+        if scenario == "assess_text":
+            return "POST", "/assess", {"data": {"text": text}}
+        if scenario == "assess_image":
+            name, content = rng.choice(self.images)
+            return "POST", "/assess", {"data": {"text": text}, "files": {"image": (name, content, "image/jpeg")}}
+        if scenario == "assess_audio":
+            name, content = self.audio
+            return "POST", "/assess", {"files": {"audio": (name, content, "audio/webm")}}
+        if scenario == "transcribe":
+            name, content = self.audio
+            return "POST", "/transcribe", {"files": {"audio": (name, content, "audio/webm")}}
+        self._serial += 1
+        body = dict(self.report, description=f"Load test report {self._serial}: {text}")
+        return "POST", "/report" if scenario == "report" else "/report/pdf", {"json": body}
+
+
+class LoopLagProbe:
+    """
+    Sleeps PROBE_INTERVAL at a time on the event loop it runs on and records
+    how much later than asked each wakeup came.
+    """
+
+    def __init__(self):
+        self.lags: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(PROBE_INTERVAL)
+            self.lags.append(max(0.0, loop.time() - start - PROBE_INTERVAL))
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+
+
+class LoadTest:
+    def __init__(self, client: httpx.AsyncClient, workload: Workload, mix: Dict[str, float], seed: int = 42):
+        self.client = client
+        self.workload = workload
+        self.scenarios = [name for name, weight in mix.items() if weight > 0]
+        self.weights = [mix[name] for name in self.scenarios]
+        self.seed = seed
+        self.latencies: Dict[str, List[float]] = {name: [] for name in self.scenarios}
+        self.statuses: Dict[str, Dict[str, int]] = {name: {} for name in self.scenarios}
+        self._recording = False
+
+    async def _client_loop(self, index: int, deadline: float):
+        rng = random.Random(self.seed * 1000 + index)
+        while time.perf_counter() < deadline:
+            scenario = rng.choices(self.scenarios, self.weights)[0]
+            method, path, kwargs = self.workload.request(scenario, rng)
+            start = time.perf_counter()
+            try:
+                response = await self.client.request(method, path, **kwargs)
+                await response.aread()
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            elapsed = time.perf_counter() - start
+            if self._recording:
+                self.latencies[scenario].append(elapsed)
+                self.statuses[scenario][status] = self.statuses[scenario].get(status, 0) + 1
+
+    async def run(self, concurrency: int, duration: float, warmup: float = 0.0) -> float:
+        """
+        Runs the clients for warmup + duration seconds, recording only after
+        the warm-up. Returns the measured wall time.
+        """
+        if warmup:
+            await asyncio.gather(*(self._client_loop(i, time.perf_counter() + warmup) for i in range(concurrency)))
+        self._recording = True
+        start = time.perf_counter()
+        await asyncio.gather(*(self._client_loop(i, start + duration) for i in range(concurrency)))
+        return time.perf_counter() - start
+
+
+def summarize(latencies: List[float], statuses: Dict[str, int], wall: float) -> Dict:
+    values = sorted(latencies)
+    errors = sum(count for status, count in statuses.items() if not status.isdigit() or status >= "500")
+    summary = {
+        "requests": len(values),
+        "throughput_rps": len(values) / wall if wall else 0.0,
+        "errors": errors,
+        "error_rate": errors / len(values) if values else 0.0,
+        "statuses": dict(sorted(statuses.items())),
+        "max_ms": values[-1] * 1000 if values else 0.0
+    }
+    for pct in PERCENTILES:
+        summary[f"p{pct}_ms"] = percentile(values, pct) * 1000
+    return summary
+
+
+def report(test: LoadTest, probe: LoopLagProbe, wall: float) -> Dict:
+    scenarios = {name: summarize(test.latencies[name], test.statuses[name], wall) for name in test.scenarios}
+    all_statuses: Dict[str, int] = {}
+    for statuses in test.statuses.values():
+        for status, count in statuses.items():
+            all_statuses[status] = all_statuses.get(status, 0) + count
+    lags = sorted(probe.lags)
+    return {
+        "wall_seconds": wall,
+        "scenarios": scenarios,
+        "all": summarize([v for values in test.latencies.values() for v in values], all_statuses, wall),
+        "loop_lag": {
+            "samples": len(lags),
+            **{f"p{pct}_ms": percentile(lags, pct) * 1000 for pct in PERCENTILES},
+            "max_ms": lags[-1] * 1000 if lags else 0.0
+        }
+    }
+
+
+def print_report(result: Dict):
+    print(f"\n{'scenario':14} {'requests':>9} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9} {'errors':>7}")
+    rows = list(result["scenarios"].items()) + [("all", result["all"])]
+    for name, s in rows:
+        print(f"{name:14} {s['requests']:9d} {s['throughput_rps']:8.1f} {s['p50_ms']:7.1f}ms {s['p95_ms']:7.1f}ms "
+              f"{s['p99_ms']:7.1f}ms {s['max_ms']:7.1f}ms {s['errors']:7d}")
+    lag = result["loop_lag"]
+    print(f"\nevent loop lag: p50 {lag['p50_ms']:.1f}ms  p95 {lag['p95_ms']:.1f}ms  p99 {lag['p99_ms']:.1f}ms  "
+          f"max {lag['max_ms']:.1f}ms  ({lag['samples']} samples)")
+    for name, s in rows:
+        odd = {status: count for status, count in s["statuses"].items() if status != "200"}
+        if odd and name != "all":
+            print(f"{name}: non-200 responses {odd}")
+
+
+def check(result: Dict, budgets: List[Budget], max_loop_lag: Optional[float], max_error_rate: float) -> List[str]:
+    """Returns a description of every budget that was exceeded."""
+    failures = []
+    for budget in budgets:
+        stats = result["all"] if budget.scenario == "all" else result["scenarios"].get(budget.scenario)
+        if stats is None:
+            failures.append(f"{budget.scenario}: not in the mix")
+            continue
+        key = f"p{budget.percentile}_ms"
+        value = stats[key] if key in stats else None
+        if value is None:
+            failures.append(f"{budget.scenario}: p{budget.percentile} is not reported (use one of {PERCENTILES})")
+        elif value > budget.limit_ms:
+            failures.append(f"{budget.scenario} p{budget.percentile} {value:.1f}ms > {budget.limit_ms:g}ms")
+    if max_loop_lag is not None and result["loop_lag"]["p99_ms"] > max_loop_lag:
+        failures.append(f"event loop lag p99 {result['loop_lag']['p99_ms']:.1f}ms > {max_loop_lag:g}ms")
+    for name, stats in [("all", result["all"])] + list(result["scenarios"].items()):
+        if stats["error_rate"] > max_error_rate:
+            failures.append(f"{name} error rate {stats['error_rate']:.1%} > {max_error_rate:.1%}")
+    return failures
+
+
+async def run_asgi(app, args, workload: Workload, mix: Dict[str, float]) -> Dict:
+    probe = LoopLagProbe()
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=args.timeout) as client:
+            test = LoadTest(client, workload, mix, args.seed)
+            probe.start()
+            try:
+                wall = await test.run(args.concurrency, args.duration, args.warmup)
+            finally:
+                probe.stop()
+    return report(test, probe, wall)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def run_uvicorn(app, args, workload: Workload, mix: Dict[str, float]) -> Dict:
+    import uvicorn
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    server_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=server_loop.run_until_complete, args=(server.serve(),), daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("uvicorn failed to start")
+        await asyncio.sleep(0.05)
+
+    # The probe runs on the server's loop: that is the loop whose stalls matter
+    probe = LoopLagProbe()
+    server_loop.call_soon_threadsafe(probe.start)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=args.timeout, limits=limits) as client:
+            test = LoadTest(client, workload, mix, args.seed)
+            wall = await test.run(args.concurrency, args.duration, args.warmup)
+    finally:
+        server_loop.call_soon_threadsafe(probe.stop)
+        server.should_exit = True
+        thread.join(timeout=10)
+    return report(test, probe, wall)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--transport", choices=("asgi", "uvicorn"), default="asgi")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds before that")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"scenario=weight,... from {', '.join(SCENARIOS)}")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--budget", action="append", default=[], help="SCENARIO:pNN=MS latency budget (repeatable)")
+    parser.add_argument("--max-loop-lag", type=float, help="budget for the p99 event loop lag, in ms")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="fraction of 5xx or failed requests allowed")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+    try:
+        mix = parse_mix(args.mix)
+        budgets = [parse_budget(text) for text in args.budget]
+    except ValueError as e:
+        parser.error(str(e))
+
+    from main import create_app
+    app = create_app()
+    workload = Workload(args.seed)
+    print(f"{args.transport}: {args.concurrency} clients for {args.duration:g}s (+{args.warmup:g}s warm-up), mix {args.mix}")
+    runner = run_asgi if args.transport == "asgi" else run_uvicorn
+    result = asyncio.run(runner(app, args, workload, mix))
+    result["config"] = {key: value for key, value in vars(args).items() if key != "output"}
+    print_report(result)
+
+    failures = check(result, budgets, args.max_loop_lag, args.max_error_rate)
+    result["failures"] = failures
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.output}")
+    if failures:
+        print("\nBudget exceeded:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""
+Benchmark suite: the engines and report rendering, each stage timed on its
+own over deterministic synthetic corpora (see benchmarks.corpora).
+
+Run from the backend directory:
+    python -m benchmarks.run [--filter identify] [--output results.json]
+    python -m benchmarks.run --baseline results.json [--threshold 0.2]
+
+Results are written as JSON (microseconds per operation). With --baseline,
+each case is compared against a stored result file and the run exits with
+status 1 if any case got slower by more than --threshold.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from benchmarks import corpora
+from logic.control_engine import ControlEngine
+from logic.hazard_engine import HazardEngine
+from logic.risk_engine import LEVELS, SCALE, RiskEngine
+
+# Bump when cases change in a way that makes old result files incomparable
+SCHEMA_VERSION = 1
+
+
+class Case(NamedTuple):
+    name: str
+    # Returns the function to time; it performs `ops` operations per call
+    setup: Callable[[], Callable[[], object]]
+    ops: int
+    description: str
+
+
+def _hazard_cases(engine: HazardEngine, size: int) -> List[Case]:
+    keywords = list(engine._keyword_categories)
+    short = corpora.descriptions(keywords, size, words=12, seed=1)
+    long = corpora.descriptions(keywords, size // 10, words=400, seed=2)
+    voice = corpora.voice_descriptions(keywords, size, words=40, seed=3)
+    direct = corpora.descriptions(keywords, size, words=40, keyword_rate=0.2, seed=4)
+    fuzzy = corpora.fuzzy_only_descriptions(keywords, size, words=40, seed=5)
+    many = corpora.many_hazard_descriptions(engine.hazard_dictionary, size // 4, seed=6)
+
+    def over(fn, corpus):
+        return lambda: lambda: [fn(text) for text in corpus]
+
+    def fuzzy_cold():
+        def run():
+            # Empty term cache: every term goes through the index
+            engine._fuzzy_index.lookup.cache_clear()
+            return [engine.identify_hazards(text) for text in fuzzy]
+        return run
+
+    return [
+        Case("normalize.short", over(engine._normalize_text, short), len(short), "12-word descriptions"),
+        Case("normalize.long", over(engine._normalize_text, long), len(long), "400-word descriptions"),
+        Case("normalize.voice", over(engine._normalize_text, voice), len(voice), "40-word transcripts with slang"),
+        Case("identify.short", over(engine.identify_hazards, short), len(short), "12-word descriptions"),
+        Case("identify.long", over(engine.identify_hazards, long), len(long), "400-word descriptions"),
+        Case("identify.voice", over(engine.identify_hazards, voice), len(voice), "misspelled 40-word transcripts"),
+        Case("identify.direct", over(engine.identify_hazards, direct), len(direct), "exact keywords only"),
+        Case("identify.fuzzy", over(engine.identify_hazards, fuzzy), len(fuzzy), "misspelled keywords only, warm term cache"),
+        Case("identify.fuzzy_cold", fuzzy_cold, len(fuzzy), "misspelled keywords only, empty term cache"),
+        Case("identify.many_hazards", over(engine.identify_hazards, many), len(many), "a keyword from every category"),
+    ]
+
+
+def _risk_cases() -> List[Case]:
+    engine = RiskEngine()
+    inputs = [
+        (likelihood, severity, bool(flags & 1), bool(flags & 2), bool(flags & 4))
+        for likelihood in SCALE for severity in SCALE for flags in range(8)
+    ]
+
+    def setup():
+        return lambda: [engine.calculate_risk(*args) for args in inputs]
+
+    return [Case("risk.calculate", setup, len(inputs), "every likelihood, severity and flag combination")]
+
+
+def _control_cases(hazard_engine: HazardEngine) -> List[Case]:
+    engine = ControlEngine()
+    inputs = [(hazard, level) for hazard in hazard_engine.hazard_names() for level in LEVELS]
+    inputs.append(("Something not in the dictionary", "High"))
+
+    def warm():
+        return lambda: [engine.select_controls(hazard, level) for hazard, level in inputs]
+
+    def cold():
+        def run():
+            # A fresh engine: category resolution and control lists rebuilt
+            fresh = ControlEngine()
+            return [fresh.select_controls(hazard, level) for hazard, level in inputs]
+        return run
+
+    return [
+        Case("controls.select", warm, len(inputs), "every hazard name at every risk level"),
+        Case("controls.select_cold", cold, len(inputs), "same, on a new engine each round"),
+    ]
+
+
+def _report_cases(hazard_engine: HazardEngine) -> List[Case]:
+    from logic.document_engine import DocumentEngine
+
+    control_engine = ControlEngine()
+    hazards = hazard_engine.hazard_names()
+    controls = {}
+    for hazard in hazards:
+        for control in control_engine.select_controls(hazard, "High"):
+            controls.setdefault(control.id, {"type": control.type, "description": control.description})
+    small = corpora.report(hazards[:1], list(controls.values())[:3], "Medium")
+    large = corpora.report(hazards, list(controls.values()))
+
+    def render(method: str, data: Dict):
+        def setup():
+            engine = DocumentEngine()
+            generate = getattr(engine, method)
+            generate(data) # template build and imports are not what is measured
+            return lambda: generate(data)
+        return setup
+
+    def render_bulk(fmt: str, records: List[Dict]):
+        def setup():
+            from rendering import render_bulk_report
+
+            directory = tempfile.mkdtemp(prefix="safetyweb-bench-")
+            input_path = os.path.join(directory, "assessments.json")
+            output_path = os.path.join(directory, f"report.{fmt}")
+            with open(input_path, "w", encoding="utf-8") as f:
+                json.dump(records, f)
+            render_bulk_report(fmt, input_path, output_path, 1024 * 1024)
+            _check_report(fmt, output_path) # a fast broken file is not a result
+            return lambda: render_bulk_report(fmt, input_path, output_path, 1024 * 1024)
+        return setup
+
+    # Hazard names and control text with markup characters, as users can send them
+    bulk = [small, large, corpora.report(["<b", "Fire & Smoke"], [{"type": "PPE", "description": "Gloves <nitrile>"}])] * 10
+
+    return [
+        Case("report.docx", render("generate_docx", small), 1, "one hazard, three controls"),
+        Case("report.docx_many_controls", render("generate_docx", large), 1,
+             f"{len(hazards)} hazards, {len(controls)} controls"),
+        Case("report.pdf", render("generate_pdf", small), 1, "one hazard, three controls"),
+        Case("report.pdf_many_controls", render("generate_pdf", large), 1,
+             f"{len(hazards)} hazards, {len(controls)} controls"),
+        Case("report.docx_bulk", render_bulk("docx", bulk), 1, f"consolidated report of {len(bulk)} assessments"),
+        Case("report.pdf_bulk", render_bulk("pdf", bulk), 1, f"consolidated report of {len(bulk)} assessments"),
+    ]
+
+
+def _check_report(fmt: str, path: str):
+    """
+    Raises unless the file at `path` opens as a report of format `fmt`.
+    """
+    if fmt == "docx":
+        from docx import Document
+
+        Document(path)
+    else:
+        with open(path, "rb") as f:
+            if f.read(5) != b"%PDF-":
+                raise ValueError(f"{path} is not a PDF")
+
+
+def build_cases(size: int) -> List[Case]:
+    hazard_engine = HazardEngine()
+    cases = _hazard_cases(hazard_engine, size) + _risk_cases() + _control_cases(hazard_engine)
+    try:
+        cases += _report_cases(hazard_engine)
+    except ImportError as e:
+        print(f"Skipping report cases: {e}", file=sys.stderr)
+    return cases
+
+
+def measure(fn: Callable[[], object], ops: int, rounds: int, min_time: float) -> Dict[str, float]:
+    """
+    Times `rounds` rounds of fn, each repeated enough times to last at
+    least min_time. Returns per-operation statistics in microseconds.
+    """
+    fn() # first call: lazy caches, imports
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9)))
+
+    samples = [elapsed / (number * ops) * 1e6]
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(rounds - 1):
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            samples.append((time.perf_counter() - start) / (number * ops) * 1e6)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return {
+        "median_us": statistics.median(samples),
+        "min_us": min(samples),
+        "mean_us": statistics.fmean(samples),
+        "stdev_us": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "rounds": len(samples),
+        "calls_per_round": number,
+        "ops_per_call": ops
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float, filters: List[str]) -> List[str]:
+    """
+    Prints current vs. baseline times; returns the cases that slowed down by
+    more than `threshold` (a fraction). Compares the fastest round, which
+    shifts least with background noise on the machine.
+    """
+    regressions = []
+    print(f"\n{'case':32} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:32} {'-':>12} {result['min_us']:10.2f}us {'new':>8}")
+            continue
+        change = result["min_us"] / before["min_us"] - 1
+        marker = ""
+        if change > threshold:
+            marker = "  SLOWER"
+            regressions.append(name)
+        elif change < -threshold:
+            marker = "  faster"
+        print(f"{name:32} {before['min_us']:10.2f}us {result['min_us']:10.2f}us {change:+8.1%}{marker}")
+    for name in baseline:
+        if name not in results and not filters:
+            print(f"{name:32} (not run)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--filter", action="append", default=[], help="only run cases whose name contains this (repeatable)")
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.1, help="seconds per round")
+    parser.add_argument("--size", type=int, default=200, help="documents per text corpus")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="compare against a results file written by --output")
+    parser.add_argument("--threshold", type=float, default=0.2, help="slowdown that counts as a regression")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            stored = json.load(f)
+        if stored.get("schema") != SCHEMA_VERSION:
+            parser.error(f"{args.baseline} has schema {stored.get('schema')}, expected {SCHEMA_VERSION}")
+        baseline = stored["results"]
+
+    results = {}
+    for case in build_cases(args.size):
+        if args.filter and not any(f in case.name for f in args.filter):
+            continue
+        result = measure(case.setup(), case.ops, args.rounds, args.min_time)
+        result["description"] = case.description
+        results[case.name] = result
+        print(f"{case.name:32} {result['median_us']:10.2f}us/op  (min {result['min_us']:.2f}, "
+              f"stdev {result['stdev_us']:.2f})  {case.description}")
+
+    if args.output:
+        document = {
+            "schema": SCHEMA_VERSION,
+            "meta": {
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "commit": _git_commit(),
+                "python": platform.python_version(),
+                "implementation": platform.python_implementation(),
+                "machine": platform.machine(),
+                "system": platform.platform(),
+                "size": args.size
+            },
+            "results": results
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold, args.filter)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) slower than the baseline by more than {args.threshold:.0%}: "
+                  + ", ".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
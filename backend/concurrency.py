@@ -0,0 +1,95 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class QueueFullError(Exception):
+    """Raised when a BoundedExecutor already has max_queue callers waiting."""
+
+
+def make_executor(kind: str, workers: int, name: str) -> Executor:
+    """
+    Builds the pool behind a BoundedExecutor. kind is "thread" or "process".
+    """
+    if kind == "process":
+        return ProcessPoolExecutor(max_workers=workers)
+    if kind == "thread":
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+    raise ValueError(f"Unknown executor kind '{kind}' (expected 'thread' or 'process')")
+
+
+class BoundedExecutor:
+    """
+    Runs blocking callables off the event loop with explicit limits:
+    at most max_concurrency calls execute at once, at most max_queue callers
+    wait for a slot (beyond that QueueFullError is raised immediately), and
+    each call is abandoned with asyncio.TimeoutError after timeout seconds.
+
+    A timed-out call keeps its slot until the worker actually finishes, so a
+    stuck backend cannot cause more than max_concurrency calls to pile up.
+    """
+
+    def __init__(self, executor: Executor, max_concurrency: int, max_queue: int, timeout: Optional[float] = None):
+        self.executor = executor
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.running = 0
+        self.queued = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def _release(self, _future=None):
+        self.running -= 1
+        self._slots.release()
+
+    async def run(self, fn: Callable, *args: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Runs fn(*args) on the pool. timeout overrides the pool default.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        if self._slots.locked() and self.queued >= self.max_queue:
+            self.rejected += 1
+            raise QueueFullError(f"{self.queued} calls already queued")
+
+        self.queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+        self.running += 1
+
+        try:
+            future = asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            future.add_done_callback(self._release)
+            raise
+        except BaseException:
+            if future.done():
+                self._release()
+            else:
+                future.add_done_callback(self._release)
+            raise
+        self._release()
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "running": self.running,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue
+        }
+
+    def shutdown(self, wait: bool = True):
+        self.executor.shutdown(wait=wait)
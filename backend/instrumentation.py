@@ -0,0 +1,345 @@
+import functools
+import importlib
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Seconds; spans sub-millisecond matching up to multi-second bulk renders
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# (stage, seconds) recorded during the current request, for Server-Timing
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_timings", default=None)
+_request_started: ContextVar[Optional[float]] = ContextVar("request_started", default=None)
+
+_NO_STAGE = nullcontext()
+
+# One metric sample: (label name/value pairs, value)
+Sample = Tuple[Tuple[Tuple[str, str], ...], float]
+# (name, type, help, samples), as returned by collectors
+Family = Tuple[str, str, str, List[Sample]]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs: Iterable[Tuple[str, str]]) -> str:
+    body = ",".join(f'{name}="{_escape(value)}"' for name, value in pairs)
+    return "{" + body + "}" if body else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _family_lines(name: str, kind: str, help_text: str, samples: Iterable[Sample]) -> List[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    lines.extend(f"{name}{_labels(labels)} {_number(value)}" for labels, value in samples)
+    return lines
+
+
+class Counter:
+    """
+    Monotonic counter with a fixed set of label names.
+    """
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def expose(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return _family_lines(self.name, "counter", self.help_text, (
+            (tuple(zip(self.label_names, label_values)), value) for label_values, value in values
+        ))
+
+
+class Histogram:
+    """
+    Cumulative-bucket latency histogram keyed by a single label.
+    """
+
+    def __init__(self, name: str, help_text: str, label_name: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_name = label_name
+        self.buckets = buckets
+        self._series: Dict[str, list] = {} # label -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, label: str, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label)
+            if series is None:
+                series = self._series[label] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def expose(self) -> List[str]:
+        with self._lock:
+            snapshot = sorted((label, list(series)) for label, series in self._series.items())
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label, series in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(((self.label_name, label), ('le', _number(bound))))} {cumulative}")
+            labels = _labels(((self.label_name, label),))
+            lines.append(f"{self.name}_sum{labels} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Metrics:
+    """
+    Per-stage latency histograms, request counters and Prometheus text
+    exposition. When disabled nothing is wrapped and stage() hands back a
+    shared no-op context manager, so the hot path pays next to nothing.
+    """
+
+    def __init__(self, enabled: bool = True, server_timing: bool = False, prefix: str = "safetyweb"):
+        self.enabled = enabled
+        self.server_timing = enabled and server_timing
+        self.prefix = prefix
+        self.stage_seconds = Histogram(f"{prefix}_stage_seconds", "Time spent per processing stage.", "stage")
+        self.request_seconds = Histogram(f"{prefix}_request_seconds", "HTTP request latency by route.", "route")
+        self.requests = Counter(f"{prefix}_requests_total", "HTTP requests by route and status.", ("route", "method", "status"))
+        self._collectors: List[Callable[[], List[Family]]] = []
+
+    def record(self, stage: str, seconds: float):
+        if not self.enabled:
+            return
+        self.stage_seconds.observe(stage, seconds)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((stage, seconds))
+
+    def stage(self, stage: str):
+        """
+        Context manager timing a block as `stage`.
+        """
+        if not self.enabled:
+            return _NO_STAGE
+        return self._timed_block(stage)
+
+    @contextmanager
+    def _timed_block(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def request_parsed(self, stage: str = "upload"):
+        """
+        Records the time from the start of the request until now, i.e. body
+        and form parsing, as `stage`. Call first thing in a handler.
+        """
+        started = _request_started.get()
+        if started is not None:
+            self.record(stage, time.perf_counter() - started)
+
+    def instrument(self, obj, method_name: str, stage: str):
+        """
+        Replaces obj.method_name with a wrapper timing each call as `stage`.
+        No-op when disabled.
+        """
+        if not self.enabled:
+            return
+        method = getattr(obj, method_name)
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - start)
+
+        setattr(obj, method_name, timed)
+
+    def add_collector(self, collector: Callable[[], List[Family]]):
+        """
+        Registers a callable returning metric families, evaluated on scrape.
+        """
+        self._collectors.append(collector)
+
+    def add_cache(self, name: str, cache):
+        """
+        Exposes an LRUCache-style stats() dict (hits, misses, evictions, entries, bytes).
+        """
+        label = (("cache", name),)
+
+        def collect() -> List[Family]:
+            stats = cache.stats()
+            return [
+                (f"{self.prefix}_cache_{key}_total", "counter", f"Cache {key}.", [(label, stats[key])])
+                for key in ("hits", "misses", "evictions")
+            ] + [
+                (f"{self.prefix}_cache_{key}", "gauge", f"Cache {key}.", [(label, stats[key])])
+                for key in ("entries", "bytes")
+            ]
+
+        self.add_collector(collect)
+
+    def add_pool(self, name: str, pool):
+        """
+        Exposes a BoundedExecutor's stats().
+        """
+        label = (("pool", name),)
+
+        def collect() -> List[Family]:
+            stats = pool.stats()
+            return [
+                (f"{self.prefix}_pool_{key}", "gauge", f"Worker pool {key}.", [(label, stats[key])])
+                for key in ("running", "queued", "max_concurrency", "max_queue")
+            ] + [
+                (f"{self.prefix}_pool_{key}_total", "counter", f"Worker pool calls {key}.", [(label, stats[key])])
+                for key in ("rejected", "timed_out")
+            ]
+
+        self.add_collector(collect)
+
+    def add_admission(self, controller):
+        """
+        Exposes an AdmissionController's per-lane stats().
+        """
+
+        def collect() -> List[Family]:
+            lanes = controller.stats()["lanes"]
+
+            def samples(key):
+                return [((("lane", name),), stats[key]) for name, stats in lanes.items()]
+
+            return [
+                (f"{self.prefix}_admission_{key}", "gauge", f"Admission lane {key}.", samples(key))
+                for key in ("running", "queued", "max_concurrency", "max_queue", "max_body")
+            ] + [
+                (f"{self.prefix}_admission_{key}_total", "counter", f"Admission lane requests {key}.", samples(key))
+                for key in ("admitted", "rejected", "timed_out", "too_large")
+            ]
+
+        self.add_collector(collect)
+
+    def expose(self) -> str:
+        """
+        Prometheus text exposition format (version 0.0.4). Families shared by
+        several collectors (e.g. one per cache) are merged under one header.
+        """
+        lines = self.stage_seconds.expose() + self.request_seconds.expose() + self.requests.expose()
+        families: Dict[str, Family] = {}
+        for collector in self._collectors:
+            for name, kind, help_text, samples in collector():
+                if name in families:
+                    families[name][3].extend(samples)
+                else:
+                    families[name] = (name, kind, help_text, list(samples))
+        for family in families.values():
+            lines += _family_lines(*family)
+        return "\n".join(lines) + "\n"
+
+
+class StartupReport:
+    """
+    Wall time of each startup phase: module imports, service initialization
+    and warm-up steps, in the order they happened.
+    """
+
+    def __init__(self, started: Optional[float] = None):
+        self.started = time.perf_counter() if started is None else started # perf_counter() at process start
+        self.phases: List[Tuple[str, float]] = []
+
+    def record(self, phase: str, seconds: float):
+        self.phases.append((phase, seconds))
+
+    @contextmanager
+    def timed(self, phase: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase, time.perf_counter() - start)
+
+    def import_module(self, name: str):
+        """
+        Imports a module, recording the time as "import <name>" unless it
+        was already loaded.
+        """
+        start = time.perf_counter()
+        module = importlib.import_module(name)
+        seconds = time.perf_counter() - start
+        if seconds > 0.0001:
+            self.record(f"import {name}", seconds)
+        return module
+
+    def summary(self) -> str:
+        total = time.perf_counter() - self.started
+        lines = [f"Startup: {total * 1000:.1f}ms (phases may nest)"]
+        lines.extend(f"  {seconds * 1000:9.1f}ms  {phase}" for phase, seconds in self.phases)
+        return "\n".join(lines)
+
+    def collect(self) -> List[Family]:
+        """
+        Metrics collector; see Metrics.add_collector.
+        """
+        return [(
+            "safetyweb_startup_seconds", "gauge", "Time spent per startup phase.",
+            [((("phase", phase),), seconds) for phase, seconds in self.phases]
+        )]
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting and timing requests per route template and,
+    when enabled, adding a Server-Timing header with the stages recorded
+    while the response headers were being prepared.
+    """
+
+    def __init__(self, app, metrics: Metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        started_token = _request_started.set(start)
+        timings = [] if self.metrics.server_timing else None
+        timings_token = _request_timings.set(timings)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if timings:
+                    header = ", ".join(f"{stage};dur={seconds * 1000:.3f}" for stage, seconds in timings)
+                    message = dict(message, headers=list(message.get("headers", [])) + [
+                        (b"server-timing", header.encode("latin-1"))
+                    ])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(timings_token)
+            _request_started.reset(started_token)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            self.metrics.request_seconds.observe(route, time.perf_counter() - start)
+            self.metrics.requests.inc(route, scope["method"], str(status))
@@ -0,0 +1,200 @@
+import asyncio
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from logic.fingerprint import fingerprint
+from logic.kb_snapshot import FORMAT_VERSION, KnowledgeSnapshot, SnapshotWriter, open_snapshot
+from logic.knowledge_base import KnowledgeBase, load_knowledge_base
+
+try:
+    import fcntl
+except ImportError:  # Windows: concurrent builds still end in one complete file
+    fcntl = None
+
+
+@contextmanager
+def _exclusive(path: str):
+    """
+    Node-wide lock on `path`, so one worker builds a snapshot while the
+    others wait for it instead of compiling the same thing in parallel.
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _describe(kb: KnowledgeBase) -> Dict[str, object]:
+    return {
+        "version": kb.version,
+        "files": [os.path.basename(path) for path in kb.files],
+        "categories": len(kb.hazards),
+        "keywords": sum(len(data["keywords"]) for data in kb.hazards.values())
+    }
+
+
+class KnowledgeBaseManager:
+    """
+    Compiles a knowledge base directory into an immutable snapshot (an
+    AssessmentPipeline with its own keyword automaton, fuzzy index and
+    control tables) and swaps it in atomically.
+
+    A new snapshot is fully built before a single reference assignment makes
+    it live, so requests already running keep the snapshot they started with
+    and nothing is paused. A directory that fails to load or compile leaves
+    the current snapshot in place.
+
+    With a `snapshot_path`, the compiled tables are also written to a binary
+    file there (see logic.kb_snapshot) and the pipeline is attached to its
+    memory mapping. Every worker on the node maps the same file, so the
+    tables live in memory once, and workers that find an up-to-date file
+    (same directory contents) skip loading and compiling altogether.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        build: Callable[[KnowledgeBase], object],
+        on_swap: Callable[[object], None],
+        snapshot_path: Optional[str] = None,
+        attach: Optional[Callable[[KnowledgeSnapshot], object]] = None,
+        extra_files: Tuple[str, ...] = (),
+        build_version: str = ""
+    ):
+        """
+        build compiles a KnowledgeBase into a pipeline; attach builds one from
+        a mapped snapshot and is required with snapshot_path. extra_files
+        (e.g. a normalization rules file) also feed into the compiled result,
+        so changes to them trigger a rebuild too. build_version fingerprints
+        what `build` takes from code rather than files (built-in rules,
+        settings, compiler versions); a shared snapshot built with another
+        one is rebuilt rather than attached to.
+        """
+        if snapshot_path and attach is None:
+            raise ValueError("A snapshot_path needs an attach function")
+        self.directory = directory
+        self.snapshot_path = snapshot_path
+        self.extra_files = extra_files
+        self.build_version = build_version
+        self._build = build
+        self._attach = attach
+        self._on_swap = on_swap
+        self._lock = threading.Lock() # one compile at a time
+        self.snapshot = None
+        self.info: Dict[str, object] = {}
+        self.loaded_at: Optional[float] = None
+        self.reloads = 0
+        self.last_error: Optional[str] = None
+        self._signature: Optional[Tuple] = None
+
+    def signature(self) -> Tuple:
+        """
+        (name, mtime, size) of every JSON file in the directory and of the
+        extra files; changes whenever a file is edited, added or removed.
+        """
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(".json") and entry.is_file():
+                    stat = entry.stat()
+                    entries.append((entry.name, stat.st_mtime_ns, stat.st_size))
+        for path in self.extra_files:
+            stat = os.stat(path)
+            entries.append((os.path.abspath(path), stat.st_mtime_ns, stat.st_size))
+        return tuple(sorted(entries))
+
+    def _compile(self) -> Tuple[object, Dict[str, object]]:
+        kb = load_knowledge_base(self.directory)
+        return self._build(kb), _describe(kb)
+
+    def _attach_shared(self, signature: Tuple) -> Tuple[object, Dict[str, object], str]:
+        """
+        Attaches to the snapshot file for `signature`, building it first if
+        it is missing or was built from other files.
+        """
+        source = fingerprint(FORMAT_VERSION, self.build_version, os.path.abspath(self.directory), signature)
+        snapshot = open_snapshot(self.snapshot_path, source)
+        how = "attached"
+        if snapshot is None:
+            with _exclusive(self.snapshot_path + ".lock"):
+                # Another worker may have built it while we waited
+                snapshot = open_snapshot(self.snapshot_path, source)
+                if snapshot is None:
+                    pipeline, info = self._compile()
+                    writer = SnapshotWriter()
+                    writer.meta.update(source=source, knowledge_base=info)
+                    pipeline.write_snapshot(writer)
+                    try:
+                        writer.write(self.snapshot_path)
+                    except OSError as e:
+                        raise ValueError(f"Cannot write knowledge base snapshot {self.snapshot_path}: {e}") from None
+                    snapshot = KnowledgeSnapshot(self.snapshot_path)
+                    how = "compiled"
+        return self._attach(snapshot), snapshot.meta["knowledge_base"], how
+
+    def load(self) -> Dict[str, object]:
+        """
+        Loads, compiles and swaps in the directory's current contents.
+        Blocking; raises ValueError if the knowledge base is invalid.
+        """
+        with self._lock:
+            signature = self.signature()
+            start = time.perf_counter()
+            try:
+                if self.snapshot_path:
+                    snapshot, info, how = self._attach_shared(signature)
+                else:
+                    (snapshot, info), how = self._compile(), "compiled"
+            except ValueError as e:
+                self.last_error = str(e)
+                raise
+            self.snapshot = snapshot
+            self._on_swap(snapshot)
+            self.info = info
+            self._signature = signature
+            self.loaded_at = time.time()
+            self.reloads += 1
+            self.last_error = None
+            print(f"Knowledge base {info['version']} {how} in {(time.perf_counter() - start) * 1000:.1f}ms")
+            return self.status()
+
+    async def watch(self, interval: float):
+        """
+        Polls the directory and reloads it off the event loop when it changes.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if self.signature() != self._signature:
+                    await run_in_threadpool(self.load)
+            except (OSError, ValueError) as e:
+                print(f"Knowledge base reload failed, keeping current snapshot: {e}")
+                # Do not retry the same broken files on every poll
+                try:
+                    self._signature = self.signature()
+                except OSError:
+                    pass
+
+    def status(self) -> Dict[str, object]:
+        return {
+            "directory": self.directory,
+            "version": self.info.get("version"),
+            "fingerprint": getattr(self.snapshot, "version", None),
+            "files": self.info.get("files", []),
+            "categories": self.info.get("categories", 0),
+            "keywords": self.info.get("keywords", 0),
+            "snapshot_file": self.snapshot_path,
+            "loaded_at": self.loaded_at,
+            "reloads": self.reloads,
+            "last_error": self.last_error
+        }
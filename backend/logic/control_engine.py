@@ -1,71 +1,139 @@
-from typing import List, Dict
+import sys
+from array import array
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .fingerprint import fingerprint
+from .kb_snapshot import KnowledgeSnapshot, SnapshotWriter
+from .knowledge_base import default_knowledge_base
+
+
+class ControlRecord(NamedTuple):
+    id: int
+    type: str # Hierarchy level
+    description: str
+
+
+GENERAL_CATEGORY = "general"
+
 
 class ControlEngine:
-    def __init__(self):
-        pass
+    # Bump when rule compilation or control selection changes
+    COMPILER_VERSION = "1"
 
-    def select_controls(self, hazard: str, risk_level: str) -> List[Dict[str, str]]:
+    def __init__(
+        self,
+        rules: Optional[List[Tuple[str, List[str], List[Tuple[str, str]]]]] = None,
+        general_controls: Optional[List[Tuple[str, str]]] = None,
+        high_risk_controls: Optional[List[Tuple[str, str]]] = None
+    ):
         """
-        Selects robust controls based on hazard type and risk level.
-        Enforces a multi-layered hierarchy of controls approach.
+        rules are (category, hazard name terms, controls); categories are tried
+        in order and the first one with a term contained in the hazard name
+        wins. general_controls apply when none matches, high_risk_controls are
+        added at the High risk level. Defaults come from the shipped knowledge base.
         """
-        controls = []
+        kb = default_knowledge_base()
+        rules = kb.control_rules if rules is None else rules
+        general_controls = kb.general_controls if general_controls is None else general_controls
+        high_risk_controls = kb.high_risk_controls if high_risk_controls is None else high_risk_controls
+
+        # Static catalog: every distinct (type, description) becomes one
+        # immutable record with a stable integer ID, shared by all categories.
+        self.catalog: List[ControlRecord] = []
+        self._ids: Dict[Tuple[str, str], int] = {}
+
+        self._category_terms = [(category, tuple(terms)) for category, terms, _ in rules]
+        self._category_controls = {}
+        for category, _, controls in rules:
+            self._category_controls.setdefault(category, self._intern_all(controls))
+        self._category_controls[GENERAL_CATEGORY] = self._intern_all(general_controls)
+        self._high_risk_controls = self._intern_all(high_risk_controls)
+        self.version = fingerprint(self.COMPILER_VERSION, rules, general_controls, high_risk_controls)
+        self._init_caches()
+
+    def _init_caches(self):
+        self.resolve_category = lru_cache(maxsize=4096)(self._resolve_category)
+        self._controls_for = lru_cache(maxsize=None)(self._build_controls)
+
+    def write_snapshot(self, writer: SnapshotWriter):
+        """
+        Adds the control catalog and the per-category control IDs to a
+        knowledge base snapshot.
+        """
+        writer.add_array("ctl_types", writer.add_strings(record.type for record in self.catalog))
+        writer.add_array("ctl_descriptions", writer.add_strings(record.description for record in self.catalog))
+        categories = list(self._category_controls)
+        writer.add_groups("ctl_category_controls", (
+            [record.id for record in self._category_controls[category]] for category in categories
+        ))
+        writer.add_array("ctl_high_risk", array("I", (record.id for record in self._high_risk_controls)))
+        writer.meta["control_engine"] = {
+            "version": self.version,
+            "categories": categories,
+            "category_terms": self._category_terms
+        }
+
+    @classmethod
+    def from_snapshot(cls, snapshot: KnowledgeSnapshot) -> "ControlEngine":
+        """
+        Loads the catalog from a memory-mapped snapshot. It is small and hit
+        on every request, so it is decoded into records up front.
+        """
+        meta = snapshot.meta["control_engine"]
+        engine = cls.__new__(cls)
+        engine.catalog = [
+            ControlRecord(control_id, sys.intern(control_type), sys.intern(description))
+            for control_id, (control_type, description) in enumerate(zip(
+                snapshot.strings(snapshot.array("ctl_types")),
+                snapshot.strings(snapshot.array("ctl_descriptions"))
+            ))
+        ]
+        engine._ids = {(record.type, record.description): record.id for record in engine.catalog}
+        engine._category_terms = [(category, tuple(terms)) for category, terms in meta["category_terms"]]
+        engine._category_controls = {
+            category: tuple(engine.catalog[control_id] for control_id in control_ids)
+            for category, control_ids in zip(meta["categories"], snapshot.groups("ctl_category_controls"))
+        }
+        engine._high_risk_controls = tuple(engine.catalog[control_id] for control_id in snapshot.array("ctl_high_risk"))
+        engine.version = meta["version"]
+        engine._init_caches()
+        return engine
+
+    def _intern_all(self, controls: Iterable[Tuple[str, str]]) -> Tuple[ControlRecord, ...]:
+        records = []
+        for control_type, description in controls:
+            key = (sys.intern(control_type), sys.intern(description))
+            if key not in self._ids:
+                self._ids[key] = len(self.catalog)
+                self.catalog.append(ControlRecord(self._ids[key], *key))
+            records.append(self.catalog[self._ids[key]])
+        return tuple(records)
+
+    def _resolve_category(self, hazard: str) -> str:
         h = hazard.lower()
-        
-        # --- FIRE & THERMAL ---
-        if any(term in h for term in ["fire", "burn", "thermal", "explosion"]):
-            controls.append({"type": "Engineering", "description": "Install fire-resistant barriers and automated suppression systems."})
-            controls.append({"type": "Administrative", "description": "Implement Hot Work Permit system and continuous gas monitoring."})
-            controls.append({"type": "Administrative", "description": "Designate a dedicated Fire Watcher with firefighting training."})
-            controls.append({"type": "PPE", "description": "Flamretardant clothing (FRC), heat-resistant gloves, and face shield."})
-
-        # --- MECHANICAL & MACHINERY ---
-        elif any(term in h for term in ["mechanical", "machine", "moving", "grinding", "entrapment", "debris"]):
-            controls.append({"type": "Engineering", "description": "Install fixed physical guards and emergency stop buttons."})
-            controls.append({"type": "Administrative", "description": "Enforce Lock-Out Tag-Out (LOTO) procedures before maintenance."})
-            controls.append({"type": "Administrative", "description": "Operator competency verification/certification check."})
-            controls.append({"type": "PPE", "description": "Impact-resistant goggles, cut-resistant gloves, and steel-toed boots."})
-
-        # --- CHEMICAL & TOXIC ---
-        elif any(term in h for term in ["chemical", "toxic", "respiratory", "inhalation", "fumes", "gas"]):
-            controls.append({"type": "Engineering", "description": "Ensure Local Exhaust Ventilation (LEV) is functioning at >0.5 m/s."})
-            controls.append({"type": "Substitution", "description": "Evaluate non-hazardous or water-based alternatives to current solvents."})
-            controls.append({"type": "Administrative", "description": "Ensure SDS (Safety Data Sheets) are accessible; perform spill response drill."})
-            controls.append({"type": "PPE", "description": "Half-face respirator with P3/Multi-gas filters and chemical-resistant aprons/gloves."})
-
-        # --- HEIGHTS & FALLS ---
-        elif any(term in h for term in ["fall", "height", "scaffold", "ladder", "drop", "stability"]):
-            controls.append({"type": "Engineering", "description": "Install certified collective protection (guardrails/toeboards)."})
-            controls.append({"type": "Engineering", "description": "Use debris netting or exclusion zones with physical barriers below."})
-            controls.append({"type": "Administrative", "description": "Daily inspection of scaffolding/ladders by a competent person."})
-            controls.append({"type": "PPE", "description": "Class A full-body harness with shock-absorbing double lanyard attached to certified anchor points."})
-
-        # --- ELECTRICAL ---
-        elif any(term in h for term in ["electric", "voltage", "wire", "shock", "arc"]):
-            controls.append({"type": "Engineering", "description": "Use Residual Current Devices (RCDs) or Ground Fault Circuit Interrupters (GFCIs)."})
-            controls.append({"type": "Administrative", "description": "Verify zero-energy state via 'Test-Before-Touch' protocol."})
-            controls.append({"type": "PPE", "description": "Arc-rated (AR) clothing, insulated tools, and dielectric boots/gloves."})
-
-        # --- CONFINED SPACE ---
-        elif any(term in h for term in ["confined", "asphyxiation", "oxygen", "air quality"]):
-            controls.append({"type": "Engineering", "description": "Forced mechanical ventilation for at least 30 minutes prior to entry."})
-            controls.append({"type": "Administrative", "description": "Pre-entry atmospheric testing; Standby Person/Attendant required at all times."})
-            controls.append({"type": "PPE", "description": "Self-Contained Breathing Apparatus (SCBA) and tripod/winch for emergency retrieval."})
-
-        # --- ENVIRONMENTAL (SLIPS, NOISE, TRIPS) ---
-        elif any(term in h for term in ["slip", "trip", "noise", "vibration", "clutter"]):
-            controls.append({"type": "Administrative", "description": "Implement 'Housekeeping First' policy; clear walkways of cables/debris."})
-            controls.append({"type": "Administrative", "description": "Post 'Hearing Protection Required' signage; limit exposure time."})
-            controls.append({"type": "PPE", "description": "High-grip footwear and dual hearing protection (earplugs + earmuffs)."})
-
-        # --- GENERAL FALLBACK ---
-        else:
-            controls.append({"type": "Administrative", "description": "Conduct a pre-task Toolbox Talk (TBT) specifically for this activity."})
-            controls.append({"type": "PPE", "description": "Mandatory Site PPE: High-visibility vest, hard hat, and safety glasses."})
-
-        # Special augmentation for HIGH RISK level
-        if risk_level == "High":
-            controls.append({"type": "Administrative", "description": "⚠️ Stop Work Authority: Supervisor presence mandatory for the entire duration."})
-            controls.append({"type": "Administrative", "description": "Emergency Response Plan (ERP) must be activated and verified before start."})
+        for category, terms in self._category_terms:
+            if any(term in h for term in terms):
+                return category
+        return GENERAL_CATEGORY
 
+    def _build_controls(self, category: str, risk_level: str) -> Tuple[ControlRecord, ...]:
+        controls = self._category_controls[category]
+        if risk_level == "High":
+            controls = controls + self._high_risk_controls
         return controls
+
+    def precompute(self, hazard_names: Iterable[str]):
+        """
+        Resolves the category of every known hazard name up front.
+        """
+        for hazard in hazard_names:
+            self.resolve_category(hazard)
+
+    def select_controls(self, hazard: str, risk_level: str) -> Tuple[ControlRecord, ...]:
+        """
+        Selects robust controls based on hazard type and risk level.
+        Enforces a multi-layered hierarchy of controls approach.
+        Returns shared, immutable records; dedupe across hazards on `id`.
+        """
+        return self._controls_for(self.resolve_category(hazard), risk_level)
@@ -1,129 +1,98 @@
-from docx import Document
-from docx.shared import Inches, Pt
-from docx.enum.text import WD_ALIGN_PARAGRAPH
 import io
-from typing import List, Dict
+import os
+import time
+from typing import BinaryIO, Dict, Iterable, List, Tuple
+
+# Bump whenever the report layout changes; cached reports are keyed on it.
+TEMPLATE_VERSION = "1"
 
 class DocumentEngine:
     def __init__(self):
-        pass
+        # Templates (and python-docx / ReportLab) are imported and built on
+        # first use, so a process that never renders never pays for them and
+        # one that only renders one format never pays for the other.
+        self._docx_template = None
+        self._pdf_template = None
+
+    @property
+    def docx_template(self) -> "DocxTemplate":
+        if self._docx_template is None:
+            from .report_templates import DocxTemplate
+            self._docx_template = DocxTemplate()
+        return self._docx_template
+
+    @property
+    def pdf_template(self) -> "PdfTemplate":
+        if self._pdf_template is None:
+            from .report_templates import PdfTemplate
+            self._pdf_template = PdfTemplate()
+        return self._pdf_template
 
     def generate_docx(self, assessment_data: dict) -> io.BytesIO:
         """
         Generates a DOCX report from assessment data.
         """
-        document = Document()
-        
-        # Title
-        title = document.add_heading('Safety Assessment Report', 0)
-        title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-
-        # Risk Summary
-        document.add_heading('Risk Summary', level=1)
-        p = document.add_paragraph()
-        p.add_run('Risk Level: ').bold = True
-        risk_run = p.add_run(assessment_data['risk_level'])
-        if assessment_data['risk_level'] == 'High':
-            risk_run.font.color.rgb = None # default logic, can't easily set RGB without imports
-            risk_run.bold = True
-        
-        p.add_run(f"\nRisk Score: {assessment_data['risk_score']}")
-        p.add_run(f"\nConfidence: {assessment_data['confidence']}")
-
-        # Hazards
-        document.add_heading('Identified Hazards', level=1)
-        if assessment_data['hazards']:
-            for h in assessment_data['hazards']:
-                document.add_paragraph(h, style='List Bullet')
-        else:
-            document.add_paragraph("No specific hazards identified.")
-
-        # Controls
-        document.add_heading('Required Controls', level=1)
-        if assessment_data['controls']:
-            table = document.add_table(rows=1, cols=2)
-            table.style = 'Table Grid'
-            hdr_cells = table.rows[0].cells
-            hdr_cells[0].text = 'Type'
-            hdr_cells[1].text = 'Control Measure'
-            
-            for c in assessment_data['controls']:
-                row_cells = table.add_row().cells
-                row_cells[0].text = c['type']
-                row_cells[1].text = c['description']
-        else:
-            document.add_paragraph("No controls specified.")
-
-        # HIRA Table Stub
-        document.add_heading('HIRA Details', level=1)
-        document.add_paragraph('This report was automatically generated by SafetyAI Guardian.')
-
-        # Save to memory
-        file_stream = io.BytesIO()
-        document.save(file_stream)
-        file_stream.seek(0)
-        return file_stream
+        return self.docx_template.render(assessment_data)
 
     def generate_pdf(self, assessment_data: dict) -> io.BytesIO:
         """
         Generates a PDF report using ReportLab.
         """
-        from reportlab.lib.pagesizes import letter
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.lib import colors
-
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
-        styles = getSampleStyleSheet()
-        story = []
-
-        # Title
-        story.append(Paragraph("Safety Assessment Report", styles['Title']))
-        story.append(Spacer(1, 12))
-
-        # Risk Summary
-        story.append(Paragraph("Risk Summary", styles['Heading1']))
-        risk_text = f"<b>Risk Level:</b> {assessment_data['risk_level']}<br/>" \
-                    f"<b>Risk Score:</b> {assessment_data['risk_score']}<br/>" \
-                    f"<b>Confidence:</b> {assessment_data['confidence']}"
-        story.append(Paragraph(risk_text, styles['Normal']))
-        story.append(Spacer(1, 12))
-
-        # Hazards
-        story.append(Paragraph("Identified Hazards", styles['Heading1']))
-        if assessment_data['hazards']:
-            for h in assessment_data['hazards']:
-                story.append(Paragraph(f"• {h}", styles['Normal']))
-        else:
-            story.append(Paragraph("No specific hazards identified.", styles['Normal']))
-        story.append(Spacer(1, 12))
-
-        # Controls
-        story.append(Paragraph("Required Controls", styles['Heading1']))
-        if assessment_data['controls']:
-            table_data = [['Type', 'Control Measure']]
-            for c in assessment_data['controls']:
-                table_data.append([c['type'], c['description']])
-            
-            t = Table(table_data, colWidths=[100, 350])
-            t.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('WORDWRAP', (0, 0), (-1, -1), True) # Ensure text wraps
-            ]))
-            story.append(t)
-        else:
-            story.append(Paragraph("No controls specified.", styles['Normal']))
-        
-        story.append(Spacer(1, 24))
-        story.append(Paragraph("This report was automatically generated by SafetyAI Guardian.", styles['Italic']))
-
-        doc.build(story)
-        buffer.seek(0)
-        return buffer
+        return self.pdf_template.render(assessment_data)
+
+    def generate_bulk(self, fmt: str, assessments: Iterable[dict], out: BinaryIO) -> "BulkSummary":
+        """
+        Writes one consolidated DOCX/PDF report covering many assessments to
+        `out`, consuming `assessments` lazily. Returns the computed summary.
+        """
+        if fmt == "docx":
+            return self.docx_template.render_bulk(assessments, out)
+        if fmt == "pdf":
+            return self.pdf_template.render_bulk(assessments, out)
+        raise ValueError(f"Unknown report format '{fmt}'")
+
+
+# Per-process engine used by the render pool workers
+_worker_engine = None
+
+SAMPLE_ASSESSMENT = {
+    "risk_score": 9,
+    "risk_level": "Medium",
+    "hazards": ["Fire Hazard"],
+    "controls": [{"type": "PPE", "description": "Heat-resistant gloves."}],
+    "confidence": "Medium"
+}
+
+
+def worker_engine() -> DocumentEngine:
+    """
+    The DocumentEngine of the current render pool worker, created on first use.
+    """
+    global _worker_engine
+    if _worker_engine is None:
+        _worker_engine = DocumentEngine()
+    return _worker_engine
+
+
+def render_report(fmt: str, assessment_data: dict) -> Tuple[bytes, float]:
+    """
+    Render pool entry point. Returns the file bytes and the render time in seconds.
+    """
+    engine = worker_engine()
+    start = time.perf_counter()
+    if fmt == "docx":
+        stream = engine.generate_docx(assessment_data)
+    elif fmt == "pdf":
+        stream = engine.generate_pdf(assessment_data)
+    else:
+        raise ValueError(f"Unknown report format '{fmt}'")
+    return stream.getvalue(), time.perf_counter() - start
+
+
+def warm_up_worker() -> int:
+    """
+    Pays the one-off import and first-render costs in a pool worker.
+    """
+    render_report("docx", SAMPLE_ASSESSMENT)
+    render_report("pdf", SAMPLE_ASSESSMENT)
+    return os.getpid()
@@ -0,0 +1,11 @@
+import hashlib
+import json
+
+
+def fingerprint(*parts) -> str:
+    """
+    Short content hash of JSON-serializable data, used as a knowledge-base
+    version: it changes whenever the data it was computed from changes.
+    """
+    canonical = json.dumps(parts, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
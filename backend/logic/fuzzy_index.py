@@ -0,0 +1,118 @@
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+
+def _char_mask(text: str) -> int:
+    """
+    Bitmask of the characters in text. Distinct characters may share a bit;
+    that only loosens the bound it is used for, never breaks it.
+    """
+    mask = 0
+    for ch in text:
+        mask |= 1 << (ord(ch) & 63)
+    return mask
+
+
+if hasattr(int, "bit_count"):
+    _popcount = int.bit_count
+else:  # Python < 3.10
+    def _popcount(mask: int) -> int:
+        return bin(mask).count("1")
+
+
+class FuzzyKeywordIndex:
+    """
+    Precomputed fuzzy lookup over the dictionary keywords.
+
+    Reproduces difflib.get_close_matches(keyword, terms, n=1, cutoff) exactly,
+    but inverted: each input term is looked up once against the keywords
+    instead of every keyword being compared against every term. Keywords are
+    bucketed by length and pre-filtered with a character-set bitmask bound
+    before the (expensive) SequenceMatcher ratio is computed.
+    """
+
+    def __init__(self, keywords: Iterable[str], cutoff: float = 0.8, cache_size: int = 4096):
+        by_length: Dict[int, Tuple[List[str], List[int]]] = {}
+        for keyword in dict.fromkeys(keywords):
+            bucket_keywords, bucket_masks = by_length.setdefault(len(keyword), ([], []))
+            bucket_keywords.append(keyword)
+            bucket_masks.append(_char_mask(keyword))
+        self._init_buckets(by_length, cutoff, cache_size)
+
+    @classmethod
+    def from_buckets(
+        cls,
+        by_length: Dict[int, Tuple[Sequence[str], Sequence[int]]],
+        cutoff: float = 0.8,
+        cache_size: int = 4096
+    ) -> "FuzzyKeywordIndex":
+        """
+        Builds the index from precomputed buckets, e.g. views into a
+        knowledge base snapshot: keyword length -> (keywords, char masks).
+        """
+        index = cls.__new__(cls)
+        index._init_buckets(by_length, cutoff, cache_size)
+        return index
+
+    def _init_buckets(self, by_length: Dict[int, Tuple[Sequence[str], Sequence[int]]], cutoff: float, cache_size: int):
+        self.cutoff = cutoff
+        self._by_length = by_length
+        self.lookup = lru_cache(maxsize=cache_size)(self._lookup)
+
+    @property
+    def buckets(self) -> Dict[int, Tuple[Sequence[str], Sequence[int]]]:
+        return self._by_length
+
+    def _lookup(self, term: str) -> Tuple[Tuple[str, float], ...]:
+        """
+        Returns every (keyword, ratio) pair with ratio >= cutoff for a single term.
+        """
+        term_len = len(term)
+        term_mask = None
+        results = []
+        for keyword_len, (keywords, masks) in self._by_length.items():
+            total = term_len + keyword_len
+            # Same bound as SequenceMatcher.real_quick_ratio()
+            if total == 0 or 2.0 * min(term_len, keyword_len) / total < self.cutoff:
+                continue
+            if term_mask is None:
+                term_mask = _char_mask(term)
+            # Every character of one string that cannot occur in the other is
+            # unmatched, so it lowers the best achievable ratio. The epsilon keeps
+            # float rounding from rejecting a ratio of exactly `cutoff`.
+            min_matched = self.cutoff * total / 2.0 - 1e-9
+            max_unmatched_keyword = keyword_len - min_matched
+            max_unmatched_term = term_len - min_matched
+            # Masks first: the keyword itself is only fetched for survivors
+            for position, keyword_mask in enumerate(masks):
+                if _popcount(keyword_mask & ~term_mask) > max_unmatched_keyword:
+                    continue
+                if _popcount(term_mask & ~keyword_mask) > max_unmatched_term:
+                    continue
+                keyword = keywords[position]
+                score = SequenceMatcher(None, term, keyword).ratio()
+                if score >= self.cutoff:
+                    results.append((keyword, score))
+        return tuple(results)
+
+    def best_matches(self, terms: Iterable[str]) -> Dict[str, str]:
+        """
+        Maps each keyword to its best matching term, as get_close_matches(n=1)
+        would pick it (highest ratio, ties broken by the larger term).
+        """
+        best: Dict[str, Tuple[float, str]] = {}
+        self.collect(best, terms)
+        return {keyword: term for keyword, (_, term) in best.items()}
+
+    def collect(self, best: Dict[str, Tuple[float, str]], terms: Iterable[str]):
+        """
+        Folds more terms into `best` (keyword -> (ratio, term)). The outcome
+        does not depend on the order terms arrive in, so text can be matched
+        piece by piece.
+        """
+        for term in set(terms):
+            for keyword, score in self.lookup(term):
+                candidate = (score, term)
+                if keyword not in best or candidate > best[keyword]:
+                    best[keyword] = candidate
@@ -1,98 +1,397 @@
-from typing import List, Dict
+import re
+from array import array
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Iterator, List, Dict, NamedTuple, Optional, Set, Tuple
+
+from .fingerprint import fingerprint
+from .fuzzy_index import FuzzyKeywordIndex
+from .kb_snapshot import KnowledgeSnapshot, SnapshotWriter
+from .knowledge_base import default_knowledge_base
+from .patterns import build_trie_pattern, stable_prefix
+from .text_normalizer import TextNormalizer
+
+
+class KeywordHit(NamedTuple):
+    category: str
+    keyword: str
+    start: int
+    end: int
+
+
+class HazardAnalysis(NamedTuple):
+    hazards: Tuple[str, ...]
+    confidence_score: int
+    confidence_level: str
+    normalized_text: str
+    evidence: Tuple[str, ...]
+    matches: Tuple[KeywordHit, ...]
+    reasoning: str
+
+
+_WORD_RUN = re.compile(r"\w+")
+_SIMPLE_KEYWORD = re.compile(r"\w+(?: \w+)*")
+_PLURAL_SUFFIXES = ("", "s", "es")
+
+
+class _SnapshotCategories(Mapping):
+    """
+    category -> {"keywords", "hazards"}, read from a knowledge base snapshot.
+    Hazard names of recently hit categories stay decoded in a bounded cache;
+    keyword lists are decoded on access.
+    """
+
+    def __init__(self, snapshot: KnowledgeSnapshot, categories: List[str], cache_size: int = 1024):
+        self._snapshot = snapshot
+        self._categories = categories
+        self._positions = {category: position for position, category in enumerate(categories)}
+        self._entry = lru_cache(maxsize=cache_size)(self._read_entry)
+
+    def _read_entry(self, category: str) -> Dict:
+        position = self._positions[category]
+        return {
+            "keywords": self._snapshot.strings(self._snapshot.group("hz_category_keywords", position)),
+            "hazards": tuple(self._snapshot.strings(self._snapshot.group("hz_category_hazards", position)))
+        }
+
+    def __getitem__(self, category: str) -> Dict:
+        return self._entry(category)
+
+    def __iter__(self):
+        return iter(self._categories)
+
+    def __len__(self) -> int:
+        return len(self._categories)
+
+
+class _SnapshotKeywordTable(Mapping):
+    """
+    keyword -> categories, through a snapshot's keyword hash index, with
+    bounded caches of recently seen keywords. ranks() returns each
+    category's rank for the keyword.
+    """
+
+    def __init__(self, snapshot: KnowledgeSnapshot, categories: List[str], max_words: int = 0, cache_size: int = 4096):
+        self._snapshot = snapshot
+        self._categories = categories
+        self._keywords = snapshot.array("hz_keywords")
+        self._max_words = max_words
+        self._position = lru_cache(maxsize=cache_size * 4)(self._find)
+        self._entry = lru_cache(maxsize=cache_size)(self._read_entry)
+
+    def _find(self, keyword: str) -> int:
+        return self._snapshot.find("hz_keyword_index", self._keywords, keyword)
+
+    def _read_entry(self, keyword: str) -> Tuple[Tuple[str, ...], Dict[str, int]]:
+        position = self._position(keyword)
+        if position < 0:
+            raise KeyError(keyword)
+        values = self._snapshot.group("hz_keyword_hits", position) # category, rank, category, rank, ...
+        ranks = {self._categories[values[i]]: values[i + 1] for i in range(0, len(values), 2)}
+        return tuple(ranks), ranks
+
+    def __getitem__(self, keyword: str) -> Tuple[str, ...]:
+        return self._entry(keyword)[0]
+
+    def __contains__(self, keyword) -> bool:
+        return isinstance(keyword, str) and self._position(keyword) >= 0
+
+    def ranks(self, keyword: str) -> Dict[str, int]:
+        return self._entry(keyword)[1]
+
+    def __iter__(self):
+        return iter(self._snapshot.strings(self._keywords))
+
+    def __len__(self) -> int:
+        return len(self._keywords)
+
+    def scan(self, text: str) -> Iterator[Tuple[str, int, int]]:
+        """
+        Same matches as the compiled pattern \b(keyword|...)(?:es|s)?\b when
+        every keyword is words joined by single spaces (max_words at most):
+        at each word start, the longest keyword spanning whole words, the
+        last one optionally followed by "s" or "es". Yields (keyword, start, end).
+        """
+        runs = [match.span() for match in _WORD_RUN.finditer(text)]
+        index = 0
+        while index < len(runs):
+            # Following words a phrase can span: joined by exactly one space
+            last = index
+            while last + 1 < len(runs) and last + 1 - index < self._max_words \
+                    and runs[last + 1][0] == runs[last][1] + 1 and text[runs[last][1]] == " ":
+                last += 1
+            match = self._longest(text, runs, index, last)
+            if match is None:
+                index += 1
+            else:
+                keyword, last = match
+                yield keyword, runs[index][0], runs[last][1]
+                index = last + 1
+
+    def _longest(self, text: str, runs: List[Tuple[int, int]], first: int, last: int) -> Optional[Tuple[str, int]]:
+        """
+        Longest keyword starting at word `first` and ending in one of the
+        words up to `last`, with the index of that word.
+        """
+        start = runs[first][0]
+        for last in range(last, first - 1, -1):
+            run_start, end = runs[last]
+            for cut in (end, end - 1, end - 2):
+                if cut > run_start and text[cut:end] in _PLURAL_SUFFIXES and self._position(text[start:cut]) >= 0:
+                    return text[start:cut], last
+        return None
+
+
+class _SnapshotKeywordRank(Mapping):
+    """
+    (category, keyword) -> rank, on top of a _SnapshotKeywordTable.
+    """
+
+    def __init__(self, table: _SnapshotKeywordTable):
+        self._table = table
+
+    def __getitem__(self, key: Tuple[str, str]) -> int:
+        category, keyword = key
+        try:
+            return self._table.ranks(keyword)[category]
+        except KeyError:
+            raise KeyError(key) from None
+
+    def __iter__(self):
+        for keyword in self._table:
+            for category in self._table[keyword]:
+                yield category, keyword
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
 
 class HazardEngine:
-    def __init__(self):
+    # Bump when keyword compilation or matching changes what a knowledge base
+    # compiles to; snapshots and cached results built by older code go stale
+    COMPILER_VERSION = "1"
+    FUZZY_CUTOFF = 0.8
+
+    def __init__(
+        self,
+        normalization_rules: Optional[Dict[str, str]] = None,
+        normalize_cache_size: int = 0,
+        hazard_dictionary: Optional[Dict[str, Dict[str, List[str]]]] = None
+    ):
+        self._normalizer = TextNormalizer(normalization_rules, cache_size=normalize_cache_size)
         # Expanded knowledge base with categories and synonyms
+        if hazard_dictionary is None:
+            hazard_dictionary = default_knowledge_base().hazards
         self.hazard_dictionary = {
-            "fire_hot": {
-                "keywords": ["fire", "spark", "flame", "heat", "hot", "welding", "grinding", "explosion", "burn"],
-                "hazards": ["Fire Hazard", "Thermal Burn", "Explosion Risk"]
-            },
-            "mechanical": {
-                "keywords": ["machinery", "equipment", "grinding", "sharp", "blade", "moving parts", "crush", "pinch"],
-                "hazards": ["Mechanical Injury", "Entrapment", "Flying Debris"]
-            },
-            "chemical_tox": {
-                "keywords": ["chemical", "acid", "toxic", "gas", "fumes", "solvent", "spill", "leak", "poison"],
-                "hazards": ["Chemical Exposure", "Respiratory Irritation", "Toxic Inhalation"]
-            },
-            "height_fall": {
-                "keywords": ["height", "ladder", "scaffold", "roof", "fall", "drop", "climb", "unstable"],
-                "hazards": ["Fall from Height", "Falling Objects", "Structural Instability"]
-            },
-            "electrical": {
-                "keywords": ["electrical", "wire", "shock", "voltage", "power", "circuit", "exposed", "cable"],
-                "hazards": ["Electric Shock", "Arc Flash", "Electrical Fire"]
-            },
-            "confined": {
-                "keywords": ["confined", "tank", "pit", "narrow", "enclosure", "ventilation", "oxygen", "trapped"],
-                "hazards": ["Asphyxiation", "Restricted Movement", "Poor Air Quality"]
-            },
-            "environmental": {
-                "keywords": ["lighting", "noise", "vibration", "slippery", "wet", "trip", "dust", "weather"],
-                "hazards": ["Slip/Trip Hazard", "Noise Induced Hearing Loss", "Reduced Visibility"]
-            }
+            category: {"keywords": list(data["keywords"]), "hazards": list(data["hazards"])}
+            for category, data in hazard_dictionary.items()
         }
+        self._compile_keyword_matcher()
+
+    def _compile_keyword_matcher(self):
+        """
+        Compiles every dictionary keyword into one word-boundary anchored regex so
+        the text is scanned once per request instead of once per keyword.
+        A trailing plural ("s"/"es") is tolerated, e.g. "sparks" hits "spark".
+        Also refreshes `version`, the fingerprint of everything that decides
+        the engine's output, so result caches keyed on it invalidate themselves.
+        """
+        self._keyword_categories = {}
+        self._keyword_rank = {} # (category, keyword) -> position in the category's keyword list
+        self._category_rank = {}
+        for category_rank, (category, data) in enumerate(self.hazard_dictionary.items()):
+            self._category_rank[category] = category_rank
+            for keyword_rank, keyword in enumerate(data["keywords"]):
+                self._keyword_categories.setdefault(keyword, []).append(category)
+                self._keyword_rank.setdefault((category, keyword), keyword_rank)
+
+        pattern = build_trie_pattern(self._keyword_categories)
+        self._keyword_pattern_source = r"\b(" + pattern + r")(?:es|s)?\b"
+        self._keyword_pattern = re.compile(self._keyword_pattern_source)
+        # Most words a keyword match can span, the plural suffix included
+        self._keyword_span = max((len(_WORD_RUN.findall(k)) + 1 for k in self._keyword_categories), default=0)
+        self._fuzzy_index = FuzzyKeywordIndex(self._keyword_categories, cutoff=self.FUZZY_CUTOFF)
+        self.version = fingerprint(
+            self.COMPILER_VERSION, self.hazard_dictionary, self._normalizer.rules, self._fuzzy_index.cutoff
+        )
+
+    def write_snapshot(self, writer: SnapshotWriter):
+        """
+        Adds the compiled matcher (keyword table, category ranks, fuzzy
+        buckets and the automaton's source) to a knowledge base snapshot.
+        """
+        categories = list(self.hazard_dictionary)
+        category_positions = {category: position for position, category in enumerate(categories)}
+        writer.add_array("hz_categories", writer.add_strings(categories))
+        writer.add_groups("hz_category_keywords", (
+            writer.add_strings(self.hazard_dictionary[category]["keywords"]) for category in categories
+        ))
+        writer.add_groups("hz_category_hazards", (
+            writer.add_strings(self.hazard_dictionary[category]["hazards"]) for category in categories
+        ))
+
+        # Sorted, so the same knowledge base always gives the same file
+        keywords = sorted(self._keyword_categories)
+        keyword_ids = writer.add_strings(keywords)
+        writer.add_array("hz_keywords", keyword_ids)
+        writer.add_string_index("hz_keyword_index", keyword_ids)
+        writer.add_groups("hz_keyword_hits", (
+            [value for category in self._keyword_categories[keyword]
+             for value in (category_positions[category], self._keyword_rank[category, keyword])]
+            for keyword in keywords
+        ))
+
+        fuzzy_keywords = array("I")
+        fuzzy_masks = array("Q")
+        fuzzy_buckets = []
+        for length, (bucket_keywords, bucket_masks) in self._fuzzy_index.buckets.items():
+            fuzzy_buckets.append((length, len(fuzzy_masks), len(fuzzy_masks) + len(bucket_masks)))
+            fuzzy_keywords.extend(writer.add_strings(bucket_keywords))
+            fuzzy_masks.extend(bucket_masks)
+        writer.add_array("hz_fuzzy_keywords", fuzzy_keywords)
+        writer.add_array("hz_fuzzy_masks", fuzzy_masks)
+
+        # Most words in a keyword, or None if some keyword is not plain words
+        # and single spaces, which the snapshot scanner cannot match
+        keyword_words = None
+        if all(_SIMPLE_KEYWORD.fullmatch(keyword) for keyword in keywords):
+            keyword_words = max((keyword.count(" ") + 1 for keyword in keywords), default=0)
+        writer.meta["hazard_engine"] = {
+            "version": self.version,
+            "normalization_rules": self._normalizer.rules,
+            "keyword_pattern": self._keyword_pattern_source,
+            "keyword_words": keyword_words,
+            "keyword_span": self._keyword_span,
+            "fuzzy_cutoff": self._fuzzy_index.cutoff,
+            "fuzzy_buckets": fuzzy_buckets
+        }
+
+    @classmethod
+    def from_snapshot(cls, snapshot: KnowledgeSnapshot, normalize_cache_size: int = 0) -> "HazardEngine":
+        """
+        Attaches to the tables of a memory-mapped snapshot instead of
+        compiling a dictionary. Only the normalizer is rebuilt per process;
+        keywords, hazard names and fuzzy buckets are read from the shared
+        mapping on demand. Results are identical to the engine the snapshot
+        was written from.
+        """
+        meta = snapshot.meta["hazard_engine"]
+        engine = cls.__new__(cls)
+        engine._normalizer = TextNormalizer(meta["normalization_rules"], cache_size=normalize_cache_size)
+        categories = list(snapshot.strings(snapshot.array("hz_categories")))
+        engine.hazard_dictionary = _SnapshotCategories(snapshot, categories)
+        engine._keyword_categories = _SnapshotKeywordTable(snapshot, categories, max_words=meta["keyword_words"] or 0)
+        engine._keyword_rank = _SnapshotKeywordRank(engine._keyword_categories)
+        engine._category_rank = {category: rank for rank, category in enumerate(categories)}
+        engine._keyword_pattern_source = meta["keyword_pattern"]
+        # Plain-word keywords are matched by scanning the snapshot's tables,
+        # which skips compiling the automaton (most of the cost of a large
+        # dictionary) and keeps it out of every worker's memory
+        engine._keyword_pattern = None if meta["keyword_words"] else re.compile(meta["keyword_pattern"])
+        engine._keyword_span = meta["keyword_span"]
+
+        fuzzy_keywords = snapshot.array("hz_fuzzy_keywords")
+        fuzzy_masks = snapshot.array("hz_fuzzy_masks", "Q")
+        engine._fuzzy_index = FuzzyKeywordIndex.from_buckets(
+            {
+                length: (snapshot.strings(fuzzy_keywords[start:end]), fuzzy_masks[start:end])
+                for length, start, end in meta["fuzzy_buckets"]
+            },
+            cutoff=meta["fuzzy_cutoff"]
+        )
+        engine.version = meta["version"]
+        return engine
+
+    def _scan_keywords(self, normalized_text: str) -> Tuple[KeywordHit, ...]:
+        """
+        Single pass over the normalized text. Returns one hit per
+        (category, keyword, position), in text order.
+        """
+        return tuple(
+            KeywordHit(category, keyword, start, end)
+            for keyword, start, end in self._find_keywords(normalized_text)
+            for category in self._keyword_categories[keyword]
+        )
+
+    def _find_keywords(self, normalized_text: str) -> Iterator[Tuple[str, int, int]]:
+        if self._keyword_pattern is None:
+            # Attached to a snapshot without compiling the automaton
+            return self._keyword_categories.scan(normalized_text)
+        return ((match.group(1), match.start(), match.end()) for match in self._keyword_pattern.finditer(normalized_text))
+
+    def _match_fuzzy(self, terms: List[str]) -> Dict[str, str]:
+        """
+        Maps each dictionary keyword to its closest input term, if any.
+        """
+        return self._fuzzy_index.best_matches(terms)
+
+    def hazard_names(self) -> List[str]:
+        """
+        Every hazard name this engine can report.
+        """
+        names = {h for data in self.hazard_dictionary.values() for h in data["hazards"]}
+        return sorted(names)
 
     def _normalize_text(self, text: str) -> str:
         """
         Simulates robust NLP normalization and basic grammar correction.
         """
-        import re
-        text = text.lower().strip()
-        # Remove punctuation for matching
-        text = re.sub(r'[^\w\s]', ' ', text)
-        
-        # Advanced replacements for broken speech/UAT scenarios
-        replacements = {
-            r"\bgoin\b": "going",
-            r"\bweldin\b": "welding",
-            r"\bn\b": "and",
-            r"\bwat\b": "what",
-            r"\bdoin\b": "doing",
-            r"\bmessy\b": "cluttered",
-            r"\bfixin\b": "repairing",
-            r"\bno\b \bvent\b": "poor ventilation",
-            r"\bhi\b \bvolt\b": "high voltage",
-            r"\bstair\b": "staircase",
-            r"\bwire\b": "electrical wiring"
-        }
-        for pattern, replacement in replacements.items():
-            text = re.compile(pattern).sub(replacement, text)
-            
-        return " ".join(text.split())
+        return self._normalizer.normalize(text)
 
-    def identify_hazards(self, text_input: str, image_tags: List[str] = []) -> Dict:
+    def identify_hazards(self, text_input: str, image_tags: List[str] = []) -> HazardAnalysis:
         """
         Identifies hazards with detailed tracking for confidence explanation.
         """
-        import difflib
-        
         normalized_text = self._normalize_text(text_input)
-        identified_hazards = set()
-        evidence_matches = []
+        keyword_hits = self._scan_keywords(normalized_text)
         
         # Merge text input and image tags
         search_terms = normalized_text.split() + [tag.lower() for tag in image_tags]
-        
-        for category, data in self.hazard_dictionary.items():
-            category_match = False
-            for keyword in data["keywords"]:
-                # Direct check
-                if keyword in normalized_text:
-                    category_match = True
-                    evidence_matches.append(f"Keyword '{keyword}' found in text")
-                # Fuzzy check
-                else:
-                    fuzzy_matches = difflib.get_close_matches(keyword, search_terms, n=1, cutoff=0.8)
-                    if fuzzy_matches:
-                        category_match = True
-                        evidence_matches.append(f"Fuzzy match '{fuzzy_matches[0]}' (for '{keyword}')")
-                
-                if category_match:
-                    for h in data["hazards"]:
-                        identified_hazards.add(h)
-                    break # Category identified, move to next
+        fuzzy_hits = self._match_fuzzy(search_terms)
+        matched_keywords = {hit.keyword for hit in keyword_hits}
+        return self._analyze(bool(text_input), image_tags, normalized_text, keyword_hits, matched_keywords, fuzzy_hits)
+
+    def incremental(self, image_tags: List[str] = []) -> "IncrementalHazardScan":
+        """
+        identify_hazards for text that arrives in pieces, e.g. a live transcript.
+        """
+        return IncrementalHazardScan(self, image_tags)
+
+    def _analyze(
+        self,
+        has_text: bool,
+        image_tags: List[str],
+        normalized_text: str,
+        keyword_hits: Tuple[KeywordHit, ...],
+        matched_keywords: Set[str],
+        fuzzy_hits: Dict[str, str]
+    ) -> HazardAnalysis:
+        """
+        Turns keyword and fuzzy hits into hazards, evidence and confidence.
+        """
+        identified_hazards = set()
+        evidence_matches = []
+
+        # Only categories with a hit are visited, in dictionary order, each
+        # reporting its first matching keyword (direct or fuzzy), so the cost
+        # does not grow with the size of the dictionary.
+        first_hits = {}
+        for keyword in matched_keywords.union(fuzzy_hits):
+            for category in self._keyword_categories[keyword]:
+                hit = (self._keyword_rank[category, keyword], keyword)
+                if category not in first_hits or hit < first_hits[category]:
+                    first_hits[category] = hit
+
+        for category in sorted(first_hits, key=self._category_rank.__getitem__):
+            keyword = first_hits[category][1]
+            # Direct check
+            if keyword in matched_keywords:
+                evidence_matches.append(f"Keyword '{keyword}' found in text")
+            # Fuzzy check
+            else:
+                evidence_matches.append(f"Fuzzy match '{fuzzy_hits[keyword]}' (for '{keyword}')")
+            for h in self.hazard_dictionary[category]["hazards"]:
+                identified_hazards.add(h)
 
         # Image-specific overrides
         for tag in image_tags:
@@ -114,18 +413,124 @@ class HazardEngine:
             match_count = len(evidence_matches)
             base_score = 30 + (match_count * 15)
             # Add bonus for multi-modal (both text and image) overlap
-            if text_input and image_tags:
+            if has_text and image_tags:
                 base_score += 15
             
             confidence_score = min(99, base_score)
             confidence_level = "High" if confidence_score > 75 else "Medium" if confidence_score > 40 else "Low"
             reasoning = f"Analysis based on {match_count} distinct hazard indicators: {', '.join(evidence_matches[:3])}..."
 
-        return {
-            "hazards": list(identified_hazards),
-            "confidence_score": confidence_score,
-            "confidence_level": confidence_level,
-            "normalized_text": normalized_text,
-            "evidence": evidence_matches,
-            "reasoning": reasoning
-        }
+        return HazardAnalysis(
+            hazards=tuple(identified_hazards),
+            confidence_score=confidence_score,
+            confidence_level=confidence_level,
+            normalized_text=normalized_text,
+            evidence=tuple(evidence_matches),
+            matches=keyword_hits,
+            reasoning=reasoning
+        )
+
+
+class IncrementalHazardScan:
+    """
+    identify_hazards over text that keeps growing. feed() appends a piece
+    and returns the analysis of all the text so far, equal to
+    identify_hazards(whole text, image_tags), while normalizing, keyword
+    scanning and fuzzy matching only the new piece plus a few words before it.
+
+    Text moves through two stages: once enough words follow it that no
+    normalization rule can still reach across, it is normalized for good;
+    once enough normalized words follow, its keyword hits are final too.
+    Only the words after those points are rescanned on the next piece.
+    Not thread-safe; use one per stream.
+    """
+
+    def __init__(self, engine: HazardEngine, image_tags: List[str] = []):
+        self._engine = engine
+        self._image_tags = list(image_tags)
+        self.has_text = False
+        self._raw = "" # text not yet normalized for good
+        self._normalized: List[str] = [] # normalized pieces
+        self._normalized_length = 0 # of " ".join(self._normalized)
+        self._unscanned = "" # tail of the normalized text without final keyword hits
+        self._hits: Tuple[KeywordHit, ...] = ()
+        self._matched: Set[str] = set()
+        self._fuzzy: Dict[str, Tuple[float, str]] = {}
+        engine._fuzzy_index.collect(self._fuzzy, [tag.lower() for tag in self._image_tags])
+        # Words that must follow a position before matches there are final:
+        # the longest match, plus one so the last word is known to be complete
+        self._rule_hold = engine._normalizer.max_phrase_words + 1
+        self._keyword_hold = engine._keyword_span + 1
+
+    def feed(self, text: str) -> HazardAnalysis:
+        engine = self._engine
+        self.has_text = self.has_text or bool(text)
+        self._raw += text
+
+        lowered = self._raw.lower()
+        cut = stable_prefix(lowered, engine._normalizer.spans(lowered), self._rule_hold)
+        if cut:
+            if len(lowered) != len(self._raw):
+                # A few characters lowercase to more than one
+                cut = _raw_position(self._raw, cut)
+            self._add_normalized(engine._normalize_text(self._raw[:cut]))
+            self._raw = self._raw[cut:]
+
+        matches = list(engine._find_keywords(self._unscanned))
+        cut = stable_prefix(self._unscanned, ((start, end) for _, start, end in matches), self._keyword_hold)
+        offset = self._normalized_length - len(self._unscanned)
+        if cut:
+            hits = self._keyword_hits(matches, offset, cut)
+            self._hits += hits
+            self._matched.update(hit.keyword for hit in hits)
+            self._unscanned = self._unscanned[cut:]
+            offset += cut
+
+        # The rest is provisional until more text arrives
+        tail = engine._normalize_text(self._raw)
+        pending = _join(self._unscanned, tail)
+        hits = self._keyword_hits(engine._find_keywords(pending), offset)
+        fuzzy = dict(self._fuzzy)
+        engine._fuzzy_index.collect(fuzzy, tail.split())
+        return engine._analyze(
+            self.has_text,
+            self._image_tags,
+            _join(" ".join(self._normalized), tail),
+            self._hits + hits,
+            self._matched.union(hit.keyword for hit in hits),
+            {keyword: term for keyword, (_, term) in fuzzy.items()}
+        )
+
+    def _add_normalized(self, normalized: str):
+        if not normalized:
+            return
+        if self._normalized:
+            self._normalized_length += 1
+        self._normalized.append(normalized)
+        self._normalized_length += len(normalized)
+        self._unscanned = _join(self._unscanned, normalized)
+        self._engine._fuzzy_index.collect(self._fuzzy, normalized.split())
+
+    def _keyword_hits(self, matches, offset: int, end: Optional[int] = None) -> Tuple[KeywordHit, ...]:
+        return tuple(
+            KeywordHit(category, keyword, offset + start, offset + stop)
+            for keyword, start, stop in matches
+            if end is None or start < end
+            for category in self._engine._keyword_categories[keyword]
+        )
+
+
+def _join(left: str, right: str) -> str:
+    return f"{left} {right}" if left and right else left or right
+
+
+def _raw_position(text: str, lowered_position: int) -> int:
+    """
+    Position in `text` of `lowered_position` in text.lower().
+    """
+    length = 0
+    for position, ch in enumerate(text):
+        if length >= lowered_position:
+            return position
+        length += len(ch.lower())
+    return len(text)
@@ -0,0 +1,265 @@
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import zlib
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence
+
+MAGIC = b"SWKB"
+# Bump whenever the layout or the meaning of a table changes
+FORMAT_VERSION = 2
+
+# magic, format version, byte order (0 little, 1 big), section count
+_HEADER = struct.Struct("<4sHHI")
+# section name, offset, length in bytes
+_SECTION = struct.Struct("<32sQQ")
+_ALIGN = 8
+_BYTE_ORDER = 0 if sys.byteorder == "little" else 1
+
+_META = "meta"
+_STRING_OFFSETS = "str_offsets"
+_STRING_DATA = "str_data"
+
+
+class SnapshotWriter:
+    """
+    Collects the compiled tables of a knowledge base and writes them as one
+    read-only binary file:
+
+        header | section table | sections, each 8-byte aligned
+
+    Every string is stored once, in UTF-8, in a shared string table and
+    referenced by index. Tables are flat arrays of uint32 (or uint64) in
+    native byte order so readers can use them in place. `meta` holds the
+    small, JSON-serializable rest.
+    """
+
+    def __init__(self):
+        self.meta: Dict[str, object] = {}
+        self._string_ids: Dict[str, int] = {}
+        self._string_data = bytearray()
+        self._string_offsets = array("I", [0])
+        self._sections: Dict[str, bytes] = {}
+
+    def add_string(self, text: str) -> int:
+        index = self._string_ids.get(text)
+        if index is None:
+            index = self._string_ids[text] = len(self._string_offsets) - 1
+            self._string_data += text.encode("utf-8")
+            self._string_offsets.append(len(self._string_data))
+        return index
+
+    def add_strings(self, texts: Iterable[str]) -> array:
+        return array("I", (self.add_string(text) for text in texts))
+
+    def add_string_index(self, name: str, ids: array):
+        """
+        Stores an open-addressing hash table over the strings `ids` (string
+        table indices) as `name`, for KnowledgeSnapshot.find.
+        """
+        size = 1 << max(3, (2 * len(ids) - 1).bit_length()) # at most half full
+        table = array("I", [0]) * size
+        for position, string_id in enumerate(ids):
+            data = self._string_data[self._string_offsets[string_id]:self._string_offsets[string_id + 1]]
+            slot = zlib.crc32(data) & (size - 1)
+            while table[slot]:
+                slot = (slot + 1) & (size - 1)
+            table[slot] = position + 1 # 0 marks an empty slot
+        self.add_array(name, table)
+
+    def add_array(self, name: str, values: array):
+        if name in self._sections or len(name.encode("ascii")) > 32:
+            raise ValueError(f"Duplicate or invalid snapshot section name '{name}'")
+        self._sections[name] = values.tobytes()
+
+    def add_groups(self, name: str, groups: Iterable[Iterable[int]]):
+        """
+        Stores a list of integer lists as `name` (the concatenated values)
+        plus `name`_offsets (n + 1 start positions); see KnowledgeSnapshot.group.
+        """
+        offsets = array("I", [0])
+        values = array("I")
+        for group in groups:
+            values.extend(group)
+            offsets.append(len(values))
+        self.add_array(name + "_offsets", offsets)
+        self.add_array(name, values)
+
+    def write(self, path: str):
+        """
+        Writes the snapshot atomically: readers see either the previous file
+        or the complete new one, never a partial write.
+        """
+        sections = dict(self._sections)
+        sections[_META] = json.dumps(self.meta, separators=(",", ":")).encode("utf-8")
+        sections[_STRING_OFFSETS] = self._string_offsets.tobytes()
+        sections[_STRING_DATA] = bytes(self._string_data)
+
+        offset = _HEADER.size + _SECTION.size * len(sections)
+        table = []
+        for name, data in sections.items():
+            offset += -offset % _ALIGN
+            table.append((name, offset, data))
+            offset += len(data)
+
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".kb-", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, _BYTE_ORDER, len(table)))
+                for name, start, data in table:
+                    f.write(_SECTION.pack(name.encode("ascii"), start, len(data)))
+                for name, start, data in table:
+                    f.write(b"\0" * (start - f.tell()))
+                    f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+
+class SnapshotStrings(Sequence):
+    """
+    Lazily decoded strings, given their string table indices.
+    """
+
+    def __init__(self, snapshot: "KnowledgeSnapshot", ids: memoryview):
+        self._snapshot = snapshot
+        self._ids = ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return SnapshotStrings(self._snapshot, self._ids[position])
+        return self._snapshot.string(self._ids[position])
+
+
+class KnowledgeSnapshot:
+    """
+    A snapshot file written by SnapshotWriter, memory-mapped read-only.
+
+    Tables are memoryviews straight into the mapping and strings are decoded
+    on access, so attaching costs a header parse regardless of size, and
+    every worker on the node shares the same physical pages through the OS
+    page cache. Replacing the file (SnapshotWriter.write) does not disturb
+    workers still mapped to the old one.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._arrays: Dict[tuple, memoryview] = {}
+        try:
+            self._view = memoryview(self._mmap)
+            self._sections = self._read_section_table()
+            self.meta = json.loads(bytes(self._section(_META)))
+            self._string_offsets = self.array(_STRING_OFFSETS)
+            self._string_start = self._sections[_STRING_DATA][0]
+        except (KeyError, ValueError, struct.error) as e:
+            self.close()
+            raise ValueError(f"Invalid knowledge base snapshot {path}: {e}") from None
+
+    def _read_section_table(self) -> Dict[str, tuple]:
+        magic, version, byte_order, count = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError("not a knowledge base snapshot")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"format version {version}, expected {FORMAT_VERSION}")
+        if byte_order != _BYTE_ORDER:
+            raise ValueError("written on a machine with a different byte order")
+        sections = {}
+        for index in range(count):
+            name, start, length = _SECTION.unpack_from(self._mmap, _HEADER.size + index * _SECTION.size)
+            if start + length > len(self._mmap):
+                raise ValueError("truncated file")
+            sections[name.rstrip(b"\0").decode("ascii")] = (start, length)
+        return sections
+
+    def _section(self, name: str) -> memoryview:
+        start, length = self._sections[name]
+        return self._view[start:start + length]
+
+    def array(self, name: str, typecode: str = "I") -> memoryview:
+        """
+        Section `name` as a read-only view of uint32 ("I") or uint64 ("Q") values.
+        """
+        view = self._arrays.get((name, typecode))
+        if view is None:
+            view = self._arrays[name, typecode] = self._section(name).cast(typecode)
+        return view
+
+    def group(self, name: str, index: int) -> memoryview:
+        """
+        The index-th list of a section written with SnapshotWriter.add_groups.
+        """
+        offsets = self.array(name + "_offsets")
+        return self.array(name)[offsets[index]:offsets[index + 1]]
+
+    def groups(self, name: str) -> List[memoryview]:
+        offsets = self.array(name + "_offsets")
+        values = self.array(name)
+        return [values[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+
+    def string_bytes(self, index: int) -> bytes:
+        start = self._string_start
+        return self._mmap[start + self._string_offsets[index]:start + self._string_offsets[index + 1]]
+
+    def string(self, index: int) -> str:
+        return self.string_bytes(index).decode("utf-8")
+
+    def strings(self, ids: memoryview) -> SnapshotStrings:
+        return SnapshotStrings(self, ids)
+
+    def find(self, index_name: str, ids: memoryview, text: str) -> int:
+        """
+        Position of `text` in `ids`, using the hash table written for them
+        with SnapshotWriter.add_string_index, or -1.
+        """
+        table = self.array(index_name)
+        mask = len(table) - 1
+        data = text.encode("utf-8")
+        slot = zlib.crc32(data) & mask
+        while True:
+            entry = table[slot]
+            if not entry:
+                return -1
+            if self.string_bytes(ids[entry - 1]) == data:
+                return entry - 1
+            slot = (slot + 1) & mask
+
+    def close(self):
+        """
+        Unmaps the file unless engines still hold views into it; those keep
+        the mapping alive until they are garbage collected.
+        """
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+
+
+def open_snapshot(path: str, source: Optional[str] = None) -> Optional[KnowledgeSnapshot]:
+    """
+    Maps the snapshot at `path` if it exists, is readable and, when `source`
+    is given, was built from that source. Returns None otherwise.
+    """
+    try:
+        snapshot = KnowledgeSnapshot(path)
+    except (OSError, ValueError):
+        return None
+    if source is not None and snapshot.meta.get("source") != source:
+        snapshot.close()
+        return None
+    return snapshot
@@ -0,0 +1,156 @@
+import glob
+import json
+import os
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from .text_normalizer import canonical_phrase, canonical_replacements
+
+DEFAULT_KB_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "knowledge_base")
+
+HAZARDS_FILE = "hazards.json"
+CONTROLS_FILE = "controls.json"
+NORMALIZATION_FILE = "normalization.json"
+# Additional hazard files, e.g. per-language keyword packs: hazards.es.json
+HAZARD_PACKS = "hazards.*.json"
+
+Control = Tuple[str, str] # (hierarchy level, description)
+
+
+class KnowledgeBase:
+    """
+    Hazard dictionary, control rules and normalization rules as loaded from
+    a knowledge base directory:
+
+        hazards.json        {"version", "categories": {category: {"keywords": [...], "hazards": [...]}}}
+        hazards.<pack>.json optional; categories are merged into hazards.json in file name order
+        controls.json       {"version", "rules": [{"category", "terms", "controls": [{"type", "description"}]}],
+                             "general": [...], "high_risk": [...]}
+        normalization.json  optional {phrase: replacement}
+    """
+
+    def __init__(
+        self,
+        hazards: Dict[str, Dict[str, List[str]]],
+        control_rules: List[Tuple[str, List[str], List[Control]]],
+        general_controls: List[Control],
+        high_risk_controls: List[Control],
+        normalization_rules: Optional[Dict[str, str]] = None,
+        version: str = "",
+        files: Tuple[str, ...] = ()
+    ):
+        self.hazards = hazards
+        self.control_rules = control_rules
+        self.general_controls = general_controls
+        self.high_risk_controls = high_risk_controls
+        self.normalization_rules = normalization_rules or {}
+        self.version = version
+        self.files = files
+
+
+def _read_json(path: str, expected: type):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ValueError(f"Cannot read knowledge base file {path}: {e}") from None
+    if not isinstance(data, expected):
+        raise ValueError(f"{path} must contain a JSON {expected.__name__}")
+    return data
+
+
+def _string_list(value, where: str) -> List[str]:
+    if not isinstance(value, list) or not all(isinstance(item, str) and item for item in value):
+        raise ValueError(f"{where} must be a list of non-empty strings")
+    return value
+
+
+def _controls(value, where: str) -> List[Control]:
+    if not isinstance(value, list):
+        raise ValueError(f"{where} must be a list of controls")
+    controls = []
+    for control in value:
+        if not isinstance(control, dict) or not isinstance(control.get("type"), str) \
+                or not isinstance(control.get("description"), str):
+            raise ValueError(f"{where}: every control needs a 'type' and a 'description'")
+        controls.append((control["type"], control["description"]))
+    return controls
+
+
+def _merge_hazards(hazards: Dict[str, Dict[str, List[str]]], data: dict, path: str):
+    categories = data.get("categories")
+    if not isinstance(categories, dict):
+        raise ValueError(f"{path} must have a 'categories' object")
+    for category, entry in categories.items():
+        if not isinstance(entry, dict):
+            raise ValueError(f"{path}: category '{category}' must be an object")
+        keywords = _string_list(entry.get("keywords", []), f"{path}: {category}.keywords")
+        names = _string_list(entry.get("hazards", []), f"{path}: {category}.hazards")
+        merged = hazards.setdefault(category, {"keywords": [], "hazards": []})
+        # Matched against normalized text, so written the way it reads
+        for keyword in keywords:
+            canonical = canonical_phrase(keyword)
+            if not canonical:
+                raise ValueError(f"{path}: {category}.keywords: {keyword!r} has no words left after normalization")
+            if canonical not in merged["keywords"]:
+                merged["keywords"].append(canonical)
+        merged["hazards"].extend(h for h in names if h not in merged["hazards"])
+
+
+def load_knowledge_base(directory: str) -> KnowledgeBase:
+    """
+    Loads and validates a knowledge base directory. Raises ValueError on
+    missing or malformed files, leaving whatever is currently live untouched.
+    """
+    hazards_path = os.path.join(directory, HAZARDS_FILE)
+    controls_path = os.path.join(directory, CONTROLS_FILE)
+    normalization_path = os.path.join(directory, NORMALIZATION_FILE)
+
+    hazard_data = _read_json(hazards_path, dict)
+    hazards: Dict[str, Dict[str, List[str]]] = {}
+    _merge_hazards(hazards, hazard_data, hazards_path)
+    versions = [str(hazard_data.get("version", ""))]
+    pack_paths = sorted(glob.glob(os.path.join(directory, HAZARD_PACKS)))
+    for path in pack_paths:
+        pack_data = _read_json(path, dict)
+        _merge_hazards(hazards, pack_data, path)
+        versions.append(str(pack_data.get("version", "")))
+
+    control_data = _read_json(controls_path, dict)
+    versions.append(str(control_data.get("version", "")))
+    rules = []
+    for index, rule in enumerate(control_data.get("rules", [])):
+        where = f"{controls_path}: rules[{index}]"
+        if not isinstance(rule, dict) or not isinstance(rule.get("category"), str):
+            raise ValueError(f"{where} needs a 'category'")
+        rules.append((
+            rule["category"],
+            [term.lower() for term in _string_list(rule.get("terms", []), f"{where}.terms")],
+            _controls(rule.get("controls", []), f"{where}.controls")
+        ))
+
+    normalization_rules = None
+    if os.path.exists(normalization_path):
+        normalization_rules = _read_json(normalization_path, dict)
+        if not all(isinstance(v, str) for v in normalization_rules.values()):
+            raise ValueError(f"{normalization_path} must map phrases to replacement strings")
+        normalization_rules = canonical_replacements(normalization_rules, normalization_path)
+
+    files = (hazards_path, *pack_paths, controls_path) + ((normalization_path,) if normalization_rules is not None else ())
+    return KnowledgeBase(
+        hazards=hazards,
+        control_rules=rules,
+        general_controls=_controls(control_data.get("general", []), f"{controls_path}: general"),
+        high_risk_controls=_controls(control_data.get("high_risk", []), f"{controls_path}: high_risk"),
+        normalization_rules=normalization_rules,
+        version="+".join(versions), # declared versions of hazards, packs and controls
+        files=files
+    )
+
+
+@lru_cache(maxsize=1)
+def default_knowledge_base() -> KnowledgeBase:
+    """
+    The knowledge base shipped with the backend, loaded once.
+    """
+    return load_knowledge_base(DEFAULT_KB_DIR)
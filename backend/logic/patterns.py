@@ -0,0 +1,52 @@
+import re
+from typing import Iterable, Tuple
+
+_WORD = re.compile(r"\w+")
+
+
+def build_trie_pattern(phrases: Iterable[str], space: str = r"\ ") -> str:
+    """
+    Builds a regex alternation for the given phrases, factored as a prefix trie
+    so the regex engine never re-tests a shared prefix. Spaces inside a phrase
+    are emitted as `space`.
+    """
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node: dict) -> str:
+        is_terminal = "" in node
+        branches = []
+        for ch in sorted(k for k in node if k):
+            branches.append((space if ch == " " else re.escape(ch)) + emit(node[ch]))
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if is_terminal:
+            return ("(?:" + body + ")?") if len(branches) > 1 or len(branches[0]) > 1 else body + "?"
+        return body
+
+    return emit(trie)
+
+
+def stable_prefix(text: str, spans: Iterable[Tuple[int, int]], hold_words: int) -> int:
+    """
+    Length of the longest prefix of `text` that ends in whitespace before a
+    word, leaves out the last `hold_words` words and does not cut through
+    any of the match `spans`. When a pattern's matches span fewer than
+    hold_words words, its matches in this prefix stay the same however the
+    text continues, and the rest can be scanned on its own. (Whitespace also
+    keeps context-dependent lowercasing, like the Greek final sigma, from
+    reaching across.)
+    """
+    spans = list(spans)
+    starts = [match.start() for match in _WORD.finditer(text)]
+    for start in reversed(starts[:max(0, len(starts) - hold_words)]):
+        if start and not text[start - 1].isspace():
+            continue
+        if not any(span_start < start < span_end for span_start, span_end in spans):
+            return start
+    return 0
@@ -0,0 +1,14 @@
+import importlib
+
+
+def load_plugin(path: str, base_cls: type):
+    """
+    Instantiates a "package.module:ClassName" implementation of base_cls.
+    """
+    module_name, _, class_name = path.partition(":")
+    if not module_name or not class_name:
+        raise ValueError(f"Invalid plugin path '{path}', expected 'module:ClassName'")
+    plugin_cls = getattr(importlib.import_module(module_name), class_name)
+    if not (isinstance(plugin_cls, type) and issubclass(plugin_cls, base_cls)):
+        raise TypeError(f"{path} is not a {base_cls.__name__}")
+    return plugin_cls()
@@ -0,0 +1,399 @@
+import io
+import zipfile
+from collections import Counter
+from copy import deepcopy
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Tuple
+from xml.sax.saxutils import escape
+
+from docx import Document
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.opc.oxml import serialize_part_xml
+from docx.text.run import Run
+from lxml import etree
+
+DOCUMENT_PART = "word/document.xml"
+
+
+class DocxTemplate:
+    """
+    Pre-built DOCX skeleton. The static package parts (styles, numbering,
+    settings, ...) are zipped once; the static paragraphs and the table are
+    built once as XML prototypes. A render only clones prototypes, fills in
+    the risk fields, hazards and control rows, and appends word/document.xml
+    to a copy of the pre-zipped static parts.
+    """
+
+    def __init__(self):
+        document = Document()
+        self.static_zip = self._zip_static_parts(document)
+
+        title = document.add_heading('Safety Assessment Report', 0)
+        title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        self.title = title._p
+
+        self.headings = {level: document.add_heading('-', level=level)._p for level in (1, 2)}
+        self.plain = document.add_paragraph('-')._p
+        p = document.add_paragraph()
+        p.add_run('Risk Level: ').bold = True
+        p.add_run('')
+        p.add_run('')
+        p.add_run('')
+        self.summary = p._p
+        self.bullet = document.add_paragraph('-', style='List Bullet')._p
+
+        table = document.add_table(rows=1, cols=2)
+        table.style = 'Table Grid'
+        hdr_cells = table.rows[0].cells
+        hdr_cells[0].text = 'Type'
+        hdr_cells[1].text = 'Control Measure'
+        row_cells = table.add_row().cells
+        row_cells[0].text = '-'
+        row_cells[1].text = '-'
+        self.row = table._tbl.tr_lst[-1]
+        self.table = table._tbl
+        self.table.remove(self.row)
+
+        # What remains is the document shell: an empty body with its sectPr
+        body = document.element.body
+        for element in list(body):
+            if element is not body.sectPr:
+                body.remove(element)
+        self.shell = document.element
+
+    @staticmethod
+    def _zip_static_parts(document) -> bytes:
+        """
+        Zips every package part except the main document part, once.
+        """
+        saved = io.BytesIO()
+        document.save(saved)
+        static = io.BytesIO()
+        with zipfile.ZipFile(saved) as src, zipfile.ZipFile(static, "w", zipfile.ZIP_DEFLATED) as dst:
+            for info in src.infolist():
+                if info.filename != DOCUMENT_PART:
+                    dst.writestr(info, src.read(info))
+        return static.getvalue()
+
+    def heading(self, text: str, level: int = 1):
+        p = deepcopy(self.headings[level])
+        p.r_lst[0].text = text
+        return p
+
+    def paragraph(self, text: str):
+        p = deepcopy(self.plain)
+        p.r_lst[0].text = text
+        return p
+
+    def summary_paragraph(self, risk_level: str, risk_score, confidence):
+        p = deepcopy(self.summary)
+        _, risk_run, score_run, confidence_run = p.r_lst
+        risk_run.text = str(risk_level)
+        if risk_level == 'High':
+            Run(risk_run, None).bold = True
+        score_run.text = f"\nRisk Score: {risk_score}"
+        confidence_run.text = f"\nConfidence: {confidence}"
+        return p
+
+    def bullet_paragraph(self, text: str):
+        p = deepcopy(self.bullet)
+        p.r_lst[0].text = text
+        return p
+
+    def table_of(self, rows: Iterable[Tuple[str, str]], header: Tuple[str, str] = None):
+        """
+        A 'Table Grid' table with the controls table look; header defaults
+        to ('Type', 'Control Measure').
+        """
+        table = deepcopy(self.table)
+        if header:
+            for tc, text in zip(table.tr_lst[0].tc_lst, header):
+                tc.p_lst[0].r_lst[0].text = text
+        for left, right in rows:
+            tr = deepcopy(self.row)
+            left_cell, right_cell = tr.tc_lst
+            left_cell.p_lst[0].r_lst[0].text = str(left)
+            right_cell.p_lst[0].r_lst[0].text = str(right)
+            table.append(tr)
+        return table
+
+    def assessment_body(self, assessment_data: dict, heading_level: int = 1) -> list:
+        """
+        The per-assessment block: risk summary, hazards and controls.
+        """
+        elements = [
+            self.heading('Risk Summary', heading_level),
+            self.summary_paragraph(
+                assessment_data['risk_level'], assessment_data['risk_score'], assessment_data['confidence']
+            ),
+            self.heading('Identified Hazards', heading_level)
+        ]
+        if assessment_data['hazards']:
+            elements.extend(self.bullet_paragraph(h) for h in assessment_data['hazards'])
+        else:
+            elements.append(self.paragraph("No specific hazards identified."))
+
+        elements.append(self.heading('Required Controls', heading_level))
+        if assessment_data['controls']:
+            elements.append(self.table_of((c['type'], c['description']) for c in assessment_data['controls']))
+        else:
+            elements.append(self.paragraph("No controls specified."))
+        return elements
+
+    def summary_body(self, summary: "BulkSummary") -> list:
+        """
+        Audit summary of a bulk report: risk level histogram and top hazards.
+        """
+        elements = [
+            self.heading('Audit Summary', 1),
+            self.paragraph(f"Assessments: {summary.count}"),
+            self.heading('Risk Level Distribution', 2),
+            self.table_of(summary.risk_histogram(), header=('Risk Level', 'Assessments')),
+            self.heading('Top Hazards', 2)
+        ]
+        top_hazards = summary.top_hazards()
+        if top_hazards:
+            elements.append(self.table_of(top_hazards, header=('Hazard', 'Occurrences')))
+        else:
+            elements.append(self.paragraph("No specific hazards identified."))
+        return elements
+
+    def _document_xml_parts(self) -> Tuple[bytes, bytes]:
+        """
+        The serialized document shell, split where body content goes.
+        """
+        shell = deepcopy(self.shell)
+        marker = etree.Comment("body")
+        shell.body.sectPr.addprevious(marker)
+        prefix, suffix = serialize_part_xml(shell).split(b"<!--body-->")
+        return prefix, suffix
+
+    def render(self, assessment_data: dict) -> io.BytesIO:
+        shell = deepcopy(self.shell)
+        sect_pr = shell.body.sectPr
+        elements = [deepcopy(self.title)]
+        elements.extend(self.assessment_body(assessment_data))
+        elements.append(self.heading('HIRA Details', 1))
+        elements.append(self.paragraph('This report was automatically generated by SafetyAI Guardian.'))
+        for element in elements:
+            sect_pr.addprevious(element)
+
+        file_stream = io.BytesIO(self.static_zip)
+        file_stream.seek(0, io.SEEK_END)
+        with zipfile.ZipFile(file_stream, "a", zipfile.ZIP_DEFLATED) as package:
+            package.writestr(DOCUMENT_PART, serialize_part_xml(shell))
+        file_stream.seek(0)
+        return file_stream
+
+    def render_bulk(self, assessments: Iterable[dict], out: BinaryIO) -> "BulkSummary":
+        """
+        Writes one consolidated report for many assessments to a binary
+        file. word/document.xml is streamed into the zip element by
+        element, so memory does not grow with the number of assessments.
+        """
+        summary = BulkSummary()
+        prefix, suffix = self._document_xml_parts()
+
+        # Append mode would have to read `out` back, which a file opened "wb"
+        # cannot do; write a fresh archive and copy the static parts into it
+        with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as package:
+            with zipfile.ZipFile(io.BytesIO(self.static_zip)) as static:
+                for info in static.infolist():
+                    package.writestr(info, static.read(info))
+            with package.open(DOCUMENT_PART, "w", force_zip64=True) as part:
+                part.write(prefix)
+                title = deepcopy(self.title)
+                title.r_lst[0].text = 'Consolidated Safety Assessment Report'
+                part.write(etree.tostring(title))
+                for index, assessment_data in enumerate(assessments, 1):
+                    summary.add(assessment_data)
+                    elements = [self.heading(f"Assessment {index}", 1)]
+                    if assessment_data.get('description'):
+                        elements.append(self.paragraph(assessment_data['description']))
+                    elements.extend(self.assessment_body(assessment_data, heading_level=2))
+                    for element in elements:
+                        part.write(etree.tostring(element))
+                for element in self.summary_body(summary):
+                    part.write(etree.tostring(element))
+                part.write(etree.tostring(
+                    self.paragraph('This report was automatically generated by SafetyAI Guardian.')
+                ))
+                part.write(suffix)
+        return summary
+
+
+class BulkSummary:
+    """
+    Running totals for a consolidated report, updated as assessments stream by.
+    """
+    RISK_LEVELS = ("High", "Medium", "Low")
+
+    def __init__(self):
+        self.count = 0
+        self.risk_levels = Counter()
+        self.hazards = Counter()
+
+    def add(self, assessment_data: dict):
+        self.count += 1
+        self.risk_levels[assessment_data['risk_level']] += 1
+        self.hazards.update(set(assessment_data['hazards']))
+
+    def risk_histogram(self) -> List[Tuple[str, int]]:
+        levels = list(self.RISK_LEVELS) + sorted(l for l in self.risk_levels if l not in self.RISK_LEVELS)
+        return [(level, self.risk_levels[level]) for level in levels]
+
+    def top_hazards(self, n: int = 10) -> List[Tuple[str, int]]:
+        return self.hazards.most_common(n)
+
+
+class PdfTemplate:
+    """
+    ReportLab imports, the sample stylesheet and the controls TableStyle,
+    built once per process.
+    """
+
+    def __init__(self):
+        from reportlab.lib.pagesizes import letter
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.lib import colors
+
+        self.pagesize = letter
+        self.SimpleDocTemplate = SimpleDocTemplate
+        self.Paragraph = Paragraph
+        self.Spacer = Spacer
+        self.Table = Table
+        self.styles = getSampleStyleSheet()
+        self.table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('WORDWRAP', (0, 0), (-1, -1), True) # Ensure text wraps
+        ])
+
+    def assessment_story(self, assessment_data: dict, heading: str = 'Heading1') -> list:
+        """
+        Flowables for one assessment: risk summary, hazards and controls.
+        """
+        Paragraph, Spacer, styles = self.Paragraph, self.Spacer, self.styles
+        story = []
+
+        # Risk Summary
+        story.append(Paragraph("Risk Summary", styles[heading]))
+        risk_text = f"<b>Risk Level:</b> {escape(str(assessment_data['risk_level']))}<br/>" \
+                    f"<b>Risk Score:</b> {escape(str(assessment_data['risk_score']))}<br/>" \
+                    f"<b>Confidence:</b> {escape(str(assessment_data['confidence']))}"
+        story.append(Paragraph(risk_text, styles['Normal']))
+        story.append(Spacer(1, 12))
+
+        # Hazards
+        story.append(Paragraph("Identified Hazards", styles[heading]))
+        if assessment_data['hazards']:
+            for h in assessment_data['hazards']:
+                story.append(Paragraph(f"• {escape(h)}", styles['Normal']))
+        else:
+            story.append(Paragraph("No specific hazards identified.", styles['Normal']))
+        story.append(Spacer(1, 12))
+
+        # Controls
+        story.append(Paragraph("Required Controls", styles[heading]))
+        if assessment_data['controls']:
+            table_data = [['Type', 'Control Measure']]
+            for c in assessment_data['controls']:
+                table_data.append([c['type'], c['description']])
+
+            t = self.Table(table_data, colWidths=[100, 350])
+            t.setStyle(self.table_style)
+            story.append(t)
+        else:
+            story.append(Paragraph("No controls specified.", styles['Normal']))
+        return story
+
+    def render(self, assessment_data: dict) -> io.BytesIO:
+        buffer = io.BytesIO()
+        doc = self.SimpleDocTemplate(buffer, pagesize=self.pagesize)
+
+        story = [self.Paragraph("Safety Assessment Report", self.styles['Title']), self.Spacer(1, 12)]
+        story.extend(self.assessment_story(assessment_data))
+        story.append(self.Spacer(1, 24))
+        story.append(self.Paragraph("This report was automatically generated by SafetyAI Guardian.", self.styles['Italic']))
+
+        doc.build(story)
+        buffer.seek(0)
+        return buffer
+
+    def summary_story(self, summary: BulkSummary) -> list:
+        """
+        Audit summary of a bulk report: risk level histogram and top hazards.
+        """
+        Paragraph, styles = self.Paragraph, self.styles
+        story = [
+            Paragraph("Audit Summary", styles['Heading1']),
+            Paragraph(f"<b>Assessments:</b> {summary.count}", styles['Normal']),
+            Paragraph("Risk Level Distribution", styles['Heading2'])
+        ]
+        t = self.Table([['Risk Level', 'Assessments']] + summary.risk_histogram(), colWidths=[100, 350])
+        t.setStyle(self.table_style)
+        story.append(t)
+
+        story.append(Paragraph("Top Hazards", styles['Heading2']))
+        top_hazards = summary.top_hazards()
+        if top_hazards:
+            t = self.Table([['Hazard', 'Occurrences']] + top_hazards, colWidths=[350, 100])
+            t.setStyle(self.table_style)
+            story.append(t)
+        else:
+            story.append(Paragraph("No specific hazards identified.", styles['Normal']))
+        return story
+
+    def render_bulk(self, assessments: Iterable[dict], out: BinaryIO) -> BulkSummary:
+        """
+        Writes one consolidated report for many assessments to a binary file.
+        Flowables are generated lazily while the document is laid out, so only
+        a small look-ahead window of them exists at a time, but ReportLab keeps
+        every finished page (compressed) until the file is written: memory
+        grows with the batch. Callers cap the number of assessments.
+        """
+        summary = BulkSummary()
+        doc = self.SimpleDocTemplate(out, pagesize=self.pagesize, pageCompression=1)
+
+        def flowables() -> Iterator:
+            yield self.Paragraph("Consolidated Safety Assessment Report", self.styles['Title'])
+            yield self.Spacer(1, 12)
+            for index, assessment_data in enumerate(assessments, 1):
+                summary.add(assessment_data)
+                yield self.Paragraph(f"Assessment {index}", self.styles['Heading1'])
+                if assessment_data.get('description'):
+                    yield self.Paragraph(escape(assessment_data['description']), self.styles['Italic'])
+                yield from self.assessment_story(assessment_data, heading='Heading2')
+                yield self.Spacer(1, 24)
+            yield from self.summary_story(summary)
+            yield self.Spacer(1, 24)
+            yield self.Paragraph("This report was automatically generated by SafetyAI Guardian.", self.styles['Italic'])
+
+        doc.build(_FlowableStream(flowables()))
+        return summary
+
+
+class _FlowableStream(list):
+    """
+    A flowable list for DocTemplate.build() that refills itself from an
+    iterator, keeping `lookahead` flowables buffered so keepWithNext
+    grouping still sees what follows a heading.
+    """
+
+    def __init__(self, source: Iterable, lookahead: int = 32):
+        super().__init__()
+        self._source = iter(source)
+        self._lookahead = lookahead
+
+    def __len__(self) -> int:
+        while list.__len__(self) < self._lookahead:
+            try:
+                list.append(self, next(self._source))
+            except StopIteration:
+                break
+        return list.__len__(self)
@@ -1,18 +1,59 @@
+from types import MappingProxyType
+from typing import Dict, List, Mapping
+
+# Likelihood and severity are rated 1-5; the table covers exactly that range
+SCALE = range(1, 6)
+LEVELS = ("Low", "Medium", "High")
+
+# Flag bits of a lookup-table index
+MISSING_CONTROLS = 1
+FATAL_POTENTIAL = 2
+UNCLEAR_INFO = 4
+
+
+def _flags(missing_controls, fatal_potential, unclear_info) -> int:
+    return (
+        (MISSING_CONTROLS if missing_controls else 0)
+        | (FATAL_POTENTIAL if fatal_potential else 0)
+        | (UNCLEAR_INFO if unclear_info else 0)
+    )
+
 
 class RiskEngine:
+    # Bump whenever the scoring rules below change
+    version = "1"
+
     def __init__(self):
-        pass
+        # Every in-range (likelihood, severity, flags) outcome, computed once
+        # by the rules in _score and shared read-only between callers.
+        self._table: Dict[int, Dict[int, List[Mapping]]] = {
+            likelihood: {
+                severity: [
+                    MappingProxyType(self._score(
+                        likelihood, severity,
+                        missing_controls=bool(flags & MISSING_CONTROLS),
+                        fatal_potential=bool(flags & FATAL_POTENTIAL),
+                        unclear_info=bool(flags & UNCLEAR_INFO)
+                    ))
+                    for flags in range(8)
+                ]
+                for severity in SCALE
+            }
+            for likelihood in SCALE
+        }
+        self._arrays = None
 
-    def calculate_risk(self, likelihood: int, severity: int, missing_controls: bool = False, fatal_potential: bool = False, unclear_info: bool = False) -> dict:
+    @staticmethod
+    def _score(likelihood, severity, missing_controls=False, fatal_potential=False, unclear_info=False) -> dict:
         """
-        Calculates risk score based on Likelihood and Severity.
-        Enforces conservative rules.
+        The scoring rules themselves. Only used to fill the lookup table and
+        for inputs outside the 1-5 scale.
         """
         final_likelihood = likelihood
         final_severity = severity
 
         # Rule: Unclear info -> Conservative assumption
-        # (Assuming conservative means bumping both or setting to high defaults if not specified, 
+        # (Assuming conservative means bumping both or setting to high defaults if not specified,
         # but here we follow specific rules if provided)
         if unclear_info:
             # If info is unclear, we might bump values or assume worst case if they are low.
@@ -29,16 +70,112 @@ class RiskEngine:
             final_severity = 5
 
         risk_score = final_likelihood * final_severity
-        
+
         risk_level = "Low"
         if risk_score >= 15:
             risk_level = "High"
         elif risk_score >= 8:
             risk_level = "Medium"
-        
+
         return {
             "score": risk_score,
             "likelihood": final_likelihood,
             "severity": final_severity,
             "level": risk_level
         }
+
+    def calculate_risk(self, likelihood: int, severity: int, missing_controls: bool = False, fatal_potential: bool = False, unclear_info: bool = False) -> Mapping:
+        """
+        Calculates risk score based on Likelihood and Severity.
+        Enforces conservative rules.
+        Returns a shared, read-only mapping; copy it before modifying.
+        """
+        if type(likelihood) is int and type(severity) is int and 1 <= likelihood <= 5 and 1 <= severity <= 5:
+            return self._table[likelihood][severity][_flags(missing_controls, fatal_potential, unclear_info)]
+        # Off-scale or non-int ratings: apply the rules directly
+        return MappingProxyType(self._score(likelihood, severity, missing_controls, fatal_potential, unclear_info))
+
+    def _lookup_arrays(self, np):
+        """
+        The lookup table as (score, likelihood, severity, level index) arrays
+        indexed by [likelihood, severity, flags]; row/column 0 are unused.
+        """
+        if self._arrays is None:
+            shape = (6, 6, 8)
+            arrays = tuple(np.zeros(shape, dtype=np.int64) for _ in range(4))
+            for likelihood, by_severity in self._table.items():
+                for severity, outcomes in by_severity.items():
+                    for flags, outcome in enumerate(outcomes):
+                        index = (likelihood, severity, flags)
+                        arrays[0][index] = outcome["score"]
+                        arrays[1][index] = outcome["likelihood"]
+                        arrays[2][index] = outcome["severity"]
+                        arrays[3][index] = LEVELS.index(outcome["level"])
+            self._arrays = arrays
+        return self._arrays
+
+    def calculate_risk_batch(
+        self,
+        likelihood,
+        severity,
+        missing_controls=False,
+        fatal_potential=False,
+        unclear_info=False
+    ) -> dict:
+        """
+        Vectorized calculate_risk over NumPy arrays (or anything np.asarray
+        accepts, e.g. DataFrame columns); scalars broadcast. Returns arrays
+        keyed like the scalar result: "score", "likelihood", "severity"
+        (int64) and "level" (str). Identical to calling calculate_risk on
+        every element. Requires NumPy.
+        """
+        try:
+            import numpy as np
+        except ImportError:
+            raise RuntimeError("calculate_risk_batch requires numpy (pip install numpy)") from None
+
+        likelihood, severity = np.asarray(likelihood), np.asarray(severity)
+        # An empty list comes in as float64: nothing to check, treat it as int
+        if likelihood.size == 0:
+            likelihood = likelihood.astype(np.int64)
+        if severity.size == 0:
+            severity = severity.astype(np.int64)
+        if likelihood.dtype.kind not in "iub" or severity.dtype.kind not in "iub":
+            raise TypeError("likelihood and severity must be integer arrays")
+        likelihood, severity, missing_controls, fatal_potential, unclear_info = np.broadcast_arrays(
+            likelihood, severity,
+            np.asarray(missing_controls, dtype=bool),
+            np.asarray(fatal_potential, dtype=bool),
+            np.asarray(unclear_info, dtype=bool)
+        )
+
+        flags = (
+            missing_controls * MISSING_CONTROLS
+            | fatal_potential * FATAL_POTENTIAL
+            | unclear_info * UNCLEAR_INFO
+        ).astype(np.intp)
+        in_scale = (likelihood >= 1) & (likelihood <= 5) & (severity >= 1) & (severity <= 5)
+        rows = np.where(in_scale, likelihood, 0).astype(np.intp)
+        cols = np.where(in_scale, severity, 0).astype(np.intp)
+
+        score, final_likelihood, final_severity, level = (
+            table[rows, cols, flags] for table in self._lookup_arrays(np)
+        )
+
+        if not in_scale.all():
+            for index in zip(*np.nonzero(~in_scale)):
+                outcome = self._score(
+                    int(likelihood[index]), int(severity[index]),
+                    bool(missing_controls[index]), bool(fatal_potential[index]), bool(unclear_info[index])
+                )
+                score[index] = outcome["score"]
+                final_likelihood[index] = outcome["likelihood"]
+                final_severity[index] = outcome["severity"]
+                level[index] = LEVELS.index(outcome["level"])
+
+        return {
+            "score": score,
+            "likelihood": final_likelihood,
+            "severity": final_severity,
+            "level": np.asarray(LEVELS)[level]
+        }
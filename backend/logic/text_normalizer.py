@@ -0,0 +1,113 @@
+import json
+import re
+from functools import lru_cache
+from typing import Dict, Iterator, Optional, Tuple
+
+from .patterns import build_trie_pattern
+
+# Replacements for broken speech/UAT scenarios. Keys are lowercase phrases
+# matched on word boundaries; words inside a phrase may be separated by any
+# run of spaces/punctuation.
+DEFAULT_REPLACEMENTS = {
+    "goin": "going",
+    "weldin": "welding",
+    "n": "and",
+    "wat": "what",
+    "doin": "doing",
+    "messy": "cluttered",
+    "fixin": "repairing",
+    "no vent": "poor ventilation",
+    "hi volt": "high voltage",
+    "stair": "staircase",
+    "wire": "electrical wiring"
+}
+
+_SEPARATOR = re.compile(r"\W+")
+_WORD = re.compile(r"\w+")
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+
+
+def canonical_phrase(phrase: str) -> str:
+    """
+    A phrase as it reads after normalize() without replacements: lowercase,
+    punctuation turned into spaces, words separated by single spaces. What
+    keywords must look like to match normalized text.
+    """
+    return " ".join(_PUNCTUATION.sub(" ", phrase.lower()).split())
+
+
+def canonical_replacements(rules: Dict[str, str], source: str = "replacements") -> Dict[str, str]:
+    """
+    Rules keyed the way normalize() matches them: lowercase, words separated
+    by single spaces. Raises ValueError when two keys become the same phrase
+    with different replacements, rather than silently dropping one.
+    """
+    canonical = {}
+    written = {}
+    for phrase, replacement in rules.items():
+        key = " ".join(str(phrase).lower().split())
+        if key in canonical and canonical[key] != replacement:
+            raise ValueError(
+                f"{source}: {written[key]!r} and {phrase!r} are the same phrase with different replacements"
+            )
+        canonical[key] = replacement
+        written[key] = phrase
+    return canonical
+
+
+def load_replacements(path: str) -> Dict[str, str]:
+    """
+    Loads replacement rules from a JSON object of {phrase: replacement}.
+    """
+    with open(path, encoding="utf-8") as f:
+        rules = json.load(f)
+    if not isinstance(rules, dict):
+        raise ValueError(f"{path}: expected a JSON object of phrase -> replacement")
+    return canonical_replacements({k: str(v) for k, v in rules.items()}, path)
+
+
+class TextNormalizer:
+    """
+    Lowercases, strips punctuation and applies phrase replacements in a single
+    regex pass. All rules are compiled once into one trie-shaped alternation;
+    the matched phrase indexes the replacement table.
+    """
+
+    def __init__(self, replacements: Optional[Dict[str, str]] = None, cache_size: int = 0):
+        self._replacements = canonical_replacements(DEFAULT_REPLACEMENTS if replacements is None else replacements)
+
+        rules = build_trie_pattern((p for p in self._replacements if p), space=r"\W+")
+        alternatives = [r"(?P<punct>[^\w\s]+)"]
+        if rules:
+            alternatives.insert(0, r"\b(?P<rule>" + rules + r")\b")
+        self._pattern = re.compile("|".join(alternatives))
+        # Most words a single replacement can span
+        self.max_phrase_words = max((len(_WORD.findall(p)) for p in self._replacements), default=0)
+
+        if cache_size:
+            self.normalize = lru_cache(maxsize=cache_size)(self.normalize)
+
+    @property
+    def rules(self) -> Dict[str, str]:
+        return dict(self._replacements)
+
+    def _dispatch(self, match) -> str:
+        if match.lastgroup == "punct":
+            return " "
+        phrase = match.group()
+        replacement = self._replacements.get(phrase)
+        if replacement is None:
+            # Multi-word phrase written with punctuation or extra spaces
+            replacement = self._replacements[_SEPARATOR.sub(" ", phrase)]
+        return replacement
+
+    def spans(self, text: str) -> Iterator[Tuple[int, int]]:
+        """
+        (start, end) of every replacement and punctuation run in already
+        lowercased text, as normalize() would apply them.
+        """
+        return (match.span() for match in self._pattern.finditer(text))
+
+    def normalize(self, text: str) -> str:
+        text = self._pattern.sub(self._dispatch, text.lower())
+        return " ".join(text.split())
@@ -0,0 +1,75 @@
+from typing import BinaryIO, List, Optional, Tuple
+
+
+class VisionTagger:
+    """
+    Image tagging backend interface. tag() is blocking and is always called on
+    the vision worker pool, never on the event loop. `image` is a seekable
+    binary file positioned at the start; read it in chunks or hand it to a
+    decoder, but do not assume it fits in memory.
+
+    Results are cached by image content. Taggers whose output depends on the
+    file name set `uses_filename`; taggers that never read the image bytes
+    clear `uses_content` so uploads are not hashed for them.
+    """
+
+    uses_content = True
+    uses_filename = False
+
+    def tag(self, image: BinaryIO, filename: str = "", content_type: Optional[str] = None) -> Tuple[List[str], int]:
+        """
+        Returns (image_tags, vision_confidence_boost).
+        """
+        raise NotImplementedError
+
+
+class FilenameVisionTagger(VisionTagger):
+    """
+    Vision AI simulation (Improved for UAT): tags from keywords in the file name.
+    """
+
+    uses_content = False
+    uses_filename = True
+
+    def tag(self, image: BinaryIO, filename: str = "", content_type: Optional[str] = None) -> Tuple[List[str], int]:
+        fname = (filename or "").lower()
+        # Mocking multi-hazard detection for specific scenarios
+        if any(w in fname for w in ["fire", "weld", "spark"]):
+            return ["Fire", "Smoke", "Sparks", "High Temperature"], 30
+        elif any(w in fname for w in ["height", "scaffold", "ladder"]):
+            return ["Height", "Open Edge", "Unstable Platform", "Fall Potential"], 25
+        elif any(w in fname for w in ["chemical", "acid", "leak", "drum"]):
+            return ["Chemical Spill", "Toxic Fumes", "Corrosive Material"], 20
+        elif any(w in fname for w in ["clutter", "messy", "dirt", "construction"]):
+            return ["Tripping Hazard", "Obstruction", "Poor Housekeeping"], 15
+        elif "dark" in fname or "blur" in fname:
+            # Simulate low quality image
+            return ["Low Visibility", "Unclear Environment"], -10 # Low quality reduces overall confidence
+        else:
+            # Randomly pick some generic site tags if generic image
+            return ["Site environment", "General workspace"], 5
+
+
+def perceptual_hash(image: BinaryIO, hash_size: int = 8) -> Optional[str]:
+    """
+    Difference hash (dHash) of an image: near-identical shots of the same
+    scene (re-encoded, resized, slightly re-exposed) get the same value.
+    Returns None when Pillow is not installed or the image cannot be decoded.
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    try:
+        with Image.open(image) as img:
+            # Let JPEG decode at reduced scale; we only need a tiny thumbnail
+            img.draft("L", (hash_size * 4, hash_size * 4))
+            pixels = list(img.convert("L").resize((hash_size + 1, hash_size)).getdata())
+    except Exception:
+        return None
+    bits = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return f"{bits:0{hash_size * hash_size // 4}x}"
@@ -1,192 +1,528 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+import time
+_import_started = time.perf_counter()
+
+import asyncio
+import hmac
+import os
+import tempfile
+from contextlib import asynccontextmanager
+
+from fastapi import APIRouter, Depends, FastAPI, UploadFile, File, Form, Header, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-from typing import Optional, List
-
-from models import AssessmentResponse, ControlItem
-from logic.hazard_engine import HazardEngine
-from logic.risk_engine import RiskEngine
-from logic.control_engine import ControlEngine
-from logic.document_engine import DocumentEngine
-
-app = FastAPI()
-
-# Enable CORS for frontend - Move to top for best practice
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"], # In production, replace with specific origins
-    allow_credentials=False, # Credentials cannot be True when allow_origins is ["*"]
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Initialize Engines
-hazard_engine = HazardEngine()
-risk_engine = RiskEngine()
-control_engine = ControlEngine()
-document_engine = DocumentEngine()
-
-@app.post("/report")
-async def generate_report(assessment: AssessmentResponse):
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import ValidationError
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import HTTPConnection
+from typing import Optional, List, Tuple
+
+import settings
+from admission import UPLOAD, AdmissionMiddleware
+from models import Assessment, AssessmentResponse, BatchAssessmentItem
+from concurrency import QueueFullError
+from instrumentation import MetricsMiddleware, StartupReport
+from record_stream import InvalidLine, iter_json_records, spool_request_body, spool_request_to_file
+from rendering import BulkReportError
+from report_cache import etag_matches, report_key
+from report_jobs import BULK, DONE, SINGLE
+from serialization import dumps, encode_assessment
+from services import Services
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    services: Services = app.state.services
+    if settings.STARTUP_WARMUP:
+        with services.startup.timed("warm-up"):
+            await services.warm_up()
+    watcher = None
+    if settings.KNOWLEDGE_BASE_WATCH_INTERVAL:
+        watcher = asyncio.create_task(services.knowledge_base.watch(settings.KNOWLEDGE_BASE_WATCH_INTERVAL))
+    print(services.startup.summary())
+    yield
+    if watcher:
+        watcher.cancel()
+    services.shutdown()
+
+def get_services(connection: HTTPConnection) -> Services:
+    return connection.app.state.services
+
+router = APIRouter()
+
+REPORT_MEDIA_TYPES = {
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "pdf": "application/pdf"
+}
+
+def require_report_format(fmt: str):
+    if fmt not in REPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported format '{fmt}', use 'pdf' or 'docx'")
+
+async def render_response(
+    services: Services, request: Request, fmt: str, assessment: AssessmentResponse, media_type: str, filename: str
+) -> Response:
     """
-    Generates a downloadable DOCX report based on the provided assessment data.
+    Serves a report from the content-addressed cache, answering
+    If-None-Match with 304, or renders it on the report pool and maps pool
+    backpressure to HTTP errors.
     """
     # Convert Pydantic model to dict
     data = assessment.dict()
-    
-    file_stream = document_engine.generate_docx(data)
-    
-    return StreamingResponse(
-        file_stream,
-        media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        headers={"Content-Disposition": "attachment; filename=safety_report.docx"}
-    )
+    key = report_key(fmt, data)
+    etag = f'"{key}"'
+    headers = {"ETag": etag}
 
-@app.post("/report/pdf")
-async def generate_pdf_report(assessment: AssessmentResponse):
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    content = services.report_cache.get(key)
+    if content is None and services.report_cache.spool_dir:
+        content = await run_in_threadpool(services.report_cache.get_from_disk, key, fmt)
+
+    if content is not None:
+        headers["X-Cache"] = "HIT"
+    else:
+        try:
+            content, seconds = await services.report_renderer.render(fmt, data)
+            services.metrics.record(f"render_{fmt}", seconds)
+        except QueueFullError:
+            raise HTTPException(
+                status_code=503,
+                detail="Report renderer is busy",
+                headers={"Retry-After": str(services.report_renderer.retry_after())}
+            )
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail="Report rendering timed out")
+
+        services.report_cache.put(key, content)
+        if services.report_cache.spool_dir:
+            await run_in_threadpool(services.report_cache.write_to_disk, key, fmt, content)
+        headers["X-Cache"] = "MISS"
+        headers["X-Render-Time"] = f"{seconds * 1000:.1f}ms"
+
+    headers["Content-Disposition"] = f"attachment; filename={filename}"
+    return Response(content=content, media_type=media_type, headers=headers)
+
+@router.post("/report")
+async def generate_report(assessment: AssessmentResponse, request: Request, services: Services = Depends(get_services)):
+    """
+    Generates a downloadable DOCX report based on the provided assessment data.
+    """
+    return await render_response(services, request, "docx", assessment, REPORT_MEDIA_TYPES["docx"], "safety_report.docx")
+
+@router.post("/report/pdf")
+async def generate_pdf_report(assessment: AssessmentResponse, request: Request, services: Services = Depends(get_services)):
     """
     Generates a downloadable PDF report.
     """
-    data = assessment.dict()
-    file_stream = document_engine.generate_pdf(data)
-    
-    return StreamingResponse(
-        file_stream,
-        media_type="application/pdf",
-        headers={"Content-Disposition": "attachment; filename=safety_report.pdf"}
+    return await render_response(services, request, "pdf", assessment, REPORT_MEDIA_TYPES["pdf"], "safety_report.pdf")
+
+@router.post("/report/bulk")
+async def generate_bulk_report(request: Request, format: str = "pdf", services: Services = Depends(get_services)):
+    """
+    Generates one consolidated report (format=pdf|docx) for a JSON array or
+    NDJSON stream of assessments, with a risk level histogram and top
+    hazards summary. Input and output are spooled to disk and the result is
+    streamed back in chunks. DOCX memory does not grow with the batch size;
+    a PDF is laid out in memory, so PDF batches of more than
+    BULK_PDF_MAX_ASSESSMENTS are rejected with 422.
+    """
+    require_report_format(format)
+
+    input_path = await spool_request_to_file(request, settings.SPOOL_DIR, suffix=".json")
+    fd, output_path = tempfile.mkstemp(dir=settings.SPOOL_DIR, suffix=f".{format}")
+    os.close(fd)
+    try:
+        count, seconds = await services.report_renderer.render_bulk(
+            format, input_path, output_path, settings.BATCH_MAX_RECORD_BYTES, timeout=settings.BULK_RENDER_TIMEOUT
+        )
+        services.metrics.record(f"render_bulk_{format}", seconds)
+    except QueueFullError:
+        os.unlink(output_path)
+        raise HTTPException(
+            status_code=503,
+            detail="Report renderer is busy",
+            headers={"Retry-After": str(services.report_renderer.retry_after())}
+        )
+    except asyncio.TimeoutError:
+        os.unlink(output_path)
+        raise HTTPException(status_code=504, detail="Report rendering timed out")
+    except BulkReportError as e:
+        os.unlink(output_path)
+        raise HTTPException(status_code=422, detail=str(e))
+    finally:
+        os.unlink(input_path)
+
+    return FileResponse(
+        output_path,
+        media_type=REPORT_MEDIA_TYPES[format],
+        filename=f"safety_audit_report.{format}",
+        headers={"X-Assessment-Count": str(count), "X-Render-Time": f"{seconds * 1000:.1f}ms"},
+        background=BackgroundTask(os.unlink, output_path)
     )
 
-@app.post("/transcribe")
-async def transcribe_audio(audio: UploadFile = File(...)):
+def report_job_status(job: dict) -> dict:
+    status = dict(job)
+    status["status_url"] = f"/report/jobs/{job['id']}"
+    status["download_url"] = f"/report/jobs/{job['id']}/download" if job["status"] == DONE else None
+    return status
+
+def report_job_accepted(job: dict) -> JSONResponse:
+    return JSONResponse(report_job_status(job), status_code=202, headers={"Location": f"/report/jobs/{job['id']}"})
+
+def report_jobs_busy(services: Services) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Report job queue is full",
+        headers={"Retry-After": str(services.report_jobs.retry_after())}
+    )
+
+@router.post("/report/jobs", status_code=202)
+async def submit_report_job(assessment: AssessmentResponse, format: str = "pdf", services: Services = Depends(get_services)):
+    """
+    Queues a report (format=pdf|docx) for one assessment and returns the
+    job at once. Poll GET /report/jobs/{id}, then download the file.
+    Single-assessment jobs run ahead of bulk ones.
+    """
+    require_report_format(format)
+    try:
+        job = await services.report_jobs.submit(SINGLE, format, assessment.dict())
+    except QueueFullError:
+        raise report_jobs_busy(services)
+    return report_job_accepted(job)
+
+@router.post("/report/jobs/bulk", status_code=202)
+async def submit_bulk_report_job(request: Request, format: str = "pdf", services: Services = Depends(get_services)):
+    """
+    Queues a consolidated report, like /report/bulk, for a JSON array or
+    NDJSON stream of assessments spooled to disk.
     """
-    Simulates speech-to-text transcription.
+    require_report_format(format)
+    try:
+        services.report_jobs.check_capacity()
+    except QueueFullError:
+        raise report_jobs_busy(services)
+    input_path = await spool_request_to_file(request, services.report_jobs.directory, suffix=".json")
+    try:
+        job = await services.report_jobs.submit(BULK, format, input_path)
+    except QueueFullError:
+        os.unlink(input_path)
+        raise report_jobs_busy(services)
+    return report_job_accepted(job)
+
+@router.get("/report/jobs/{job_id}")
+async def get_report_job(job_id: str, services: Services = Depends(get_services)):
+    """
+    Status of a report job: queued, running, done or failed (with an error).
+    Answered by any worker on the node.
+    """
+    job = await run_in_threadpool(services.report_jobs.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Report job not found or expired")
+    return report_job_status(job)
+
+@router.get("/report/jobs/{job_id}/download")
+async def download_report_job(job_id: str, services: Services = Depends(get_services)):
+    """
+    Streams the finished report from the spool; 409 until the job is done.
+    """
+    job = await run_in_threadpool(services.report_jobs.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Report job not found or expired")
+    if job["status"] != DONE:
+        raise HTTPException(status_code=409, detail=job["error"] or f"Report job is {job['status']}")
+    path = services.report_jobs.output_path(job)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Report job not found or expired")
+    name = "safety_report" if job["kind"] == SINGLE else "safety_audit_report"
+    return FileResponse(
+        path,
+        media_type=REPORT_MEDIA_TYPES[job["format"]],
+        filename=f"{name}.{job['format']}",
+        headers={"X-Render-Time": f"{(job['render_seconds'] or 0) * 1000:.1f}ms"}
+    )
+
+@router.post("/transcribe")
+async def transcribe_audio(audio: UploadFile = File(...), services: Services = Depends(get_services)):
+    """
+    Speech-to-text transcription through the configured backend,
+    run on the bounded transcription pool.
     """
-    import time
     print(f"--- Transcription Request Received ---")
     print(f"File: {audio.filename}, Content-Type: {audio.content_type}")
-    
-    time.sleep(1) # Simulate processing
-    
-    # Generic default text
-    text = "Activity involving heavy machinery and potential electrical hazards in a damp environment."
-    
-    filename = audio.filename.lower() if audio.filename else ""
-    
-    # Mock logic based on keywords in filename
-    if "weld" in filename:
-        text = "Welding steel beams in a confined space with poor ventilation and spark risks."
-    elif "height" in filename:
-        text = "Working at height on unstable scaffolding during high winds."
-    elif "chemical" in filename:
-        text = "Handling hazardous chemicals without proper PPE and ventilation."
-    
+
+    data = await audio.read()
+    try:
+        text = await services.transcription_pool.run(
+            services.transcription_backend.transcribe, data, audio.filename or "", audio.content_type
+        )
+    except QueueFullError:
+        raise HTTPException(status_code=503, detail="Transcription queue is full", headers={"Retry-After": "1"})
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Transcription timed out")
+
     print(f"Transcribed Text: {text}")
     print(f"--- End Transcription ---")
     
     return {"text": text}
 
+def stream_event(event: str, result: Assessment) -> str:
+    # {"event": ..., <AssessmentResponse fields>}
+    return f'{{"event":"{event}",' + encode_assessment(result)[1:].decode("utf-8")
+
+@router.websocket("/assess/stream")
+async def assess_stream(
+    websocket: WebSocket,
+    filename: str = "",
+    content_type: Optional[str] = None,
+    services: Services = Depends(get_services)
+):
+    """
+    Live voice assessment. The client sends the recording as binary messages
+    while it is being made, then the text message "end". Each chunk goes to
+    the streaming transcription backend and new transcript text is assessed
+    incrementally, so hazards are known before the recording ends. Replies:
+    {"event": "transcript", "text": ...} with each piece of new text,
+    {"event": "assessment", ...} whenever the hazards or risk level change,
+    and {"event": "final", ...} for the whole transcript before closing.
+    Sessions take a slot in the upload admission lane while they last.
+    """
+    await websocket.accept()
+    lane = services.admission.lanes[UPLOAD] if settings.ADMISSION_ENABLED else None
+    if lane is not None:
+        try:
+            await services.admission.acquire(lane)
+        except (QueueFullError, asyncio.TimeoutError):
+            await websocket.close(code=1013, reason="Too many upload requests")
+            return
+    transcription = services.transcription_backend.open_stream(filename, content_type)
+    assessment = services.assessment_cache.pipeline.stream()
+    pool = services.transcription_stream_pool
+    last_state = None
+    received = 0
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            chunk = message.get("bytes")
+            finished = chunk is None and message.get("text") == "end"
+            if chunk is None and not finished:
+                await websocket.close(code=1003, reason='Send audio as binary messages, then "end"')
+                return
+            if chunk is not None:
+                if len(chunk) > settings.TRANSCRIPTION_STREAM_MAX_CHUNK:
+                    await websocket.close(code=1009, reason="Audio chunk too large")
+                    return
+                received += len(chunk)
+                if received > settings.TRANSCRIPTION_STREAM_MAX_BYTES:
+                    if lane is not None:
+                        lane.too_large += 1
+                    await websocket.close(code=1009, reason="Recording too large")
+                    return
 
+            text = await pool.run(transcription.finish) if finished else await pool.run(transcription.feed, chunk)
+            if text:
+                await websocket.send_text(dumps({"event": "transcript", "text": text}).decode("utf-8"))
+            if not (text or finished):
+                continue
+            with services.metrics.stage("assess_stream"):
+                result = assessment.feed(text)
+            if finished:
+                await websocket.send_text(stream_event("final", result))
+                await websocket.close()
+                return
+            state = (frozenset(result.hazards), result.risk_level)
+            if state != last_state:
+                last_state = state
+                await websocket.send_text(stream_event("assessment", result))
+    except QueueFullError:
+        await websocket.close(code=1013, reason="Transcription queue is full")
+    except asyncio.TimeoutError:
+        await websocket.close(code=1011, reason="Transcription timed out")
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if lane is not None:
+            services.admission.release(lane)
 
-@app.post("/assess", response_model=AssessmentResponse)
+
+
+@router.post("/assess", response_model=AssessmentResponse)
 async def assess_safety(
     text: str = Form(default=""),
     image: Optional[UploadFile] = File(default=None),
-    audio: Optional[UploadFile] = File(default=None)
+    audio: Optional[UploadFile] = File(default=None),
+    services: Services = Depends(get_services)
 ):
     """
     Main assessment endpoint.
     Orchestrates: Input -> Hazard ID -> Risk Calc -> Control Selection -> Response
     Addresses UAT feedback: Improved NLP, Better Vision simulation, Granular Confidence.
     """
-    
-    # 1. Vision AI Simulation (Improved for UAT)
+    services.metrics.request_parsed("upload")
+
+    # 1. Vision tagging (filename simulation unless VISION_TAGGER is set)
     image_tags = []
     vision_confidence_boost = 0
     if image:
         print(f"--- Vision Analysis: {image.filename} ---")
-        fname = image.filename.lower()
-        # Mocking multi-hazard detection for specific scenarios
-        if any(w in fname for w in ["fire", "weld", "spark"]):
-            image_tags.extend(["Fire", "Smoke", "Sparks", "High Temperature"])
-            vision_confidence_boost = 30
-        elif any(w in fname for w in ["height", "scaffold", "ladder"]):
-            image_tags.extend(["Height", "Open Edge", "Unstable Platform", "Fall Potential"])
-            vision_confidence_boost = 25
-        elif any(w in fname for w in ["chemical", "acid", "leak", "drum"]):
-            image_tags.extend(["Chemical Spill", "Toxic Fumes", "Corrosive Material"])
-            vision_confidence_boost = 20
-        elif any(w in fname for w in ["clutter", "messy", "dirt", "construction"]):
-            image_tags.extend(["Tripping Hazard", "Obstruction", "Poor Housekeeping"])
-            vision_confidence_boost = 15
-        elif "dark" in fname or "blur" in fname:
-            # Simulate low quality image
-            image_tags.extend(["Low Visibility", "Unclear Environment"])
-            vision_confidence_boost = -10 # Low quality reduces overall confidence
-        else:
-            # Randomly pick some generic site tags if generic image
-            image_tags.extend(["Site environment", "General workspace"])
-            vision_confidence_boost = 5
+        try:
+            with services.metrics.stage("vision"):
+                image_tags, vision_confidence_boost = await services.image_tagger.tag(
+                    image.file, image.filename or "", image.content_type
+                )
+        except QueueFullError:
+            raise HTTPException(status_code=503, detail="Vision queue is full", headers={"Retry-After": "1"})
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail="Vision analysis timed out")
         print(f"Detected Tags: {image_tags}")
-    
-    # 2. Hazard Identification & Normalization
-    safe_text = text or ""
-    # Process through the new engine
-    hazard_analysis = hazard_engine.identify_hazards(safe_text, image_tags)
-    
-    hazards = hazard_analysis["hazards"]
-    confidence_level = hazard_analysis["confidence_level"]
-    # Final confidence score combines text analysis + vision boost
-    confidence_score = min(99, hazard_analysis["confidence_score"] + vision_confidence_boost)
-
-    # Audio fallback handling (if audio provided but not yet transcribed)
-    if audio and not safe_text:
-        hazards.append("Pending Voice Transcription Analysis")
-        confidence_level = "Low"
-        confidence_score = 30
-    
-    if not hazards:
-        hazards = ["Unspecified Hazard (Further investigation required)"]
-        confidence_level = "Low"
-        confidence_score = 20
-
-    # 3. Risk Analysis
-    likelihood = 3
-    severity = 3
-    
-    # Dynamic severity based on keywords
-    if any(k in hazard_analysis["normalized_text"] for k in ["fatal", "death", "high voltage", "explosion", "crush"]):
-        severity = 5
-    elif any(k in hazard_analysis["normalized_text"] for k in ["cut", "bruise", "slip", "minor"]):
-        likelihood = 4
-        severity = 2
-    
-    risk_result = risk_engine.calculate_risk(
-        likelihood=likelihood, 
-        severity=severity, 
-        missing_controls=False,
-        fatal_potential=(severity == 5),
-        unclear_info=(confidence_level == "Low")
-    )
 
-    # 4. Control Selection
-    all_controls = []
-    for hazard in hazards:
-        controls = control_engine.select_controls(hazard, risk_result["level"])
-        for c in controls:
-            if c not in all_controls:
-                all_controls.append(ControlItem(type=c["type"], description=c["description"]))
-
-    return AssessmentResponse(
-        risk_score=risk_result["score"],
-        risk_level=risk_result["level"],
-        hazards=hazards,
-        controls=all_controls,
-        confidence=confidence_level,
-        confidence_score=confidence_score,
-        reasoning=hazard_analysis.get("reasoning"),
-        description=hazard_analysis["normalized_text"]
+    # 2. Hazard ID -> Risk Calc -> Control Selection
+    result = services.assessment_cache.run(
+        text=text,
+        image_tags=image_tags,
+        vision_confidence_boost=vision_confidence_boost,
+        has_audio=audio is not None
     )
 
-@app.get("/")
+    # 3. Serialized here rather than by FastAPI so the stage can be timed
+    with services.metrics.stage("serialize"):
+        content = encode_assessment(result)
+    return Response(content=content, media_type="application/json")
+
+@router.post("/assess/batch")
+async def assess_batch(request: Request, services: Services = Depends(get_services)):
+    """
+    Bulk assessment. Accepts a JSON array or an NDJSON stream of
+    {"text": ..., "image_tags": [...]} records and streams one
+    AssessmentResponse per line back, in input order. A record that fails
+    validation, or an NDJSON line that is not JSON, yields
+    {"index": n, "error": ...} in its place and the batch goes on; only
+    broken array framing or an oversized record ends it early.
+    """
+    body = await spool_request_body(request, settings.BATCH_SPOOL_MEMORY)
+    records = enumerate(iter_json_records(body, settings.BATCH_MAX_RECORD_BYTES, skip_invalid_lines=True))
+
+    def assess_chunk() -> Tuple[List[bytes], bool]:
+        """Runs the next BATCH_CHUNK_SIZE records; returns (lines, finished)."""
+        lines = []
+        index = -1
+        try:
+            for index, record in records:
+                try:
+                    if isinstance(record, InvalidLine):
+                        raise ValueError(record.error)
+                    if not isinstance(record, dict):
+                        raise ValueError("record must be a JSON object")
+                    item = BatchAssessmentItem(**record)
+                    result = services.assessment_cache.run(text=item.text, image_tags=item.image_tags)
+                    with services.metrics.stage("serialize"):
+                        lines.append(encode_assessment(result) + b"\n")
+                except (ValueError, ValidationError) as e:
+                    lines.append(dumps({"index": index, "error": str(e)}) + b"\n")
+                if len(lines) >= settings.BATCH_CHUNK_SIZE:
+                    return lines, False
+        except ValueError as e:
+            # Malformed stream: report where it broke and stop
+            lines.append(dumps({"index": index + 1, "error": str(e)}) + b"\n")
+        return lines, True
+
+    async def stream_results():
+        try:
+            finished = False
+            while not finished:
+                lines, finished = await run_in_threadpool(assess_chunk)
+                if lines:
+                    yield b"".join(lines)
+        finally:
+            body.close()
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+@router.get("/metrics")
+def read_metrics(services: Services = Depends(get_services)):
+    """
+    Prometheus metrics: per-stage latency histograms, request counters and
+    cache / worker pool statistics.
+    """
+    if not services.metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(services.metrics.expose(), media_type="text/plain; version=0.0.4")
+
+def require_admin(token: Optional[str]):
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled")
+    if not token or not hmac.compare_digest(token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@router.get("/admin/knowledge-base")
+def knowledge_base_status(
+    x_admin_token: Optional[str] = Header(default=None), services: Services = Depends(get_services)
+):
+    """
+    Version and contents summary of the live knowledge base snapshot.
+    """
+    require_admin(x_admin_token)
+    return services.knowledge_base.status()
+
+@router.get("/admin/admission")
+def admission_status(
+    x_admin_token: Optional[str] = Header(default=None), services: Services = Depends(get_services)
+):
+    """
+    Running, queued and rejected requests per admission lane.
+    """
+    require_admin(x_admin_token)
+    return services.admission.stats()
+
+@router.post("/admin/knowledge-base/reload")
+async def reload_knowledge_base(
+    x_admin_token: Optional[str] = Header(default=None), services: Services = Depends(get_services)
+):
+    """
+    Recompiles the knowledge base directory and swaps the new snapshot in
+    without pausing in-flight requests. Only reloads this worker; use
+    KNOWLEDGE_BASE_WATCH_INTERVAL to keep every worker in sync.
+    """
+    require_admin(x_admin_token)
+    try:
+        return await run_in_threadpool(services.knowledge_base.load)
+    except (OSError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=f"Knowledge base not reloaded: {e}")
+
+@router.get("/")
 def read_root():
     return {"status": "Safety System Backend Running"}
+
+def create_app(services: Optional[Services] = None) -> FastAPI:
+    """
+    Builds the API. Engines, pools and caches are created lazily by
+    `services` on first use, or up front when STARTUP_WARMUP is set.
+    """
+    if services is None:
+        startup = StartupReport(started=_import_started)
+        startup.record("import modules", time.perf_counter() - _import_started)
+        services = Services(startup)
+
+    app = FastAPI(lifespan=lifespan)
+    app.state.services = services
+
+    if settings.ADMISSION_ENABLED:
+        # Inside the metrics middleware, so rejections are counted too
+        app.add_middleware(AdmissionMiddleware, controller=services.admission)
+    if services.metrics.enabled:
+        app.add_middleware(MetricsMiddleware, metrics=services.metrics)
+
+    # Enable CORS for frontend - Move to top for best practice
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"], # In production, replace with specific origins
+        allow_credentials=False, # Credentials cannot be True when allow_origins is ["*"]
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    app.include_router(router)
+    return app
+
+app = create_app()
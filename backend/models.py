@@ -1,5 +1,7 @@
 from pydantic import BaseModel
-from typing import List, Dict, Optional
+from typing import List, Dict, NamedTuple, Optional, Tuple
+
+from logic.control_engine import ControlRecord
 
 class ControlItem(BaseModel):
     type: str # Hierarchy level
@@ -15,3 +17,35 @@ class AssessmentResponse(BaseModel):
     reasoning: Optional[str] = None
     description: Optional[str] = None
     # hira_table: List[Dict] # Can be added for detailed table view
+
+class Assessment(NamedTuple):
+    """
+    Internal result of AssessmentPipeline.run, with the same fields as
+    AssessmentResponse. Immutable, so cached results can be shared, and the
+    controls are the engine's own records rather than per-request copies.
+    Serialized by serialization.encode_assessment without going through Pydantic.
+    """
+    risk_score: int
+    risk_level: str
+    hazards: Tuple[str, ...]
+    controls: Tuple[ControlRecord, ...]
+    confidence: str
+    confidence_score: int
+    reasoning: Optional[str] = None
+    description: Optional[str] = None
+
+    def to_response(self) -> AssessmentResponse:
+        return AssessmentResponse(
+            risk_score=self.risk_score,
+            risk_level=self.risk_level,
+            hazards=list(self.hazards),
+            controls=[ControlItem(type=c.type, description=c.description) for c in self.controls],
+            confidence=self.confidence,
+            confidence_score=self.confidence_score,
+            reasoning=self.reasoning,
+            description=self.description
+        )
+
+class BatchAssessmentItem(BaseModel):
+    text: str = ""
+    image_tags: List[str] = []
@@ -0,0 +1,151 @@
+from typing import List, Optional, Tuple
+
+from logic.fingerprint import fingerprint
+from logic.control_engine import ControlRecord
+from logic.hazard_engine import HazardAnalysis
+from models import Assessment
+
+
+# Bump whenever the rules in AssessmentPipeline.run change
+PIPELINE_VERSION = "1"
+
+
+class AssessmentPipeline:
+    """
+    Hazard ID -> Risk Calc -> Control Selection -> Response.
+    Pure computation over the engines: no I/O, no logging, no shared state is
+    mutated, so it can be reused by /assess, /assess/batch and worker threads.
+    """
+
+    def __init__(self, hazard_engine, risk_engine, control_engine):
+        self.hazard_engine = hazard_engine
+        self.risk_engine = risk_engine
+        self.control_engine = control_engine
+        # Fingerprint of the pipeline and all engine rules / knowledge bases,
+        # read by the result cache on every lookup. Computed once: engines are
+        # not changed in place, a knowledge base reload builds a new pipeline.
+        self.version = fingerprint(
+            PIPELINE_VERSION,
+            hazard_engine.version,
+            risk_engine.version,
+            control_engine.version
+        )
+
+    def write_snapshot(self, writer):
+        """
+        Adds the compiled knowledge base tables of the hazard and control
+        engines to a snapshot (see logic.kb_snapshot.SnapshotWriter).
+        """
+        self.hazard_engine.write_snapshot(writer)
+        self.control_engine.write_snapshot(writer)
+
+    def _select_controls(self, hazards: Tuple[str, ...], risk_level: str) -> Tuple[ControlRecord, ...]:
+        """
+        Controls for every hazard, deduplicated, in first-seen order.
+        """
+        all_controls = []
+        seen_control_ids = set()
+        for hazard in hazards:
+            for c in self.control_engine.select_controls(hazard, risk_level):
+                if c.id not in seen_control_ids:
+                    seen_control_ids.add(c.id)
+                    all_controls.append(c)
+        return tuple(all_controls)
+
+    def run(
+        self,
+        text: str = "",
+        image_tags: Optional[List[str]] = None,
+        vision_confidence_boost: int = 0,
+        has_audio: bool = False
+    ) -> Assessment:
+        image_tags = image_tags or []
+
+        # 1. Hazard Identification & Normalization
+        safe_text = text or ""
+        hazard_analysis = self.hazard_engine.identify_hazards(safe_text, image_tags)
+        return self.assess(hazard_analysis, bool(safe_text), vision_confidence_boost, has_audio)
+
+    def stream(self, image_tags: Optional[List[str]] = None, vision_confidence_boost: int = 0) -> "StreamingAssessment":
+        """
+        An assessment of text that arrives in pieces, e.g. a live transcript.
+        """
+        return StreamingAssessment(self, image_tags or [], vision_confidence_boost)
+
+    def assess(
+        self,
+        hazard_analysis: HazardAnalysis,
+        has_text: bool,
+        vision_confidence_boost: int = 0,
+        has_audio: bool = False
+    ) -> Assessment:
+        """
+        Risk Calc -> Control Selection -> Response for an identify_hazards result.
+        """
+        hazards = hazard_analysis.hazards
+        confidence_level = hazard_analysis.confidence_level
+        # Final confidence score combines text analysis + vision boost
+        confidence_score = min(99, hazard_analysis.confidence_score + vision_confidence_boost)
+
+        # Audio fallback handling (if audio provided but not yet transcribed)
+        if has_audio and not has_text:
+            hazards += ("Pending Voice Transcription Analysis",)
+            confidence_level = "Low"
+            confidence_score = 30
+
+        if not hazards:
+            hazards = ("Unspecified Hazard (Further investigation required)",)
+            confidence_level = "Low"
+            confidence_score = 20
+
+        # 2. Risk Analysis
+        likelihood = 3
+        severity = 3
+
+        # Dynamic severity based on keywords
+        if any(k in hazard_analysis.normalized_text for k in ["fatal", "death", "high voltage", "explosion", "crush"]):
+            severity = 5
+        elif any(k in hazard_analysis.normalized_text for k in ["cut", "bruise", "slip", "minor"]):
+            likelihood = 4
+            severity = 2
+
+        risk_result = self.risk_engine.calculate_risk(
+            likelihood=likelihood,
+            severity=severity,
+            missing_controls=False,
+            fatal_potential=(severity == 5),
+            unclear_info=(confidence_level == "Low")
+        )
+
+        # 3. Control Selection
+        all_controls = self._select_controls(hazards, risk_result["level"])
+
+        return Assessment(
+            risk_score=risk_result["score"],
+            risk_level=risk_result["level"],
+            hazards=hazards,
+            controls=all_controls,
+            confidence=confidence_level,
+            confidence_score=confidence_score,
+            reasoning=hazard_analysis.reasoning,
+            description=hazard_analysis.normalized_text
+        )
+
+
+class StreamingAssessment:
+    """
+    Assesses text that keeps growing: feed() appends a piece and returns the
+    assessment of all the text so far, the same as AssessmentPipeline.run on
+    the whole text, while only rescanning the new piece (see
+    HazardEngine.incremental). Keeps the pipeline it was created with, so a
+    knowledge base swap never changes the rules mid-stream.
+    """
+
+    def __init__(self, pipeline: AssessmentPipeline, image_tags: List[str], vision_confidence_boost: int = 0):
+        self.pipeline = pipeline
+        self.vision_confidence_boost = vision_confidence_boost
+        self._scan = pipeline.hazard_engine.incremental(image_tags)
+
+    def feed(self, text: str) -> Assessment:
+        hazard_analysis = self._scan.feed(text)
+        return self.pipeline.assess(hazard_analysis, self._scan.has_text, self.vision_confidence_boost)
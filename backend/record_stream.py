@@ -0,0 +1,144 @@
+import codecs
+import json
+import os
+import tempfile
+from typing import Any, BinaryIO, Iterator, NamedTuple
+
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+
+async def spool_request_body(request: Request, max_memory: int) -> BinaryIO:
+    """
+    Copies the request body into a temp file that stays in memory up to
+    max_memory bytes and spills to disk beyond that. Returned rewound.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=max_memory)
+    async for chunk in request.stream():
+        spool.write(chunk)
+    spool.seek(0)
+    return spool
+
+
+async def spool_request_to_file(request: Request, directory: str, suffix: str = "") -> str:
+    """
+    Streams the request body into a new file under directory and returns its
+    path, for work handed to another process. The caller owns the file.
+    """
+    fd, path = tempfile.mkstemp(dir=directory, suffix=suffix)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            async for chunk in request.stream():
+                await run_in_threadpool(f.write, chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path
+
+
+class InvalidLine(NamedTuple):
+    """Stands in for an NDJSON line that is not valid JSON (see iter_json_records)."""
+    line: int # 1-based line number
+    error: str
+
+
+def iter_json_records(
+    stream: BinaryIO, max_record_bytes: int, chunk_size: int = 64 * 1024, skip_invalid_lines: bool = False
+) -> Iterator[Any]:
+    """
+    Lazily yields the records of either a JSON array or an NDJSON document,
+    reading the stream in chunks so memory is bounded by the largest record.
+    Raises ValueError on malformed input or an oversized record. With
+    skip_invalid_lines, an NDJSON line that is not valid JSON yields an
+    InvalidLine in its place and reading goes on with the next line; broken
+    array framing and oversized records still raise.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def fill() -> bool:
+        nonlocal buffer, pos, eof
+        if eof:
+            return False
+        if len(buffer) - pos > max_record_bytes:
+            raise ValueError(f"Record exceeds {max_record_bytes} bytes")
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            eof = True
+            buffer = buffer[pos:] + utf8.decode(b"", final=True)
+        else:
+            buffer = buffer[pos:] + utf8.decode(chunk)
+        pos = 0
+        return True
+
+    def skip_whitespace() -> bool:
+        """Advances pos to the next non-blank character; False at end of input."""
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buffer):
+                return True
+            if not fill():
+                return False
+
+    if not skip_whitespace():
+        return
+
+    if buffer[pos] != "[":
+        # NDJSON: one record per line
+        line_number = 0
+        while True:
+            newline = buffer.find("\n", pos)
+            if newline < 0:
+                if fill():
+                    continue
+                newline = len(buffer)
+            line = buffer[pos:newline].strip()
+            pos = newline + 1
+            line_number += 1
+            if line:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    if not skip_invalid_lines:
+                        raise ValueError(f"Invalid NDJSON line {line_number}: {e}") from None
+                    record = InvalidLine(line_number, f"Invalid NDJSON line {line_number}: {e}")
+                yield record
+            if eof and pos >= len(buffer):
+                return
+
+    # JSON array
+    pos += 1
+    first = True
+    while True:
+        if not skip_whitespace():
+            raise ValueError("Unterminated JSON array")
+        if buffer[pos] == "]":
+            pos += 1
+            if skip_whitespace():
+                raise ValueError("Unexpected data after JSON array")
+            return
+        if not first:
+            if buffer[pos] != ",":
+                raise ValueError(f"Expected ',' between array items, got {buffer[pos]!r}")
+            pos += 1
+            if not skip_whitespace():
+                raise ValueError("Unterminated JSON array")
+        while True:
+            try:
+                record, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                if fill():
+                    continue
+                raise ValueError(f"Invalid JSON array item: {e}") from None
+            # A value ending exactly at the buffer edge may continue in the next chunk
+            if end == len(buffer) and fill():
+                continue
+            break
+        pos = end
+        first = False
+        yield record
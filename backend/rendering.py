@@ -0,0 +1,122 @@
+import asyncio
+import math
+import time
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from concurrency import BoundedExecutor
+from models import AssessmentResponse
+from record_stream import iter_json_records
+from logic.document_engine import render_report, warm_up_worker, worker_engine
+
+
+class BulkReportError(ValueError):
+    """Invalid input for a consolidated report; raised inside pool workers."""
+
+
+def _validated(records: Iterable) -> Iterator[dict]:
+    index = -1
+    try:
+        for index, record in enumerate(records):
+            if not isinstance(record, dict):
+                raise ValueError("record must be a JSON object")
+            yield AssessmentResponse(**record).dict()
+    except ValueError as e:
+        # Re-raised as a plain message: pydantic errors do not pickle across processes
+        raise BulkReportError(f"Assessment {index + 1}: {e}") from None
+
+
+def _at_most(records: Iterable[dict], limit: int, fmt: str) -> Iterator[dict]:
+    for index, record in enumerate(records):
+        if index == limit:
+            raise BulkReportError(f"{fmt.upper()} reports cover at most {limit} assessments; split the batch or use DOCX")
+        yield record
+
+
+def render_bulk_report(
+    fmt: str, input_path: str, output_path: str, max_record_bytes: int, max_pdf_assessments: int = 0
+) -> Tuple[int, float]:
+    """
+    Render pool entry point for consolidated reports. Streams assessments
+    (JSON array or NDJSON) from input_path into a report at output_path.
+    Returns the number of assessments and the render time in seconds.
+    A PDF holds all its pages in memory until it is written, so PDFs of
+    more than max_pdf_assessments (0: no limit) raise BulkReportError.
+    """
+    start = time.perf_counter()
+    with open(input_path, "rb") as source, open(output_path, "wb") as out:
+        records = _validated(iter_json_records(source, max_record_bytes))
+        if fmt == "pdf" and max_pdf_assessments:
+            records = _at_most(records, max_pdf_assessments, fmt)
+        summary = worker_engine().generate_bulk(fmt, records, out)
+    return summary.count, time.perf_counter() - start
+
+
+class ReportRenderer:
+    """
+    Renders DOCX/PDF reports on a bounded worker pool so CPU-heavy document
+    builds never run on the event loop. Tracks per-render timings, which also
+    drive the Retry-After hint handed out when the queue is full.
+    """
+
+    def __init__(self, pool: BoundedExecutor, workers: int, max_pdf_assessments: int = 0):
+        self.pool = pool
+        self.workers = workers
+        self.max_pdf_assessments = max_pdf_assessments
+        self.renders: Dict[str, int] = {}
+        self.render_seconds: Dict[str, float] = {}
+        self.average_seconds = 0.5 # EWMA over all formats, seeded with a guess
+
+    async def warm_up(self) -> int:
+        """
+        Starts every worker and pre-imports/pre-renders in each of them.
+        Returns the number of distinct worker processes/threads warmed.
+        """
+        loop = asyncio.get_running_loop()
+        pids = await asyncio.gather(*[
+            loop.run_in_executor(self.pool.executor, warm_up_worker) for _ in range(self.workers)
+        ])
+        return len(set(pids))
+
+    async def render(self, fmt: str, assessment_data: dict) -> Tuple[bytes, float]:
+        """
+        Returns (file bytes, render seconds). Raises QueueFullError when the
+        pool is saturated and asyncio.TimeoutError past the render timeout.
+        """
+        content, seconds = await self.pool.run(render_report, fmt, assessment_data)
+        self.renders[fmt] = self.renders.get(fmt, 0) + 1
+        self.render_seconds[fmt] = self.render_seconds.get(fmt, 0.0) + seconds
+        self.average_seconds = 0.8 * self.average_seconds + 0.2 * seconds
+        return content, seconds
+
+    async def render_bulk(
+        self, fmt: str, input_path: str, output_path: str, max_record_bytes: int, timeout: Optional[float] = None
+    ) -> Tuple[int, float]:
+        """
+        Renders a consolidated report file on the pool; see render_bulk_report.
+        """
+        count, seconds = await self.pool.run(
+            render_bulk_report, fmt, input_path, output_path, max_record_bytes, self.max_pdf_assessments,
+            timeout=timeout
+        )
+        key = f"bulk_{fmt}"
+        self.renders[key] = self.renders.get(key, 0) + 1
+        self.render_seconds[key] = self.render_seconds.get(key, 0.0) + seconds
+        return count, seconds
+
+    def retry_after(self) -> int:
+        """
+        Seconds until the current backlog should have drained.
+        """
+        backlog = self.pool.running + self.pool.queued
+        return max(1, math.ceil(self.average_seconds * backlog / max(1, self.workers)))
+
+    def stats(self) -> Dict:
+        return {
+            **self.pool.stats(),
+            "renders": dict(self.renders),
+            "render_seconds": dict(self.render_seconds),
+            "average_seconds": self.average_seconds
+        }
+
+    def shutdown(self, wait: bool = True):
+        self.pool.shutdown(wait=wait)
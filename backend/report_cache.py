@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Dict, Optional
+
+from caching import LRUCache
+from logic.document_engine import TEMPLATE_VERSION
+
+
+def report_key(fmt: str, assessment_data: dict) -> str:
+    """
+    Stable content hash of a report: canonical JSON of the assessment plus
+    the output format and the template version.
+    """
+    canonical = json.dumps(assessment_data, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    digest = hashlib.sha256()
+    digest.update(f"{fmt}\0{TEMPLATE_VERSION}\0".encode("utf-8"))
+    digest.update(canonical.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ReportCache:
+    """
+    Content-addressed store of rendered reports: an in-memory LRU with a
+    byte budget, optionally backed by an on-disk spool directory that
+    survives restarts and is shared by all workers on the node.
+    Disk methods block and should be called off the event loop.
+
+    The spool is kept under max_disk_bytes by deleting the least recently
+    used files, by modification time, which disk hits refresh. Each worker
+    counts what it writes and rescans the directory once that count
+    crosses the budget, so the limit holds approximately, across workers.
+    """
+
+    # Pruning goes down to this share of the budget, so it runs rarely
+    LOW_WATER = 0.9
+
+    def __init__(self, max_bytes: int, spool_dir: Optional[str] = None, max_disk_bytes: int = 0):
+        self.memory = LRUCache(max_bytes)
+        self.spool_dir = spool_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.disk_hits = 0
+        self.disk_evictions = 0
+        self._disk_bytes: Optional[int] = None # estimate; None until the first scan
+        if spool_dir:
+            os.makedirs(spool_dir, exist_ok=True)
+
+    def _path(self, key: str, fmt: str) -> str:
+        return os.path.join(self.spool_dir, f"{key}.{fmt}")
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.memory.get(key)
+
+    def get_from_disk(self, key: str, fmt: str) -> Optional[bytes]:
+        if not self.spool_dir:
+            return None
+        try:
+            with open(self._path(key, fmt), "rb") as f:
+                content = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(self._path(key, fmt)) # recently used: pruned last
+        except OSError:
+            pass
+        self.disk_hits += 1
+        self.memory.put(key, content, len(content))
+        return content
+
+    def put(self, key: str, content: bytes):
+        self.memory.put(key, content, len(content))
+
+    def write_to_disk(self, key: str, fmt: str, content: bytes):
+        if not self.spool_dir:
+            return
+        # Write-then-rename so concurrent readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.spool_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, self._path(key, fmt))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        if self.max_disk_bytes:
+            if self._disk_bytes is None:
+                self.prune_disk()
+            else:
+                self._disk_bytes += len(content)
+                if self._disk_bytes > self.max_disk_bytes:
+                    self.prune_disk()
+
+    def prune_disk(self) -> int:
+        """
+        Deletes the least recently used spool files until the directory is
+        under LOW_WATER of max_disk_bytes, plus temp files abandoned by
+        crashed writers. Returns the number of files deleted.
+        """
+        files = []
+        stale = time.time() - 3600
+        with os.scandir(self.spool_dir) as it:
+            for entry in it:
+                try:
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue # deleted by another worker
+                if entry.name.endswith(".tmp"):
+                    if stat.st_mtime < stale:
+                        # Sorted first and deleted whatever the total
+                        files.append((0.0, stat.st_size, entry.path))
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        target = self.max_disk_bytes * self.LOW_WATER
+        deleted = 0
+        files.sort()
+        for mtime, size, path in files:
+            if total <= target and mtime:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            deleted += 1
+        self.disk_evictions += deleted
+        self._disk_bytes = total
+        return deleted
+
+    def stats(self) -> Dict[str, int]:
+        return {**self.memory.stats(), "disk_hits": self.disk_hits, "disk_evictions": self.disk_evictions}
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Weak comparison of an If-None-Match header against a quoted ETag.
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
@@ -0,0 +1,308 @@
+import asyncio
+import itertools
+import json
+import os
+import re
+import tempfile
+import time
+import uuid
+from typing import Callable, Dict, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from concurrency import QueueFullError
+from rendering import BulkReportError, ReportRenderer
+from report_cache import ReportCache, report_key
+
+JOB_ID = re.compile(r"[0-9a-f]{32}")
+
+SINGLE = "single"
+BULK = "bulk"
+# Lower runs first: one-assessment reports are quick, so they never wait
+# behind a consolidated audit report
+PRIORITIES = {SINGLE: 0, BULK: 1}
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class ReportJobQueue:
+    """
+    Asynchronous report rendering. submit() records a job and returns at
+    once; `concurrency` job workers on the event loop take jobs in priority
+    order (single assessments before bulk reports, then first come first
+    served) and render them on the ReportRenderer pool, which interactive
+    /report calls share.
+
+    Everything about a job lives in `directory`: <id>.json holds its status
+    and <id>.<format> the finished report, so any worker on the node can
+    answer status and download requests for jobs accepted by another one.
+    Jobs and their files are deleted `ttl` seconds after they finish.
+    Disk methods block and should be called off the event loop.
+    """
+
+    def __init__(
+        self,
+        renderer: ReportRenderer,
+        cache: ReportCache,
+        directory: str,
+        concurrency: int,
+        max_queue: int,
+        ttl: float,
+        max_record_bytes: int,
+        bulk_timeout: Optional[float] = None,
+        record: Optional[Callable[[str, float], None]] = None
+    ):
+        self.renderer = renderer
+        self.cache = cache
+        self.directory = directory
+        self.max_concurrency = concurrency
+        self.max_queue = max_queue
+        self.ttl = ttl
+        self.max_record_bytes = max_record_bytes
+        self.bulk_timeout = bulk_timeout
+        self._record = record
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._order = itertools.count()
+        self._tasks = []
+        self._active = set() # IDs queued or running in this process
+        self.running = 0
+        self.queued = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.completed = 0
+        self.failed = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _status_path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.json")
+
+    def output_path(self, job: Dict) -> str:
+        return os.path.join(self.directory, f"{job['id']}.{job['format']}")
+
+    def _save(self, job: Dict):
+        # Write-then-rename so readers in other workers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(job, f)
+            os.replace(tmp_path, self._status_path(job["id"]))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """
+        The status of a job accepted by any worker, or None if it is unknown
+        or has expired.
+        """
+        if not JOB_ID.fullmatch(job_id):
+            return None
+        try:
+            with open(self._status_path(job_id), encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def check_capacity(self):
+        """
+        Raises QueueFullError if a job submitted now would be rejected, so
+        callers can refuse before receiving a large request body.
+        """
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise QueueFullError(f"{self.queued} report jobs already queued")
+
+    def retry_after(self) -> int:
+        """
+        Seconds until the job backlog should have drained.
+        """
+        backlog = self.running + self.queued
+        return max(1, round(self.renderer.average_seconds * backlog / max(1, self.max_concurrency)))
+
+    async def submit(self, kind: str, fmt: str, payload) -> Dict:
+        """
+        Queues a report job and returns its status. payload is the assessment
+        dict for SINGLE jobs and the path of the spooled input file for BULK
+        jobs, which the queue then owns. Raises QueueFullError when
+        max_queue jobs are already waiting.
+        """
+        self.check_capacity()
+        self._start()
+        now = time.time()
+        job = {
+            "id": uuid.uuid4().hex,
+            "kind": kind,
+            "format": fmt,
+            "status": QUEUED,
+            "created_at": now,
+            "started_at": None,
+            "finished_at": None,
+            # Until it finishes: a job still queued after a TTL was abandoned
+            "expires_at": now + self.ttl,
+            "count": 1 if kind == SINGLE else None,
+            "render_seconds": None,
+            "size": None,
+            "error": None
+        }
+        await run_in_threadpool(self._save, job)
+        self._active.add(job["id"])
+        self.queued += 1
+        self._queue.put_nowait((PRIORITIES[kind], next(self._order), job, payload))
+        return job
+
+    def _start(self):
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+            self._tasks = [asyncio.create_task(self._work()) for _ in range(self.max_concurrency)]
+            self._tasks.append(asyncio.create_task(self._clean_up_periodically()))
+
+    async def _work(self):
+        while True:
+            _, _, job, payload = await self._queue.get()
+            self.queued -= 1
+            self.running += 1
+            try:
+                await self._run(job, payload)
+            except Exception as e:
+                # Typically the job record could not be saved (spool disk
+                # full); keep this worker alive for the jobs behind it
+                print(f"Report job {job['id']} failed: {e}")
+            finally:
+                self.running -= 1
+                self._active.discard(job["id"])
+
+    async def _render(self, render, *args, **kwargs):
+        """
+        Renders on the shared pool, waiting out bursts of interactive
+        traffic instead of failing the job when the pool queue is full.
+        """
+        while True:
+            try:
+                return await render(*args, **kwargs)
+            except QueueFullError:
+                await asyncio.sleep(self.renderer.retry_after())
+
+    async def _run(self, job: Dict, payload):
+        job.update(status=RUNNING, started_at=time.time())
+        await run_in_threadpool(self._save, job)
+        fmt = job["format"]
+        output_path = self.output_path(job)
+        try:
+            if job["kind"] == SINGLE:
+                key = report_key(fmt, payload)
+                content = self.cache.get(key)
+                if content is None and self.cache.spool_dir:
+                    content = await run_in_threadpool(self.cache.get_from_disk, key, fmt)
+                seconds = 0.0
+                if content is None:
+                    content, seconds = await self._render(self.renderer.render, fmt, payload)
+                    self.cache.put(key, content)
+                await run_in_threadpool(_write_file, output_path, content)
+                stage = f"render_{fmt}"
+            else:
+                job["count"], seconds = await self._render(
+                    self.renderer.render_bulk, fmt, payload, output_path, self.max_record_bytes, timeout=self.bulk_timeout
+                )
+                stage = f"render_bulk_{fmt}"
+            if seconds and self._record:
+                self._record(stage, seconds)
+            job.update(status=DONE, render_seconds=seconds, size=os.path.getsize(output_path))
+            self.completed += 1
+        except Exception as e:
+            if isinstance(e, asyncio.TimeoutError):
+                self.timed_out += 1
+                error = "Report rendering timed out"
+            elif isinstance(e, BulkReportError):
+                error = str(e)
+            else:
+                error = f"Report rendering failed: {e}"
+            job.update(status=FAILED, error=error)
+            self.failed += 1
+            _unlink(output_path)
+        finally:
+            if job["kind"] == BULK:
+                _unlink(payload)
+            job["finished_at"] = time.time()
+            job["expires_at"] = job["finished_at"] + self.ttl
+            await run_in_threadpool(self._save, job)
+
+    async def _clean_up_periodically(self):
+        while True:
+            await asyncio.sleep(max(1.0, min(self.ttl, 60.0)))
+            try:
+                await run_in_threadpool(self.clean_up)
+            except OSError as e:
+                print(f"Report job cleanup failed: {e}")
+
+    def clean_up(self, now: Optional[float] = None) -> int:
+        """
+        Deletes expired jobs and their files, whichever worker created them,
+        plus stray files older than the TTL. Returns the number of jobs removed.
+        """
+        now = time.time() if now is None else now
+        expired = set()
+        stray = []
+        with os.scandir(self.directory) as it:
+            entries = list(it)
+        for entry in entries:
+            job_id = entry.name.split(".", 1)[0]
+            if entry.name == f"{job_id}.json" and JOB_ID.fullmatch(job_id):
+                job = self.get(job_id)
+                if job is not None and job["expires_at"] < now and job_id not in self._active:
+                    expired.add(job_id)
+            elif not JOB_ID.fullmatch(job_id):
+                stray.append(entry)
+        for entry in entries:
+            job_id = entry.name.split(".", 1)[0]
+            if job_id in expired and entry.name != f"{job_id}.json":
+                _unlink(entry.path)
+        for job_id in expired:
+            # Status last, so a download never finds a status without a file
+            _unlink(self._status_path(job_id))
+        for entry in stray:
+            # Spooled inputs and temporary files left by a crashed worker
+            try:
+                if entry.stat().st_mtime < now - self.ttl:
+                    _unlink(entry.path)
+            except FileNotFoundError:
+                pass
+        return len(expired)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "running": self.running,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "completed": self.completed,
+            "failed": self.failed,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue
+        }
+
+    def shutdown(self, wait: bool = True):
+        """
+        Stops the job workers. Jobs still queued in this process are left
+        as they are and expire with the TTL.
+        """
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+
+def _write_file(path: str, content: bytes):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _unlink(path: str):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
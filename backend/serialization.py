@@ -0,0 +1,44 @@
+import json
+from functools import lru_cache
+from typing import Callable
+
+from models import Assessment
+
+try:
+    import orjson
+except ImportError:  # Optional: the standard library encoder gives the same output
+    orjson = None
+
+
+def _json_dumps(value) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+dumps: Callable[[object], bytes] = orjson.dumps if orjson is not None else _json_dumps
+
+
+@lru_cache(maxsize=4096)
+def _control_fragment(control) -> bytes:
+    """
+    {"type": ..., "description": ...} for a control record, encoded once.
+    Records are shared by every result that selects them, so after warm-up
+    the control list of a response is a join of cached bytes.
+    """
+    return dumps({"type": control.type, "description": control.description})
+
+
+def encode_assessment(result: Assessment) -> bytes:
+    """
+    Compact UTF-8 JSON for an Assessment, with the keys in AssessmentResponse
+    field order. The result came from the pipeline, so it is not validated
+    again on the way out.
+    """
+    head = dumps({"risk_score": result.risk_score, "risk_level": result.risk_level, "hazards": result.hazards})
+    tail = dumps({
+        "confidence": result.confidence,
+        "confidence_score": result.confidence_score,
+        "reasoning": result.reasoning,
+        "description": result.description
+    })
+    controls = b",".join([_control_fragment(c) for c in result.controls])
+    return b"".join((head[:-1], b',"controls":[', controls, b"],", tail[1:]))
@@ -0,0 +1,282 @@
+import functools
+import threading
+
+import settings
+from admission import ASSESS, BULK, RENDER, UPLOAD, AdmissionController, Lane
+from assessment_cache import AssessmentCache
+from caching import LRUCache
+from concurrency import BoundedExecutor, make_executor
+from instrumentation import Metrics, StartupReport
+from knowledge import KnowledgeBaseManager
+from pipeline import PIPELINE_VERSION, AssessmentPipeline
+from rendering import ReportRenderer
+from report_cache import ReportCache
+from report_jobs import ReportJobQueue
+from vision import ImageTagger
+from logic.control_engine import ControlEngine
+from logic.fingerprint import fingerprint
+from logic.hazard_engine import HazardEngine
+from logic.kb_snapshot import KnowledgeSnapshot
+from logic.knowledge_base import KnowledgeBase
+from logic.plugins import load_plugin
+from logic.risk_engine import RiskEngine
+from logic.text_normalizer import DEFAULT_REPLACEMENTS, load_replacements
+from logic.transcription_engine import TranscriptionBackend
+from logic.vision_engine import VisionTagger
+
+
+def service(build):
+    """
+    Turns a Services method into an attribute built on first access, under
+    the container lock, with its initialization time in the startup report.
+    """
+    name = build.__name__
+
+    @functools.wraps(build)
+    def get(self):
+        instance = self.__dict__.get(name)
+        if instance is None:
+            with self._lock:
+                instance = self.__dict__.get(name)
+                if instance is None:
+                    with self.startup.timed(f"init {name}"):
+                        instance = build(self)
+                    self.__dict__[name] = instance
+        return instance
+
+    return property(get)
+
+
+class Services:
+    """
+    Every engine, pool and cache behind the API. Each one is created the
+    first time an endpoint needs it, so a worker that only serves /assess
+    never imports python-docx or ReportLab or starts a render pool;
+    warm_up() creates and primes everything ahead of traffic instead.
+    """
+
+    def __init__(self, startup: StartupReport):
+        self.startup = startup
+        self._lock = threading.RLock()
+        self.metrics = Metrics(enabled=settings.METRICS_ENABLED, server_timing=settings.SERVER_TIMING)
+        self.metrics.add_collector(startup.collect)
+
+    @service
+    def risk_engine(self) -> RiskEngine:
+        risk_engine = RiskEngine()
+        self.metrics.instrument(risk_engine, "calculate_risk", "risk")
+        return risk_engine
+
+    def build_pipeline(self, kb: KnowledgeBase) -> AssessmentPipeline:
+        """
+        Compiles a knowledge base into a ready-to-serve pipeline snapshot.
+        """
+        normalization_rules = dict(DEFAULT_REPLACEMENTS)
+        normalization_rules.update(kb.normalization_rules)
+        if settings.NORMALIZATION_RULES_FILE:
+            normalization_rules.update(load_replacements(settings.NORMALIZATION_RULES_FILE))
+
+        hazard_engine = HazardEngine(
+            normalization_rules=normalization_rules,
+            normalize_cache_size=settings.NORMALIZE_CACHE_SIZE,
+            hazard_dictionary=kb.hazards
+        )
+        control_engine = ControlEngine(kb.control_rules, kb.general_controls, kb.high_risk_controls)
+        return self._assemble_pipeline(hazard_engine, control_engine)
+
+    def attach_pipeline(self, snapshot: KnowledgeSnapshot) -> AssessmentPipeline:
+        """
+        Builds a pipeline on the tables of a memory-mapped knowledge base snapshot.
+        """
+        hazard_engine = HazardEngine.from_snapshot(snapshot, normalize_cache_size=settings.NORMALIZE_CACHE_SIZE)
+        control_engine = ControlEngine.from_snapshot(snapshot)
+        return self._assemble_pipeline(hazard_engine, control_engine)
+
+    def _assemble_pipeline(self, hazard_engine: HazardEngine, control_engine: ControlEngine) -> AssessmentPipeline:
+        control_engine.precompute(hazard_engine.hazard_names())
+        pipeline = AssessmentPipeline(hazard_engine, self.risk_engine, control_engine)
+
+        # Per-stage timings; a no-op when METRICS_ENABLED=0
+        self.metrics.instrument(hazard_engine, "_normalize_text", "normalize")
+        self.metrics.instrument(hazard_engine, "_scan_keywords", "keyword_match")
+        self.metrics.instrument(hazard_engine, "_match_fuzzy", "fuzzy_match")
+        self.metrics.instrument(pipeline, "_select_controls", "controls")
+        return pipeline
+
+    @service
+    def assessment_cache(self) -> AssessmentCache:
+        """
+        The assessment entry point: the result cache in front of the live
+        knowledge base snapshot, which is loaded and compiled here.
+        """
+        assessment_cache = AssessmentCache(
+            None,
+            max_bytes=settings.ASSESSMENT_CACHE_BYTES,
+            max_entries=settings.ASSESSMENT_CACHE_ENTRIES,
+            ttl=settings.ASSESSMENT_CACHE_TTL or None
+        )
+
+        def swap_pipeline(pipeline: AssessmentPipeline):
+            assessment_cache.pipeline = pipeline
+
+        self._knowledge_base = KnowledgeBaseManager(
+            settings.KNOWLEDGE_BASE_DIR,
+            self.build_pipeline,
+            swap_pipeline,
+            snapshot_path=settings.KNOWLEDGE_BASE_SNAPSHOT,
+            attach=self.attach_pipeline,
+            extra_files=(settings.NORMALIZATION_RULES_FILE,) if settings.NORMALIZATION_RULES_FILE else (),
+            build_version=fingerprint(
+                PIPELINE_VERSION,
+                HazardEngine.COMPILER_VERSION,
+                HazardEngine.FUZZY_CUTOFF,
+                ControlEngine.COMPILER_VERSION,
+                DEFAULT_REPLACEMENTS
+            )
+        )
+        self._knowledge_base.load()
+        self.metrics.add_cache("assessment", assessment_cache.results)
+        return assessment_cache
+
+    @property
+    def knowledge_base(self) -> KnowledgeBaseManager:
+        self.assessment_cache # created and loaded together
+        return self._knowledge_base
+
+    @service
+    def transcription_backend(self) -> TranscriptionBackend:
+        return load_plugin(settings.TRANSCRIPTION_BACKEND, TranscriptionBackend)
+
+    @service
+    def transcription_pool(self) -> BoundedExecutor:
+        transcription_pool = BoundedExecutor(
+            make_executor(settings.TRANSCRIPTION_EXECUTOR, settings.TRANSCRIPTION_CONCURRENCY, "transcribe"),
+            max_concurrency=settings.TRANSCRIPTION_CONCURRENCY,
+            max_queue=settings.TRANSCRIPTION_QUEUE_DEPTH,
+            timeout=settings.TRANSCRIPTION_TIMEOUT
+        )
+        self.metrics.add_pool("transcription", transcription_pool)
+        return transcription_pool
+
+    @service
+    def transcription_stream_pool(self) -> BoundedExecutor:
+        transcription_stream_pool = BoundedExecutor(
+            make_executor("thread", settings.TRANSCRIPTION_STREAM_CONCURRENCY, "transcribe-stream"),
+            max_concurrency=settings.TRANSCRIPTION_STREAM_CONCURRENCY,
+            max_queue=settings.TRANSCRIPTION_QUEUE_DEPTH,
+            timeout=settings.TRANSCRIPTION_TIMEOUT
+        )
+        self.metrics.add_pool("transcription_stream", transcription_stream_pool)
+        return transcription_stream_pool
+
+    @service
+    def image_tagger(self) -> ImageTagger:
+        image_tagger = ImageTagger(
+            load_plugin(settings.VISION_TAGGER, VisionTagger),
+            BoundedExecutor(
+                make_executor("thread", settings.VISION_CONCURRENCY, "vision"),
+                max_concurrency=settings.VISION_CONCURRENCY,
+                max_queue=settings.VISION_QUEUE_DEPTH,
+                timeout=settings.VISION_TIMEOUT
+            ),
+            LRUCache(settings.VISION_CACHE_BYTES, ttl=settings.VISION_CACHE_TTL or None),
+            perceptual=settings.VISION_PERCEPTUAL_HASH
+        )
+        self.metrics.add_cache("vision", image_tagger.cache)
+        self.metrics.add_pool("vision", image_tagger.pool)
+        return image_tagger
+
+    @service
+    def report_renderer(self) -> ReportRenderer:
+        report_renderer = ReportRenderer(
+            BoundedExecutor(
+                make_executor(settings.RENDER_EXECUTOR, settings.RENDER_WORKERS, "render"),
+                max_concurrency=settings.RENDER_WORKERS,
+                max_queue=settings.RENDER_QUEUE_DEPTH,
+                timeout=settings.RENDER_TIMEOUT
+            ),
+            workers=settings.RENDER_WORKERS,
+            max_pdf_assessments=settings.BULK_PDF_MAX_ASSESSMENTS
+        )
+        self.metrics.add_pool("render", report_renderer.pool)
+        return report_renderer
+
+    @service
+    def report_cache(self) -> ReportCache:
+        report_cache = ReportCache(settings.REPORT_CACHE_BYTES, settings.REPORT_CACHE_DIR, settings.REPORT_CACHE_DIR_BYTES)
+        self.metrics.add_cache("report", report_cache.memory)
+        return report_cache
+
+    @service
+    def report_jobs(self) -> ReportJobQueue:
+        report_jobs = ReportJobQueue(
+            self.report_renderer,
+            self.report_cache,
+            settings.REPORT_JOB_DIR,
+            concurrency=settings.REPORT_JOB_CONCURRENCY,
+            max_queue=settings.REPORT_JOB_QUEUE_DEPTH,
+            ttl=settings.REPORT_JOB_TTL,
+            max_record_bytes=settings.BATCH_MAX_RECORD_BYTES,
+            bulk_timeout=settings.BULK_RENDER_TIMEOUT,
+            record=self.metrics.record
+        )
+        self.metrics.add_pool("report_jobs", report_jobs)
+        return report_jobs
+
+    @service
+    def admission(self) -> AdmissionController:
+        admission_controller = AdmissionController(
+            [
+                Lane(ASSESS, settings.ADMISSION_ASSESS_CONCURRENCY, settings.ADMISSION_ASSESS_QUEUE,
+                     settings.ADMISSION_LIGHT_MAX_BODY, priority=0),
+                Lane(UPLOAD, settings.ADMISSION_UPLOAD_CONCURRENCY, settings.ADMISSION_UPLOAD_QUEUE,
+                     settings.ADMISSION_UPLOAD_MAX_BODY, priority=1),
+                Lane(RENDER, settings.ADMISSION_RENDER_CONCURRENCY, settings.ADMISSION_RENDER_QUEUE,
+                     settings.ADMISSION_RENDER_MAX_BODY, priority=2),
+                Lane(BULK, settings.ADMISSION_BULK_CONCURRENCY, settings.ADMISSION_BULK_QUEUE,
+                     settings.ADMISSION_BULK_MAX_BODY, priority=2),
+            ],
+            max_concurrency=settings.ADMISSION_MAX_CONCURRENCY,
+            queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT,
+            light_max_body=settings.ADMISSION_LIGHT_MAX_BODY,
+            default_max_body=settings.ADMISSION_DEFAULT_MAX_BODY
+        )
+        self.metrics.add_admission(admission_controller)
+        return admission_controller
+
+    async def warm_up(self):
+        """
+        Creates every service and pays one-off import, compile and
+        first-call costs before the worker takes traffic.
+        """
+        with self.startup.timed("warm-up assessment"):
+            self.assessment_cache.pipeline.run("Warm-up: welding near a chemical leak at height", ["Fire"], 0, False)
+        # Touching a service creates it
+        self.transcription_backend
+        self.transcription_pool
+        self.transcription_stream_pool
+        self.image_tagger
+        if settings.VISION_PERCEPTUAL_HASH:
+            try:
+                self.startup.import_module("PIL.Image")
+            except ImportError:
+                pass
+        self.report_cache
+        self.report_jobs
+        if settings.RENDER_EXECUTOR == "thread":
+            # Rendering happens in this process: break out the import costs
+            self.startup.import_module("docx")
+            self.startup.import_module("reportlab.platypus")
+        if settings.RENDER_WARMUP:
+            with self.startup.timed(f"warm-up {settings.RENDER_EXECUTOR} render workers"):
+                warmed = await self.report_renderer.warm_up()
+            print(f"Report renderer warmed: {warmed} {settings.RENDER_EXECUTOR} worker(s)")
+
+    def shutdown(self):
+        """
+        Stops the worker pools that were started.
+        """
+        for name in ("transcription_pool", "transcription_stream_pool", "image_tagger", "report_jobs", "report_renderer"):
+            instance = self.__dict__.get(name)
+            if instance is not None:
+                instance.shutdown(wait=False)
@@ -0,0 +1,101 @@
+"""
+Runtime configuration, read once from the environment at import time.
+"""
+import os
+import tempfile
+
+# Startup: create and prime every engine, pool and cache before serving
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "0") == "1"
+
+# Instrumentation
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
+
+# Knowledge base (hazard dictionary, control rules)
+KNOWLEDGE_BASE_DIR = os.getenv("KNOWLEDGE_BASE_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "knowledge_base")
+# Compiled snapshot file memory-mapped by every worker on the node, e.g.
+# /dev/shm/safetyweb-kb.bin; unset compiles the knowledge base per worker
+KNOWLEDGE_BASE_SNAPSHOT = os.getenv("KNOWLEDGE_BASE_SNAPSHOT") or None
+KNOWLEDGE_BASE_WATCH_INTERVAL = float(os.getenv("KNOWLEDGE_BASE_WATCH_INTERVAL", "0")) # seconds, 0 disables
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN") or None # enables /admin/* when set
+
+# Hazard engine
+NORMALIZE_CACHE_SIZE = int(os.getenv("NORMALIZE_CACHE_SIZE", "1024"))
+NORMALIZATION_RULES_FILE = os.getenv("NORMALIZATION_RULES_FILE") or None
+
+# /assess, /assess/batch result cache (0 bytes disables it)
+ASSESSMENT_CACHE_BYTES = int(os.getenv("ASSESSMENT_CACHE_BYTES", str(16 * 1024 * 1024)))
+ASSESSMENT_CACHE_ENTRIES = int(os.getenv("ASSESSMENT_CACHE_ENTRIES", "10000"))
+ASSESSMENT_CACHE_TTL = float(os.getenv("ASSESSMENT_CACHE_TTL", "3600"))
+
+# /assess/batch
+BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", "64"))
+BATCH_SPOOL_MEMORY = int(os.getenv("BATCH_SPOOL_MEMORY", str(1024 * 1024)))
+BATCH_MAX_RECORD_BYTES = int(os.getenv("BATCH_MAX_RECORD_BYTES", str(1024 * 1024)))
+
+# /transcribe
+TRANSCRIPTION_BACKEND = os.getenv("TRANSCRIPTION_BACKEND", "logic.transcription_engine:MockTranscriptionBackend")
+TRANSCRIPTION_EXECUTOR = os.getenv("TRANSCRIPTION_EXECUTOR", "thread") # "thread" or "process"
+TRANSCRIPTION_CONCURRENCY = int(os.getenv("TRANSCRIPTION_CONCURRENCY", "4"))
+TRANSCRIPTION_QUEUE_DEPTH = int(os.getenv("TRANSCRIPTION_QUEUE_DEPTH", "32"))
+TRANSCRIPTION_TIMEOUT = float(os.getenv("TRANSCRIPTION_TIMEOUT", "30"))
+
+# /assess/stream (live transcripts always run on threads: streams keep state)
+TRANSCRIPTION_STREAM_CONCURRENCY = int(os.getenv("TRANSCRIPTION_STREAM_CONCURRENCY", "4"))
+TRANSCRIPTION_STREAM_MAX_CHUNK = int(os.getenv("TRANSCRIPTION_STREAM_MAX_CHUNK", str(1024 * 1024)))
+# Whole recording: backends without streaming support hold all of it in memory until "end"
+TRANSCRIPTION_STREAM_MAX_BYTES = int(os.getenv("TRANSCRIPTION_STREAM_MAX_BYTES", str(25 * 1024 * 1024)))
+
+# /assess image tagging
+VISION_TAGGER = os.getenv("VISION_TAGGER", "logic.vision_engine:FilenameVisionTagger")
+VISION_CONCURRENCY = int(os.getenv("VISION_CONCURRENCY", "2"))
+VISION_QUEUE_DEPTH = int(os.getenv("VISION_QUEUE_DEPTH", "16"))
+VISION_TIMEOUT = float(os.getenv("VISION_TIMEOUT", "30"))
+VISION_CACHE_BYTES = int(os.getenv("VISION_CACHE_BYTES", str(4 * 1024 * 1024)))
+VISION_CACHE_TTL = float(os.getenv("VISION_CACHE_TTL", "86400"))
+VISION_PERCEPTUAL_HASH = os.getenv("VISION_PERCEPTUAL_HASH", "1") == "1"
+
+# /report, /report/pdf
+RENDER_EXECUTOR = os.getenv("RENDER_EXECUTOR", "process") # "thread" or "process"
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", str(os.cpu_count() or 1)))
+RENDER_QUEUE_DEPTH = int(os.getenv("RENDER_QUEUE_DEPTH", "16"))
+RENDER_TIMEOUT = float(os.getenv("RENDER_TIMEOUT", "60"))
+RENDER_WARMUP = os.getenv("RENDER_WARMUP", "1") == "1" # part of the STARTUP_WARMUP phase
+REPORT_CACHE_BYTES = int(os.getenv("REPORT_CACHE_BYTES", str(64 * 1024 * 1024)))
+REPORT_CACHE_DIR = os.getenv("REPORT_CACHE_DIR") or None
+REPORT_CACHE_DIR_BYTES = int(os.getenv("REPORT_CACHE_DIR_BYTES", str(1024 * 1024 * 1024))) # 0: unbounded
+
+# /report/bulk
+SPOOL_DIR = os.getenv("SPOOL_DIR") or tempfile.gettempdir()
+BULK_RENDER_TIMEOUT = float(os.getenv("BULK_RENDER_TIMEOUT", "600"))
+# PDFs are held in memory until written, unlike DOCX; larger PDF batches get 422
+BULK_PDF_MAX_ASSESSMENTS = int(os.getenv("BULK_PDF_MAX_ASSESSMENTS", "2000"))
+
+# /report/jobs: asynchronous reports, spooled on disk for every worker on the node
+REPORT_JOB_DIR = os.getenv("REPORT_JOB_DIR") or os.path.join(SPOOL_DIR, "safetyweb-report-jobs")
+REPORT_JOB_CONCURRENCY = int(os.getenv("REPORT_JOB_CONCURRENCY", "2"))
+REPORT_JOB_QUEUE_DEPTH = int(os.getenv("REPORT_JOB_QUEUE_DEPTH", "64"))
+REPORT_JOB_TTL = float(os.getenv("REPORT_JOB_TTL", "3600"))
+
+# Admission control: per-endpoint concurrency, queue and request body limits,
+# applied before a request body is read. Lanes are served most urgent first.
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1") == "1"
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "64")) # all lanes together
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "10"))
+ADMISSION_DEFAULT_MAX_BODY = int(os.getenv("ADMISSION_DEFAULT_MAX_BODY", str(1024 * 1024))) # other endpoints
+# Text-only /assess: a declared body up to ADMISSION_LIGHT_MAX_BODY bytes
+ADMISSION_LIGHT_MAX_BODY = int(os.getenv("ADMISSION_LIGHT_MAX_BODY", str(64 * 1024)))
+ADMISSION_ASSESS_CONCURRENCY = int(os.getenv("ADMISSION_ASSESS_CONCURRENCY", "64"))
+ADMISSION_ASSESS_QUEUE = int(os.getenv("ADMISSION_ASSESS_QUEUE", "256"))
+# /assess with files or a chunked body, /transcribe
+ADMISSION_UPLOAD_CONCURRENCY = int(os.getenv("ADMISSION_UPLOAD_CONCURRENCY", "8"))
+ADMISSION_UPLOAD_QUEUE = int(os.getenv("ADMISSION_UPLOAD_QUEUE", "32"))
+ADMISSION_UPLOAD_MAX_BODY = int(os.getenv("ADMISSION_UPLOAD_MAX_BODY", str(25 * 1024 * 1024)))
+# /report, /report/pdf
+ADMISSION_RENDER_CONCURRENCY = int(os.getenv("ADMISSION_RENDER_CONCURRENCY", "8"))
+ADMISSION_RENDER_QUEUE = int(os.getenv("ADMISSION_RENDER_QUEUE", "32"))
+ADMISSION_RENDER_MAX_BODY = int(os.getenv("ADMISSION_RENDER_MAX_BODY", str(1024 * 1024)))
+# /assess/batch, /report/bulk, /report/jobs/bulk
+ADMISSION_BULK_CONCURRENCY = int(os.getenv("ADMISSION_BULK_CONCURRENCY", "2"))
+ADMISSION_BULK_QUEUE = int(os.getenv("ADMISSION_BULK_QUEUE", "8"))
+ADMISSION_BULK_MAX_BODY = int(os.getenv("ADMISSION_BULK_MAX_BODY", str(256 * 1024 * 1024)))
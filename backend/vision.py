@@ -0,0 +1,73 @@
+import hashlib
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from caching import LRUCache
+from concurrency import BoundedExecutor
+from logic.vision_engine import VisionTagger, perceptual_hash
+
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def image_fingerprint(image: BinaryIO, perceptual: bool = False) -> str:
+    """
+    Content key of an uploaded image: its perceptual hash when requested and
+    decodable, otherwise the SHA-256 of its bytes, read in chunks.
+    Leaves the file positioned at the start.
+    """
+    key = None
+    if perceptual:
+        image.seek(0)
+        phash = perceptual_hash(image)
+        if phash is not None:
+            key = f"dhash:{phash}"
+    if key is None:
+        image.seek(0)
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: image.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+        key = f"sha256:{digest.hexdigest()}"
+    image.seek(0)
+    return key
+
+
+class ImageTagger:
+    """
+    Runs the configured VisionTagger on a bounded worker pool, in front of a
+    cache keyed by image content, so repeat photos skip inference entirely.
+    Uploads are never read into memory as a whole: Starlette spools them to a
+    temporary file and both hashing and tagging read from that file.
+    """
+
+    def __init__(self, tagger: VisionTagger, pool: BoundedExecutor, cache: LRUCache, perceptual: bool = False):
+        self.tagger = tagger
+        self.pool = pool
+        self.cache = cache
+        self.perceptual = perceptual
+
+    async def cache_key(self, image: BinaryIO, filename: str) -> tuple:
+        content_key = None
+        if self.tagger.uses_content:
+            content_key = await run_in_threadpool(image_fingerprint, image, self.perceptual)
+        return (content_key, filename if self.tagger.uses_filename else None)
+
+    async def tag(self, image: BinaryIO, filename: str = "", content_type: Optional[str] = None) -> Tuple[List[str], int]:
+        """
+        Returns (image_tags, vision_confidence_boost). Raises QueueFullError
+        when the pool is saturated and asyncio.TimeoutError past the timeout.
+        """
+        key = await self.cache_key(image, filename)
+        cached = self.cache.get(key)
+        if cached is None:
+            tags, boost = await self.pool.run(self.tagger.tag, image, filename, content_type)
+            cached = (tuple(tags), boost)
+            self.cache.put(key, cached, 256 + sum(64 + len(t) for t in tags))
+        tags, boost = cached
+        return list(tags), boost
+
+    def stats(self) -> Dict[str, object]:
+        return {"pool": self.pool.stats(), "cache": self.cache.stats()}
+
+    def shutdown(self, wait: bool = True):
+        self.pool.shutdown(wait=wait)